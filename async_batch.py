@@ -0,0 +1,107 @@
+"""
+Asyncio batch pipeline: read, convert and write files concurrently
+
+On network filesystems the sequential batch loop spends much of each file
+blocked in reading the input and writing the output while the CPU is idle.
+run_pipeline() reads upcoming inputs into memory in I/O threads, converts
+the in-memory data on one conversion thread, and writes finished outputs in
+I/O threads, so reading file N+1 and writing file N-1 overlap converting
+file N.
+
+At most in_flight files are held at once (read, converting or waiting to be
+written), which caps memory at roughly in_flight inputs plus outputs.
+Conversions run one at a time on a single thread: convert_pdf and its
+caches are not thread-safe, and the pipeline hides I/O latency rather than
+adding CPU parallelism. The jobs themselves are pulled on a feeder thread:
+producing them walks directories and checks outputs, which on the same
+slow filesystem would otherwise block the event loop and every transfer
+it is overlapping.
+"""
+
+import os
+import time
+import asyncio
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# next() default marking the end of the jobs
+_NO_MORE_JOBS = object()
+
+def read_file(path):
+    return Path(path).read_bytes()
+
+def write_file(path, data):
+    """Write data to a temporary file next to path, then rename it into place"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+async def _process(job, convert, read, write, io_pool, convert_pool, on_start, on_done):
+    input_file, output_file = job[0], job[1]
+    loop = asyncio.get_running_loop()
+    start = None
+    try:
+        data = await loop.run_in_executor(io_pool, read, input_file)
+        start = time.perf_counter()
+        if on_start is not None:
+            on_start(job)
+        output_data, stats = await loop.run_in_executor(convert_pool, convert, job, data)
+        del data
+        await loop.run_in_executor(io_pool, write, output_file, output_data)
+    except Exception as e:
+        on_done(job, None, e, time.perf_counter() - start if start is not None else 0.0)
+    else:
+        on_done(job, stats, None, time.perf_counter() - start)
+
+async def run_pipeline_async(jobs, convert, in_flight=4, read=read_file, write=write_file,
+                             on_start=None, on_done=None):
+    """See run_pipeline()"""
+    in_flight = max(in_flight, 1)
+    slots = asyncio.Semaphore(in_flight)
+    tasks = set()
+    on_done = on_done or (lambda job, stats, error, elapsed: None)
+
+    def finished(task):
+        tasks.discard(task)
+        slots.release()
+
+    loop = asyncio.get_running_loop()
+    jobs = iter(jobs)
+    with ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix='pipeline-io') as io_pool, \
+         ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-convert') as convert_pool, \
+         ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-feed') as feed_pool:
+        while True:
+            await slots.acquire()
+            job = await loop.run_in_executor(feed_pool, next, jobs, _NO_MORE_JOBS)
+            if job is _NO_MORE_JOBS:
+                slots.release()
+                break
+            task = asyncio.create_task(
+                _process(job, convert, read, write, io_pool, convert_pool, on_start, on_done)
+            )
+            tasks.add(task)
+            task.add_done_callback(finished)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+def run_pipeline(jobs, convert, in_flight=4, read=read_file, write=write_file, on_start=None, on_done=None):
+    """Convert every job with up to in_flight files in the pipeline at once
+
+    jobs yields tuples starting with (input file, output file); it is consumed
+    lazily, one job per free slot, on a feeder thread of its own, so it may
+    block on the filesystem; whatever it shares with the callbacks below
+    (such as the batch metrics) must be thread-safe. convert(job, input_bytes) returns
+    (output bytes, stats) and runs on the conversion thread. read(path) and
+    write(path, bytes) run on the I/O threads. on_start(job) is called when a
+    job's input has been read and its conversion is queued, and
+    on_done(job, stats, error, seconds) when it is written or has failed;
+    both run on the calling thread, so they may update journals and reports
+    without locking.
+    """
+    asyncio.run(run_pipeline_async(jobs, convert, in_flight, read, write, on_start, on_done))
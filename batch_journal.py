@@ -0,0 +1,67 @@
+"""
+Batch journal for resumable conversions
+
+Every batch run appends one JSON line per event to a journal file:
+
+    {"event": "started",  "input": "/abs/in.pdf", "output": "/abs/out.pdf", "time": ...}
+    {"event": "finished", "input": "/abs/in.pdf", "output": "/abs/out.pdf", "time": ...}
+    {"event": "failed",   "input": "/abs/in.pdf", "output": "/abs/out.pdf", "error": "...", "time": ...}
+
+The last event recorded for an input is its state. A file that was started
+but never finished or failed was interrupted and is converted again on resume.
+"""
+
+import json
+import time
+from pathlib import Path
+
+DEFAULT_JOURNAL_NAME = '.pdf_ua_journal.jsonl'
+
+class BatchJournal:
+    """Append-only record of which batch inputs were started, finished or failed"""
+
+    def __init__(self, journal_path):
+        self.path = Path(journal_path)
+        self._file = None
+
+    def load(self):
+        """Return a dict of absolute input path -> last recorded event"""
+        states = {}
+        if not self.path.exists():
+            return states
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Last line cut short when the batch was killed
+                if 'input' in record:
+                    states[record['input']] = record['event']
+        return states
+
+    def record(self, event, input_file, output_file, **fields):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a+', encoding='utf-8')
+            # Terminate a line cut short by a killed batch before appending
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != '\n':
+                    self._file.write('\n')
+
+        entry = {'event': event, 'input': journal_key(input_file), 'output': str(output_file),
+                 'time': round(time.time(), 3)}
+        entry.update(fields)
+        self._file.write(json.dumps(entry) + '\n')
+        # Flush every line so a killed batch leaves an accurate journal behind
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def journal_key(input_file):
+    """Journal key for an input file: its absolute path, without touching its contents"""
+    return str(Path(input_file).absolute())
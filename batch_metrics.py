@@ -0,0 +1,186 @@
+"""
+Machine-readable batch metrics
+
+BatchMetrics collects one record per converted (or failed) file and can
+  - append each record as a JSON line to a report file (--report-jsonl)
+  - rewrite a Prometheus text-format file after every record
+    (--metrics-textfile), for node_exporter's textfile collector
+
+Its methods may be called from several threads: the --pipeline feeder
+thread counts skipped files while the event loop records conversions.
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PAGES_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name):
+        for bound, count in zip(self.buckets, self.counts):
+            yield f'{name}_bucket{{le="{bound}"}} {count}'
+        yield f'{name}_bucket{{le="+Inf"}} {self.count}'
+        yield f'{name}_sum {self.sum:.6f}'
+        yield f'{name}_count {self.count}'
+
+def error_class(error):
+    """Exception class name, or the original class of an error raised in a child process"""
+    return getattr(error, 'error_class', type(error).__name__)
+
+def file_record(input_file, output_file, duration, stats=None, error=None):
+    """Build the report record for one file"""
+    input_path = Path(input_file)
+    output_path = Path(output_file)
+    stats = stats or {}
+
+    record = {
+        'input': str(input_path),
+        'output': str(output_path),
+        'status': 'failed' if error is not None else 'converted',
+        'input_bytes': input_path.stat().st_size if input_path.exists() else None,
+        'output_bytes': output_path.stat().st_size if error is None and output_path.exists() else None,
+        'pages': stats.get('pages'),
+        'duration': round(duration, 4),
+        'glyphs_fixed': stats.get('glyphs_fixed'),
+        'struct_elements': stats.get('struct_elements'),
+        'font_program_bytes': stats.get('font_program_bytes'),
+        'tag_cache_hits': stats.get('tag_cache_hits'),
+        'tag_time_saved': stats.get('tag_time_saved'),
+        'previous_pages_reused': stats.get('previous_pages_reused'),
+        'bytes_saved': stats.get('bytes_saved'),
+        'error_class': error_class(error) if error is not None else None,
+        'time': round(time.time(), 3),
+    }
+    if error is not None:
+        record['error'] = str(error)
+    return record
+
+class BatchMetrics:
+    """Per-file JSONL report and Prometheus textfile exporter for one batch"""
+
+    def __init__(self, report_path=None, textfile_path=None):
+        self.report_path = Path(report_path) if report_path else None
+        self.textfile_path = Path(textfile_path) if textfile_path else None
+        self._report = None
+        self._lock = threading.Lock()
+        self.start_time = time.time()
+
+        self.files = {'converted': 0, 'failed': 0, 'skipped': 0}
+        self.errors = {}
+        self.pages = 0
+        self.glyphs_fixed = 0
+        self.struct_elements = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.pages_per_second = Histogram(PAGES_PER_SECOND_BUCKETS)
+
+    @property
+    def enabled(self):
+        return self.report_path is not None or self.textfile_path is not None
+
+    def skipped(self):
+        with self._lock:
+            self.files['skipped'] += 1
+
+    def record(self, record):
+        """Add one file's record to the totals and write it out"""
+        with self._lock:
+            self.files[record['status']] += 1
+            if record['error_class']:
+                self.errors[record['error_class']] = self.errors.get(record['error_class'], 0) + 1
+            self.pages += record['pages'] or 0
+            self.glyphs_fixed += record['glyphs_fixed'] or 0
+            self.struct_elements += record['struct_elements'] or 0
+            self.input_bytes += record['input_bytes'] or 0
+            self.output_bytes += record['output_bytes'] or 0
+
+            self.duration.observe(record['duration'])
+            if record['pages'] and record['duration'] > 0:
+                self.pages_per_second.observe(record['pages'] / record['duration'])
+
+            if self.report_path is not None:
+                if self._report is None:
+                    self.report_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._report = open(self.report_path, 'a', encoding='utf-8')
+                self._report.write(json.dumps(record) + '\n')
+                self._report.flush()
+
+            if self.textfile_path is not None:
+                self.write_textfile()
+
+    def textfile_lines(self):
+        yield '# HELP pdf_ua_files_total Files processed by the converter, by result.'
+        yield '# TYPE pdf_ua_files_total counter'
+        for status, count in self.files.items():
+            yield f'pdf_ua_files_total{{status="{status}"}} {count}'
+
+        yield '# HELP pdf_ua_errors_total Failed files, by exception class.'
+        yield '# TYPE pdf_ua_errors_total counter'
+        for error_class, count in sorted(self.errors.items()):
+            yield f'pdf_ua_errors_total{{class="{error_class}"}} {count}'
+
+        counters = (
+            ('pdf_ua_pages_total', 'Pages converted.', self.pages),
+            ('pdf_ua_glyphs_fixed_total', 'Missing ToUnicode glyph mappings added.', self.glyphs_fixed),
+            ('pdf_ua_struct_elements_total', 'Structure elements created.', self.struct_elements),
+            ('pdf_ua_input_bytes_total', 'Bytes read from input PDFs.', self.input_bytes),
+            ('pdf_ua_output_bytes_total', 'Bytes written to output PDFs.', self.output_bytes),
+        )
+        for name, help_text, value in counters:
+            yield f'# HELP {name} {help_text}'
+            yield f'# TYPE {name} counter'
+            yield f'{name} {value}'
+
+        yield '# HELP pdf_ua_file_duration_seconds Conversion time per file.'
+        yield '# TYPE pdf_ua_file_duration_seconds histogram'
+        yield from self.duration.lines('pdf_ua_file_duration_seconds')
+
+        yield '# HELP pdf_ua_file_pages_per_second Conversion throughput per file.'
+        yield '# TYPE pdf_ua_file_pages_per_second histogram'
+        yield from self.pages_per_second.lines('pdf_ua_file_pages_per_second')
+
+        elapsed = time.time() - self.start_time
+        yield '# HELP pdf_ua_batch_pages_per_second Pages converted per wall-clock second since the batch started.'
+        yield '# TYPE pdf_ua_batch_pages_per_second gauge'
+        yield f'pdf_ua_batch_pages_per_second {self.pages / elapsed if elapsed > 0 else 0:.3f}'
+
+        yield '# HELP pdf_ua_last_update_timestamp_seconds Time these metrics were written.'
+        yield '# TYPE pdf_ua_last_update_timestamp_seconds gauge'
+        yield f'pdf_ua_last_update_timestamp_seconds {time.time():.3f}'
+
+    def write_textfile(self):
+        """Atomically replace the textfile so the collector never reads a partial file"""
+        self.textfile_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.textfile_path.with_name(f".{self.textfile_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.textfile_lines()) + '\n')
+        os.replace(tmp_path, self.textfile_path)
+
+    def close(self):
+        with self._lock:
+            if self.textfile_path is not None:
+                self.write_textfile()
+            if self._report is not None:
+                self._report.close()
+                self._report = None
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark threaded stream compression against qpdf's serial Flate
+
+Converts each PDF once with the new content and ToUnicode streams left to
+pdf.save() (qpdf compresses them one after another while writing) and once
+per --compress-workers value with compress_streams() compressing them in a
+thread pool first. Reports the compress + save time, the whole conversion
+time and the output size of each. Without a corpus directory, one large
+synthetic LaTeX-like document is generated (see corpus.py).
+
+    python benchmarks/bench_compress.py ~/lectures/
+    python benchmarks/bench_compress.py --pages 1000 --workers 1 2 4 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdf_ua_convert
+from corpus import generate_pdf
+
+compress_streams = pdf_ua_convert.compress_streams
+save_atomic = pdf_ua_convert.save_atomic
+
+def leave_to_qpdf(pdf, *args, **kwargs):
+    """compress_streams stand-in: nothing is compressed before pdf.save()"""
+    return 0, 0, 0
+
+def timed(function, timings):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+    return wrapper
+
+def convert(input_file, output_file, compress, **options):
+    """Return (compress + save seconds, conversion seconds) of one conversion"""
+    timings = []
+    pdf_ua_convert.compress_streams = timed(compress, timings)
+    pdf_ua_convert.save_atomic = timed(save_atomic, timings)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            pdf_ua_convert.convert_pdf(str(input_file), str(output_file), online=None, **options)
+        return sum(timings), time.perf_counter() - start
+    finally:
+        pdf_ua_convert.compress_streams = compress_streams
+        pdf_ua_convert.save_atomic = save_atomic
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark threaded stream compression against qpdf')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--pages', type=int, default=1000,
+                        help='Without a corpus: pages of the synthetic document (default: 1000)')
+    parser.add_argument('--workers', type=int, nargs='+', metavar='N',
+                        help='--compress-workers values to compare (default: 1 and one per CPU)')
+    parser.add_argument('--compression-level', type=int, choices=range(10),
+                        default=pdf_ua_convert.DEFAULT_COMPRESSION_LEVEL, metavar='0-9',
+                        help=f'zlib level (default: {pdf_ua_convert.DEFAULT_COMPRESSION_LEVEL})')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Conversions per configuration; the fastest counts (default: 3)')
+    args = parser.parse_args()
+
+    workers = args.workers or sorted({1, os.cpu_count() or 1})
+    configurations = [('qpdf (serial)', leave_to_qpdf, {})]
+    configurations += [(f'{count} worker(s)', compress_streams,
+                        {'compress_workers': count, 'compression_level': args.compression_level})
+                       for count in workers]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.corpus:
+            inputs = sorted(Path(args.corpus).rglob('*.pdf'))
+        else:
+            inputs = [tmp / 'synthetic.pdf']
+            generate_pdf(inputs[0], pages=args.pages)
+
+        print(f"{len(inputs)} file(s)")
+        print(f"{'compression':16} {'save s':>8} {'total s':>8} {'size':>12}")
+        baseline = None
+        for name, compress, options in configurations:
+            save_time = total_time = size = 0
+            for input_file in inputs:
+                output_file = tmp / 'output.pdf'
+                runs = [convert(input_file, output_file, compress, **options) for _ in range(args.repeat)]
+                file_save, file_total = min(runs)
+                save_time += file_save
+                total_time += file_total
+                size += output_file.stat().st_size
+            if baseline is None:
+                baseline = save_time
+            speedup = f"  {baseline / save_time:.1f}x" if save_time else ''
+            print(f"{name:16} {save_time:>8.2f} {total_time:>8.2f} {size:>12}{speedup}")
+
+if __name__ == '__main__':
+    main()
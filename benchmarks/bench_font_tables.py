@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fonts phase with and without the built-in TeX font tables
+
+Runs the fonts phase of a conversion (encoding resolution and missing
+glyph detection for every font with a ToUnicode CMap) over a corpus twice:
+once reading glyph names from the embedded font program as before, once
+filling them from tex_fonts.py. Reports the time, font program bytes read
+and missing glyphs found for each. Without a corpus directory, a synthetic
+corpus of fonts with built-in encodings (no /Encoding) is generated.
+
+    python benchmarks/bench_font_tables.py ~/lectures/
+    python benchmarks/bench_font_tables.py --generate 20 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pikepdf import Pdf
+from pdf_ua_convert import iter_fonts, resolve_font_encoding, parse_tounicode_codes, glyph_symbol
+from corpus import generate_corpus
+
+def fonts_phase(fonts, tex_tables):
+    """Return (font program bytes read, missing glyphs, resolvable missing glyphs)"""
+    program_bytes = missing = resolvable = 0
+    for font_obj in fonts:
+        existing = parse_tounicode_codes(font_obj.ToUnicode.read_bytes().decode('latin-1', errors='ignore'))
+        font_encoding, bytes_read = resolve_font_encoding(font_obj, tex_tables)
+        program_bytes += bytes_read
+        missing_codes = font_encoding.keys() - existing
+        missing += len(missing_codes)
+        resolvable += sum(1 for code in missing_codes if glyph_symbol(font_encoding[code]) is not None)
+    return program_bytes, missing, resolvable
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the built-in TeX font tables')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--generate', type=int, default=20, metavar='N',
+                        help='Without a corpus: number of synthetic PDFs to generate (default: 20)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Passes over the corpus per measurement (default: 5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            inputs = sorted(Path(args.corpus).rglob('*.pdf'))
+        else:
+            inputs = generate_corpus(Path(tmp) / 'corpus', args.generate, pages=2, builtin_encoding=True)
+
+        pdfs = [Pdf.open(input_file) for input_file in inputs]
+        fonts = [font_obj for pdf in pdfs for _, font_obj in iter_fonts(pdf) if '/ToUnicode' in font_obj]
+        print(f"{len(inputs)} files, {len(fonts)} fonts with a ToUnicode CMap")
+        print(f"{'encoding source':24} {'seconds':>8} {'program bytes':>14} {'missing':>8} {'resolvable':>11}")
+
+        results = {}
+        for name, tex_tables in (('font program', False), ('built-in TeX tables', True)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                program_bytes, missing, resolvable = fonts_phase(fonts, tex_tables)
+            results[name] = (time.perf_counter() - start) / args.repeat
+            print(f"{name:24} {results[name]:8.4f} {program_bytes:>14} {missing:>8} {resolvable:>11}")
+
+        for pdf in pdfs:
+            pdf.close()
+
+    before, after = results.values()
+    if after:
+        print(f"\nFonts phase {before / after:.1f}x faster with the built-in tables")
+
+if __name__ == '__main__':
+    main()
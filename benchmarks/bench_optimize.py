@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the output size optimizer
+
+Converts every PDF in a corpus directory with and without the optimizer
+and reports output sizes and bytes saved. Without a corpus directory, a
+synthetic LaTeX-like corpus is generated (see corpus.py).
+
+    python benchmarks/bench_optimize.py ~/lectures/
+    python benchmarks/bench_optimize.py --generate 10 --pages 60 --repeat-ratio 0.3
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_ua_convert import convert_pdf
+from corpus import generate_corpus
+
+def convert_quietly(input_file, output_file, **options):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = convert_pdf(str(input_file), str(output_file), **options)
+    return stats, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the output size optimizer')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--generate', type=int, default=10, metavar='N',
+                        help='Without a corpus: number of synthetic PDFs to generate (default: 10)')
+    parser.add_argument('--pages', type=int, default=30, help='Pages per synthetic PDF (default: 30)')
+    parser.add_argument('--repeat-ratio', type=float, default=0.3,
+                        help='Synthetic corpus: fraction of repeated overlay pages (default: 0.3)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.corpus:
+            inputs = sorted(Path(args.corpus).rglob('*.pdf'))
+        else:
+            inputs = generate_corpus(tmp / 'corpus', args.generate, args.pages, repeat_ratio=args.repeat_ratio)
+
+        print(f"{'file':40} {'plain':>10} {'optimized':>10} {'saved':>8}  {'est.':>8}")
+        total_plain = total_optimized = 0
+        time_plain = time_optimized = 0.0
+        for input_file in inputs:
+            plain_out = tmp / 'plain.pdf'
+            optimized_out = tmp / 'optimized.pdf'
+            try:
+                _, elapsed_plain = convert_quietly(input_file, plain_out, optimize=False)
+                stats, elapsed_optimized = convert_quietly(input_file, optimized_out, optimize=True)
+            except Exception as e:
+                print(f"{input_file.name[:40]:40} FAILED: {e}")
+                continue
+
+            plain_size = plain_out.stat().st_size
+            optimized_size = optimized_out.stat().st_size
+            total_plain += plain_size
+            total_optimized += optimized_size
+            time_plain += elapsed_plain
+            time_optimized += elapsed_optimized
+
+            saved = 100.0 * (plain_size - optimized_size) / plain_size if plain_size else 0.0
+            print(f"{input_file.name[:40]:40} {plain_size:>10} {optimized_size:>10} {saved:>7.1f}%  {stats['bytes_saved']:>8}")
+
+        if total_plain:
+            saved = 100.0 * (total_plain - total_optimized) / total_plain
+            print(f"\nTotal: {total_plain} -> {total_optimized} bytes ({saved:.1f}% smaller)")
+            print(f"Conversion time: {time_plain:.2f}s plain, {time_optimized:.2f}s optimized")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asyncio batch pipeline on a throttled filesystem
+
+Converts a corpus with the sequential loop (read, convert, write one file
+at a time) and with run_pipeline(), both reading and writing through the
+same throttled I/O functions: every read and write sleeps for a fixed
+latency plus its size over a bandwidth, like a busy network filesystem.
+Reports files/s for each and the pipeline's speedup.
+
+    python benchmarks/bench_pipeline.py ~/lectures/
+    python benchmarks/bench_pipeline.py --generate 20 --latency 0.05 --bandwidth 5M --in-flight 4
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_ua_convert import convert_in_memory
+from async_batch import run_pipeline, read_file, write_file
+from supervisor import parse_size
+from corpus import generate_corpus
+
+def throttled(latency, bandwidth):
+    """read and write functions that sleep like a slow filesystem"""
+    def delay(size):
+        time.sleep(latency + size / bandwidth)
+
+    def read(path):
+        data = read_file(path)
+        delay(len(data))
+        return data
+
+    def write(path, data):
+        delay(len(data))
+        write_file(path, data)
+
+    return read, write
+
+def run_sequential(jobs, options, read, write):
+    for input_file, output_file in jobs:
+        output_data, _ = convert_in_memory(input_file, read(input_file), options)
+        write(output_file, output_data)
+
+def run_pipelined(jobs, options, read, write, in_flight):
+    failures = []
+
+    def done(job, stats, error, elapsed):
+        if error is not None:
+            failures.append((job[0], error))
+
+    run_pipeline(jobs, lambda job, data: convert_in_memory(job[0], data, options), in_flight,
+                 read, write, on_done=done)
+    for input_file, error in failures:
+        print(f"{Path(input_file).name}: FAILED: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the asyncio batch pipeline')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--generate', type=int, default=20, metavar='N',
+                        help='Without a corpus: number of synthetic PDFs to generate (default: 20)')
+    parser.add_argument('--pages', type=int, default=30, help='Pages per synthetic PDF (default: 30)')
+    parser.add_argument('--latency', type=float, default=0.05, metavar='SECONDS',
+                        help='Throttle: seconds added to every read and write (default: 0.05)')
+    parser.add_argument('--bandwidth', type=parse_size, default=parse_size('5M'), metavar='SIZE',
+                        help='Throttle: bytes per second for reads and writes (default: 5M)')
+    parser.add_argument('--in-flight', type=int, default=4, metavar='N',
+                        help='Pipeline: files in memory at once (default: 4)')
+    args = parser.parse_args()
+
+    logging.getLogger('pdf_ua').setLevel(logging.WARNING)
+    options = {'online': None}
+    read, write = throttled(args.latency, args.bandwidth)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.corpus:
+            inputs = sorted(Path(args.corpus).rglob('*.pdf'))
+        else:
+            inputs = generate_corpus(tmp / 'corpus', args.generate, args.pages)
+        total_bytes = sum(Path(input_file).stat().st_size for input_file in inputs)
+        print(f"{len(inputs)} files, {total_bytes / 2**20:.1f} MiB; throttle: "
+              f"{args.latency * 1000:.0f} ms + {args.bandwidth / 2**20:.1f} MiB/s per read/write")
+
+        results = {}
+        for name, run in (('sequential', lambda jobs: run_sequential(jobs, options, read, write)),
+                          (f'pipeline ({args.in_flight})',
+                           lambda jobs: run_pipelined(jobs, options, read, write, args.in_flight))):
+            output_dir = tmp / name.split()[0]
+            output_dir.mkdir()
+            jobs = [(input_file, output_dir / Path(input_file).name) for input_file in inputs]
+            start = time.perf_counter()
+            run(jobs)
+            results[name] = time.perf_counter() - start
+            print(f"{name:16} {results[name]:8.2f}s {len(inputs) / results[name]:8.2f} files/s")
+
+        sequential, pipelined = results.values()
+        print(f"\nPipeline speedup: {sequential / pipelined:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark text-run storage memory
+
+Parses content streams into the compact TextRunStore and into the previous
+representation (a dict per run holding a copy of its text, font name and
+size) and reports peak traced memory and parse time for each. Without a
+corpus directory, one large synthetic content stream is generated from
+corpus.py's page generator.
+
+    python benchmarks/bench_text_runs.py ~/lectures/
+    python benchmarks/bench_text_runs.py --pages 2000
+"""
+
+import re
+import sys
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pikepdf import Pdf
+from pdf_ua_convert import ContentParser, read_page_content
+from corpus import page_content
+
+def parse_dicts(content_data):
+    """The per-run dict representation ContentParser used to build"""
+    text_blocks = []
+    current_font = current_size = None
+    for line in content_data.decode('latin-1', errors='ignore').split('\n'):
+        font_match = re.match(r'/(\S+)\s+([\d.]+)\s+Tf', line.strip())
+        if font_match:
+            current_font = font_match.group(1)
+            current_size = float(font_match.group(2))
+            continue
+        if current_font and current_size:
+            text_match = re.search(r'\(([^)]+)\)\s*Tj', line)
+            if text_match:
+                text_blocks.append({'text': text_match.group(1), 'font': current_font, 'size': current_size})
+                continue
+            array_match = re.search(r'\[(.*?)\]\s*TJ', line)
+            if array_match:
+                texts = re.findall(r'\(([^)]+)\)', array_match.group(1))
+                if texts:
+                    text_blocks.append({'text': ''.join(texts), 'font': current_font, 'size': current_size})
+    return text_blocks
+
+def parse_store(content_data):
+    return ContentParser().parse(content_data)
+
+def measure(parse, contents):
+    """Return (runs, peak traced bytes while parsing and holding the results, seconds)"""
+    start = time.perf_counter()
+    results = [parse(content_data) for content_data in contents]
+    elapsed = time.perf_counter() - start
+    runs = sum(len(result) for result in results)
+    del results
+
+    # Second pass under tracemalloc, which slows allocation down too much to time
+    gc.collect()
+    tracemalloc.start()
+    results = [parse(content_data) for content_data in contents]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return runs, peak, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark text-run storage memory')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--pages', type=int, default=1000,
+                        help='Without a corpus: synthetic pages to generate (default: 1000)')
+    args = parser.parse_args()
+
+    if args.corpus:
+        contents = []
+        for input_file in sorted(Path(args.corpus).rglob('*.pdf')):
+            with Pdf.open(input_file) as pdf:
+                contents += [read_page_content(page) for page in pdf.pages if '/Contents' in page]
+    else:
+        rng = random.Random(0)
+        contents = [page_content(rng, page_number, 8) for page_number in range(1, args.pages + 1)]
+
+    print(f"{len(contents)} content streams, {sum(map(len, contents))} bytes")
+    print(f"{'representation':16} {'runs':>9} {'peak MiB':>9} {'bytes/run':>10} {'seconds':>8}")
+    results = {}
+    for name, parse in (('dict per run', parse_dicts), ('TextRunStore', parse_store)):
+        runs, peak, elapsed = measure(parse, contents)
+        results[name] = peak
+        print(f"{name:16} {runs:>9} {peak / 2**20:>9.2f} {peak / max(runs, 1):>10.1f} {elapsed:>8.2f}")
+
+    if results['TextRunStore']:
+        print(f"\nTextRunStore uses {results['dict per run'] / results['TextRunStore']:.1f}x less memory")
+
+if __name__ == '__main__':
+    main()
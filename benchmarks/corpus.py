@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Synthetic LaTeX-like PDF corpus for benchmarks
+
+Generates PDFs shaped like pdfTeX output: subset Type1 Computer Modern
+fonts with /Encoding /Differences (or, with --builtin-encoding, no /Encoding
+so the font program's built-in one applies), a cleartext font program encoding,
+ToUnicode CMaps with math glyph gaps, BT/ET text blocks with headings,
+body text, inline math and small page numbers, link annotations, and
+optionally repeated (beamer-overlay style) and text-free figure pages.
+
+Use it when no real LaTeX corpus is at hand:
+
+    python benchmarks/corpus.py corpus/ --count 20 --pages 40
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+from pikepdf import Pdf, Dictionary, Name, Array, String
+
+# (BaseFont, {code: glyph name}, codes already in the ToUnicode CMap)
+FONTS = {
+    'F1': ('CMR10', {65: 'A', 66: 'B', 97: 'a', 98: 'b', 101: 'e', 110: 'n', 111: 'o', 116: 't',
+                     11: 'ff', 12: 'fi', 123: 'endash'}, {65, 66, 97, 98, 101, 110, 111, 116}),
+    'F2': ('CMBX12', {65: 'A', 73: 'I', 110: 'n', 116: 't', 114: 'r', 111: 'o'}, {65, 73, 110, 116, 114, 111}),
+    'F3': ('CMMI10', {11: 'alpha', 12: 'beta', 25: 'pi', 120: 'x'}, {120}),
+    'F4': ('CMSY10', {0: 'minus', 2: 'multiply', 6: 'plusminus', 33: 'arrowright',
+                      50: 'element', 56: 'universal', 57: 'existential'}, {0}),
+    'F5': ('CMEX10', {2: 'bracketleftbig', 80: 'summationtext', 88: 'summationdisplay',
+                      90: 'integraldisplay'}, set()),
+}
+
+WORDS = ('the', 'of', 'and', 'theorem', 'proof', 'lemma', 'function', 'space', 'set',
+         'value', 'we', 'show', 'that', 'for', 'every', 'bounded', 'operator', 'is')
+
+def subset_tag(rng):
+    return ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(6))
+
+def tounicode_cmap(codes):
+    entries = '\n'.join(f'<{code:02X}> <{code:04X}>' for code in sorted(codes))
+    return (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CMapName /Adobe-Identity-UCS def\n1 begincodespacerange\n<00> <FF>\nendcodespacerange\n"
+        f"{len(codes)} beginbfchar\n{entries}\nendbfchar\n"
+        "endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+    ).encode('latin-1')
+
+def make_font(pdf, rng, base_name, encoding, mapped_codes, builtin_encoding=False, program_bytes=2000):
+    font_name = Name(f"/{subset_tag(rng)}+{base_name}")
+    program = [f"%!PS-AdobeFont-1.0: {base_name} 003.002", "/Encoding 256 array",
+               "0 1 255 {1 index exch /.notdef put} for"]
+    program += [f"dup {code} /{glyph} put" for code, glyph in sorted(encoding.items())]
+    program += ["readonly def", "currentdict end", "currentfile eexec"]
+    cleartext = '\n'.join(program).encode('latin-1') + b'\n'
+    font_file = pdf.make_stream(cleartext + bytes(rng.randrange(256) for _ in range(program_bytes)))
+    font_file.Length1 = len(cleartext)
+    font_file.Length2 = program_bytes
+    font_file.Length3 = 0
+
+    first_char, last_char = min(encoding), max(encoding)
+    font = Dictionary(
+        Type=Name.Font,
+        Subtype=Name.Type1,
+        BaseFont=font_name,
+        FirstChar=first_char,
+        LastChar=last_char,
+        # Like pdfTeX, zero widths for the glyphs left out of the subset
+        Widths=Array([500 if code in encoding else 0 for code in range(first_char, last_char + 1)]),
+        FontDescriptor=Dictionary(Type=Name.FontDescriptor, FontName=font_name, Flags=4,
+                                  FontFile=font_file),
+        ToUnicode=pdf.make_stream(tounicode_cmap(mapped_codes)),
+    )
+    if not builtin_encoding:
+        differences = []
+        for code, glyph in sorted(encoding.items()):
+            differences += [code, Name('/' + glyph)]
+        font.Encoding = Dictionary(Type=Name.Encoding, Differences=Array(differences))
+    return pdf.make_indirect(font)
+
+def text_line(rng, words=8):
+    parts = []
+    for _ in range(words):
+        parts.append(f"({rng.choice(WORDS)})")
+        parts.append(str(-rng.randrange(200, 400)))
+    return f"[{' '.join(parts[:-1])}] TJ"
+
+def page_content(rng, page_number, paragraphs):
+    lines = ["BT", "/F2 14.346 Tf", "72 720 Td", f"[(Section)-333({page_number})] TJ", "ET"]
+    y = 690
+    for _ in range(paragraphs):
+        lines += ["BT", "/F1 9.963 Tf", f"72 {y} Td"]
+        for _ in range(rng.randrange(3, 7)):
+            lines += [text_line(rng), "0 -12 Td"]
+        lines += ["/F3 9.963 Tf", "<0B0C> Tj", "/F4 9.963 Tf", "<0238> Tj",
+                  "/F5 9.963 Tf", "<50> Tj", "ET"]
+        lines += ["q", "0.4 w", f"72 {y - 80} m 540 {y - 80} l S", "Q"]
+        y -= 110
+    lines += ["BT", "/F1 6.974 Tf", "300 40 Td", f"({page_number}) Tj", "ET"]
+    return '\n'.join(lines).encode('latin-1') + b'\n'
+
+def figure_content():
+    return b"q\n400 0 0 300 100 300 cm\n0.2 0.4 0.8 rg\n0 0 1 1 re f\nQ\n"
+
+def generate_pdf(path, pages=20, seed=0, repeat_ratio=0.0, figure_ratio=0.0, paragraphs=4,
+                 builtin_encoding=False):
+    """Write one synthetic LaTeX-like PDF to path"""
+    rng = random.Random(seed)
+    pdf = Pdf.new()
+    # Fonts with a built-in encoding are embedded with their full-size program
+    program_bytes = 30000 if builtin_encoding else 2000
+    fonts = Dictionary({f'/{res}': make_font(pdf, rng, *spec, builtin_encoding, program_bytes)
+                        for res, spec in FONTS.items()})
+    resources = pdf.make_indirect(Dictionary(Font=fonts))
+
+    previous_content = None
+    for page_number in range(1, pages + 1):
+        roll = rng.random()
+        if previous_content is not None and roll < repeat_ratio:
+            content = previous_content
+        elif roll < repeat_ratio + figure_ratio:
+            content = figure_content()
+        else:
+            content = page_content(rng, page_number, paragraphs)
+        previous_content = content
+
+        page = pdf.add_blank_page(page_size=(612, 792))
+        page.Resources = resources
+        page.Contents = pdf.make_stream(content)
+        if page_number % 5 == 1:
+            link = Dictionary(Type=Name.Annot, Subtype=Name.Link, Rect=[72, 700, 200, 715], Border=[0, 0, 0],
+                              A=Dictionary(S=Name.URI, URI=String(f"https://example.org/{page_number}")))
+            page.Annots = Array([pdf.make_indirect(link)])
+
+    pdf.docinfo['/Title'] = String(Path(path).stem)
+    pdf.docinfo['/Producer'] = String('pdfTeX-1.40.25')
+    pdf.save(path)
+    pdf.close()
+
+def generate_corpus(output_dir, count=10, pages=20, seed=0, repeat_ratio=0.0, figure_ratio=0.0,
+                    builtin_encoding=False):
+    """Generate count PDFs in output_dir and return their paths"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = output_dir / f"doc{i:04d}.pdf"
+        generate_pdf(path, pages=pages, seed=seed + i, repeat_ratio=repeat_ratio, figure_ratio=figure_ratio,
+                     builtin_encoding=builtin_encoding)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic LaTeX-like PDF corpus')
+    parser.add_argument('output_dir', help='Directory to write PDFs into')
+    parser.add_argument('--count', type=int, default=10, help='Number of PDFs (default: 10)')
+    parser.add_argument('--pages', type=int, default=20, help='Pages per PDF (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--repeat-ratio', type=float, default=0.0,
+                        help='Fraction of pages repeating the previous page, like beamer overlays')
+    parser.add_argument('--figure-ratio', type=float, default=0.0,
+                        help='Fraction of text-free figure pages')
+    parser.add_argument('--builtin-encoding', action='store_true',
+                        help='Write fonts without /Encoding, so their built-in encoding applies')
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output_dir, args.count, args.pages, args.seed,
+                            args.repeat_ratio, args.figure_ratio, args.builtin_encoding)
+    print(f"Wrote {len(paths)} PDF(s) to {args.output_dir}")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Soak test: convert a corpus thousands of times in one process and watch for leaks
+
+Long batches and daemons convert tens of thousands of files in one
+process, so anything a conversion leaves behind (an unclosed Pdf, pikepdf
+objects kept alive through a cache, an open file) adds up. This converts
+the corpus round-robin, every --sample-every conversions collects garbage
+and samples resident set size, open file descriptors and (with
+--tracemalloc) the memory traced by Python. After --warmup conversions the
+first sample becomes the baseline; the run fails (exit status 1) if the
+last sample has grown past any --max-*-growth threshold, and prints the
+tracemalloc allocation sites that grew most since the baseline.
+
+Without a corpus directory, a synthetic corpus is generated; --broken adds
+truncated copies of it so the conversion error paths are soaked as well.
+
+    python benchmarks/soak.py --iterations 5000 --broken 2 --tracemalloc
+    python benchmarks/soak.py ~/lectures/ --iterations 2000 --tag-cache batch --max-rss-growth 100M
+"""
+
+import gc
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_ua_convert import convert_pdf
+from tag_cache import TagCache
+from supervisor import process_rss, parse_size, psutil
+from corpus import generate_corpus
+
+def open_fds():
+    """Number of open file descriptors of this process, or None if it cannot be read"""
+    for fd_dir in ('/proc/self/fd', '/dev/fd'):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir)) - 1  # The listing's own descriptor
+    if psutil is not None and hasattr(psutil.Process, 'num_fds'):
+        return psutil.Process().num_fds()
+    return None
+
+def sample(iteration, tracing):
+    gc.collect()
+    return {
+        'iteration': iteration,
+        'rss': process_rss(os.getpid()),
+        'fds': open_fds(),
+        'traced': tracemalloc.get_traced_memory()[0] if tracing else None,
+    }
+
+def broken_copies(inputs, count, output_dir):
+    """Write truncated copies of the first count inputs, to exercise the error paths"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    copies = []
+    for input_file in inputs[:count]:
+        data = Path(input_file).read_bytes()
+        copy = output_dir / f"broken_{Path(input_file).name}"
+        copy.write_bytes(data[:len(data) // 2])
+        copies.append(copy)
+    return copies
+
+def slope_per_1000(samples, key):
+    """Least-squares growth of samples[key] per 1000 conversions"""
+    points = [(s['iteration'], s[key]) for s in samples if s[key] is not None]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance * 1000
+
+def mib(value):
+    return f"{value / 2**20:.1f}M" if value is not None else '-'
+
+def main():
+    parser = argparse.ArgumentParser(description='Soak-test convert_pdf for memory and file descriptor leaks')
+    parser.add_argument('corpus', nargs='?', help='Directory of LaTeX-generated PDFs (searched recursively)')
+    parser.add_argument('--generate', type=int, default=10, metavar='N',
+                        help='Without a corpus: number of synthetic PDFs to generate (default: 10)')
+    parser.add_argument('--pages', type=int, default=10, help='Pages per synthetic PDF (default: 10)')
+    parser.add_argument('--broken', type=int, default=0, metavar='N',
+                        help='Also convert truncated copies of N inputs, which fail (default: 0)')
+    parser.add_argument('--iterations', type=int, default=2000, metavar='N',
+                        help='Conversions to run in total (default: 2000)')
+    parser.add_argument('--warmup', type=int, default=200, metavar='N',
+                        help='Conversions before the baseline sample, while caches fill (default: 200)')
+    parser.add_argument('--sample-every', type=int, default=100, metavar='N',
+                        help='Conversions between samples (default: 100)')
+    parser.add_argument('--tag-cache', choices=['document', 'batch'], default='document',
+                        help='Tag cache per document, or one shared by all conversions like a batch')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Trace Python allocations (slower) and report the sites that grew most')
+    parser.add_argument('--top', type=int, default=10, metavar='N',
+                        help='With --tracemalloc: allocation sites to report (default: 10)')
+    parser.add_argument('--max-rss-growth', type=parse_size, default=parse_size('50M'), metavar='SIZE',
+                        help='Fail if resident set size grows more than SIZE after warmup (default: 50M)')
+    parser.add_argument('--max-fd-growth', type=int, default=5, metavar='N',
+                        help='Fail if more than N file descriptors stay open after warmup (default: 5)')
+    parser.add_argument('--max-traced-growth', type=parse_size, default=parse_size('10M'), metavar='SIZE',
+                        help='With --tracemalloc: fail if traced memory grows more than SIZE (default: 10M)')
+    args = parser.parse_args()
+
+    if args.warmup < 1:
+        parser.error('--warmup must be at least 1: the baseline sample is taken after it')
+    if args.sample_every < 1:
+        parser.error('--sample-every must be at least 1')
+    if args.warmup >= args.iterations:
+        parser.error('--warmup must be less than --iterations')
+
+    logging.getLogger('pdf_ua').setLevel(logging.CRITICAL)
+    options = {'online': None}
+    if args.tag_cache == 'batch':
+        options['tag_cache'] = TagCache()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.corpus:
+            inputs = sorted(Path(args.corpus).rglob('*.pdf'))
+        else:
+            inputs = generate_corpus(tmp / 'corpus', args.generate, args.pages)
+        inputs = list(inputs) + broken_copies(inputs, args.broken, tmp / 'broken')
+        output_file = str(tmp / 'output.pdf')
+        print(f"{len(inputs)} files ({args.broken} broken), {args.iterations} conversions, "
+              f"sampling every {args.sample_every}, baseline after {args.warmup}")
+
+        if args.tracemalloc:
+            tracemalloc.start(25)
+        baseline = baseline_snapshot = None
+        samples = []
+        failures = 0
+        start = time.perf_counter()
+        print(f"{'conversions':>11} {'failed':>7} {'rss':>9} {'fds':>5} {'traced':>9} {'conv/s':>8}")
+
+        for iteration in range(1, args.iterations + 1):
+            try:
+                convert_pdf(str(inputs[(iteration - 1) % len(inputs)]), output_file, **options)
+            except Exception:
+                failures += 1
+
+            if iteration == args.warmup or (iteration > args.warmup and iteration % args.sample_every == 0) \
+                    or iteration == args.iterations:
+                current = sample(iteration, args.tracemalloc)
+                if iteration == args.warmup:
+                    baseline = current
+                    if args.tracemalloc:
+                        baseline_snapshot = tracemalloc.take_snapshot()
+                samples.append(current)
+                print(f"{iteration:>11} {failures:>7} {mib(current['rss']):>9} "
+                      f"{current['fds'] if current['fds'] is not None else '-':>5} {mib(current['traced']):>9} "
+                      f"{iteration / (time.perf_counter() - start):>8.1f}")
+
+        final = samples[-1]
+        problems = []
+        print(f"\nGrowth since conversion {args.warmup} (per 1000 conversions by least squares):")
+        for key, limit, show in (('rss', args.max_rss_growth, mib), ('fds', args.max_fd_growth, str),
+                                 ('traced', args.max_traced_growth, mib)):
+            if baseline[key] is None:
+                continue
+            growth = final[key] - baseline[key]
+            slope = slope_per_1000(samples, key)
+            print(f"  {key:7} {show(growth):>9}  ({show(int(slope))}/1000)  limit {show(limit)}")
+            if growth > limit:
+                problems.append(f"{key} grew by {show(growth)} (limit {show(limit)})")
+
+        if args.tracemalloc:
+            print(f"\nTop {args.top} allocation sites by growth since the baseline:")
+            for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')[:args.top]:
+                print(f"  {stat}")
+            tracemalloc.stop()
+
+    if problems:
+        print(f"\nFAIL: {'; '.join(problems)}")
+        sys.exit(1)
+    print("\nPASS")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Conversion cost model for batch scheduling and ETAs
+
+scan_pdf() is a cheap pre-scan: it opens a PDF without decoding any stream
+and reads the page count, the total (compressed) length of the page content
+streams and the number of distinct fonts. CostModel turns a scan into an
+estimated conversion time with a linear model
+
+    seconds = a + b * pages + c * content MiB + d * fonts
+
+fitted by least squares to the scans and measured times of past runs. The
+observations are kept in a small JSON file (the newest MAX_OBSERVATIONS),
+so estimates follow the machine and the kind of documents converted; until
+there are enough of them, built-in coefficients measured on LaTeX lecture
+notes are used.
+
+With --longest-first the batch is pre-scanned and converted in order of
+decreasing estimate, and BatchProgress reports pages/s and an ETA after
+every file. The scans and estimates are also enough for capacity planning:
+--longest-first --dry-run prints them without converting anything.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+
+from pikepdf import Pdf, Array
+
+DEFAULT_COST_MODEL = Path.home() / '.cache' / 'pdf-ua-converter' / 'cost_model.json'
+MAX_OBSERVATIONS = 2000
+
+# (intercept, per page, per MiB of content streams, per font), in seconds
+DEFAULT_COEFFICIENTS = (0.02, 0.001, 1.0, 0.005)
+MIN_ESTIMATE = 0.01
+
+class FileScan:
+    """Page count, content stream bytes and font count of one PDF"""
+
+    __slots__ = ('pages', 'content_bytes', 'fonts')
+
+    def __init__(self, pages, content_bytes, fonts):
+        self.pages = pages
+        self.content_bytes = content_bytes
+        self.fonts = fonts
+
+    def features(self):
+        return (1.0, float(self.pages), self.content_bytes / 2**20, float(self.fonts))
+
+def stream_length(obj):
+    """Encoded length of a content stream from its dictionary, without reading it"""
+    try:
+        return int(obj.stream_dict.get('/Length', 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+def scan_pdf(input_file):
+    """FileScan of a PDF, reading only the page tree and the stream dictionaries"""
+    with Pdf.open(input_file) as pdf:
+        content_bytes = 0
+        fonts = set()
+        for page in pdf.pages:
+            contents = page.obj.get('/Contents')
+            if contents is not None:
+                for stream in contents if isinstance(contents, Array) else [contents]:
+                    content_bytes += stream_length(stream)
+            resources = page.obj.get('/Resources')
+            if resources is not None and '/Font' in resources:
+                for font_name, font_obj in resources.Font.items():
+                    fonts.add(font_obj.objgen if font_obj.is_indirect else (id(font_obj), font_name))
+        return FileScan(len(pdf.pages), content_bytes, len(fonts))
+
+def solve(matrix, vector):
+    """Solve a small dense linear system by Gaussian elimination; None if singular"""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(n):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                for c in range(col, n + 1):
+                    rows[r][c] -= factor * rows[col][c]
+    return [rows[i][n] / rows[i][i] for i in range(n)]
+
+def fit(observations, ridge=1e-6):
+    """Least-squares coefficients for [(features, seconds), ...], or None if underdetermined"""
+    n = len(DEFAULT_COEFFICIENTS)
+    if len(observations) < 2 * n:
+        return None
+    xtx = [[0.0] * n for _ in range(n)]
+    xty = [0.0] * n
+    for features, seconds in observations:
+        for i in range(n):
+            xty[i] += features[i] * seconds
+            for j in range(n):
+                xtx[i][j] += features[i] * features[j]
+    for i in range(1, n):
+        xtx[i][i] += ridge
+    return solve(xtx, xty)
+
+class CostModel:
+    """Linear conversion time model, calibrated on the observations stored at path"""
+
+    def __init__(self, path=DEFAULT_COST_MODEL):
+        self.path = Path(path) if path else None
+        self.observations = []
+        if self.path is not None and self.path.is_file():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+                self.observations = [(tuple(features), seconds) for features, seconds in data['observations']]
+            except (OSError, ValueError, KeyError, TypeError):
+                self.observations = []
+        self._coefficients = None
+        self.calibrated = False
+
+    @property
+    def coefficients(self):
+        if self._coefficients is None:
+            fitted = fit(self.observations)
+            self.calibrated = fitted is not None
+            self._coefficients = tuple(fitted) if fitted else DEFAULT_COEFFICIENTS
+        return self._coefficients
+
+    def estimate(self, scan):
+        """Estimated conversion seconds for a FileScan"""
+        return max(sum(c * x for c, x in zip(self.coefficients, scan.features())), MIN_ESTIMATE)
+
+    def observe(self, scan, seconds):
+        """Add a measured conversion; the model is refitted on the next estimate"""
+        self.observations.append((scan.features(), seconds))
+        del self.observations[:-MAX_OBSERVATIONS]
+        self._coefficients = None
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'observations': [[list(features), round(seconds, 4)]
+                                        for features, seconds in self.observations]}, f)
+        os.replace(tmp_path, self.path)
+
+def format_duration(seconds):
+    """Compact h/m/s rendering of a duration for progress output"""
+    if seconds < 10:
+        return f"{seconds:.1f}s"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+class BatchProgress:
+    """Pages/s and ETA of a pre-scanned batch
+
+    The remaining time is the sum of the remaining files' estimates, scaled
+    by how the files finished so far compared with their own estimates, so
+    a model calibrated on another machine still converges on a good ETA.
+    """
+
+    def __init__(self, estimates, pages):
+        self.start = time.perf_counter()
+        self.remaining_estimate = sum(estimates)
+        self.total_files = len(estimates)
+        self.total_pages = sum(pages)
+        self.files_done = 0
+        self.pages_done = 0
+        self.estimated_done = 0.0
+        self.actual_done = 0.0
+
+    def done(self, estimate, pages, seconds):
+        self.files_done += 1
+        self.pages_done += pages
+        self.remaining_estimate -= estimate
+        self.estimated_done += estimate
+        self.actual_done += seconds
+
+    def eta(self):
+        scale = self.actual_done / self.estimated_done if self.estimated_done > 0 else 1.0
+        return max(self.remaining_estimate, 0.0) * scale
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        pages_per_second = self.pages_done / elapsed if elapsed > 0 else 0.0
+        return (f"{self.files_done}/{self.total_files} files, {self.pages_done}/{self.total_pages} pages, "
+                f"{pages_per_second:.1f} pages/s, ETA {format_duration(self.eta())}")
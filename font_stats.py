@@ -0,0 +1,110 @@
+"""
+Document-wide font statistics for heading classification
+
+Fixed point-size thresholds misclassify any document whose body text is not
+10-11pt (a 12pt thesis is all subheadings; 9pt slides have no headings),
+and they cannot tell heading levels apart. FontSizeStats instead adds up,
+one page at a time, how much text each (font, size) shows, from the
+TextRunStore the content parser returns for the page (see text_runs), so
+only one page's content is held at once. heading_levels() turns the totals
+into a size histogram weighted by text length, takes the most common
+(font, size) as body text, and derives a table of size -> tag:
+
+    sizes below ARTIFACT_RATIO x body           Artifact (footers, page numbers)
+    sizes from HEADING_RATIO x body upwards     H1 for the largest size, H2 for
+                                                the next, ... H6 for the rest
+    everything in between                       P
+
+Tagging then classifies each run with one dictionary lookup.
+"""
+
+import hashlib
+from collections import Counter
+
+from text_runs import SIZE_SCALE
+
+ARTIFACT_RATIO = 0.8
+HEADING_RATIO = 1.15
+HEADING_TAGS = ('H1', 'H2', 'H3', 'H4', 'H5', 'H6')
+
+class FontSizeStats:
+    """Runs and text length per (font, size bin) over the pages of a document"""
+
+    def __init__(self):
+        self.runs = Counter()
+        self.lengths = Counter()
+
+    def __len__(self):
+        return sum(self.runs.values())
+
+    def add(self, text_runs):
+        """Add the runs of one page's TextRunStore"""
+        for key, (runs, length) in text_runs.size_histogram().items():
+            self.runs[key] += runs
+            self.lengths[key] += length
+
+    def runs_by_size(self):
+        """{font size in points: number of runs}"""
+        by_size = Counter()
+        for (_, size_bin), runs in self.runs.items():
+            by_size[size_bin / SIZE_SCALE] += runs
+        return by_size
+
+class HeadingLevels:
+    """Size -> structure tag table of one document
+
+    body_size is the body text size in points, or None for a document
+    without text; then the classic fixed thresholds apply.
+    """
+
+    def __init__(self, body_size=None, heading_sizes=(), sizes=()):
+        self.body_size = body_size
+        self.heading_sizes = tuple(sorted(heading_sizes, reverse=True))
+        self._tags = {}
+        for size_bin in sizes:
+            self.tag(size_bin / SIZE_SCALE)
+        self.fingerprint = hashlib.sha256(
+            repr((body_size, self.heading_sizes)).encode('ascii')
+        ).digest()[:8]
+
+    def tag(self, size):
+        """Structure tag (H1-H6, P or Artifact) for text of a font size"""
+        size_bin = round(size * SIZE_SCALE)
+        tag = self._tags.get(size_bin)
+        if tag is None:
+            tag = self._tags[size_bin] = self._classify(size_bin / SIZE_SCALE)
+        return tag
+
+    def _classify(self, size):
+        if self.body_size is None:
+            if size >= 14:
+                return 'H1'
+            if size >= 12:
+                return 'H3'
+            return 'P' if size >= 8 else 'Artifact'
+        if size < self.body_size * ARTIFACT_RATIO:
+            return 'Artifact'
+        if size < self.body_size * HEADING_RATIO:
+            return 'P'
+        level = sum(1 for heading_size in self.heading_sizes if heading_size > size)
+        return HEADING_TAGS[min(level, len(HEADING_TAGS) - 1)]
+
+    def summary(self):
+        if self.body_size is None:
+            return "no text, fixed size thresholds"
+        headings = ', '.join(f"{tag} {size:g}pt" for tag, size in zip(HEADING_TAGS, self.heading_sizes))
+        return f"body {self.body_size:g}pt" + (f"; {headings}" if headings else '; no heading sizes')
+
+def heading_levels(stats):
+    """HeadingLevels derived from a document's FontSizeStats"""
+    if not stats.lengths:
+        return HeadingLevels()
+    by_size = Counter()
+    for (_, size_bin), length in stats.lengths.items():
+        by_size[size_bin] += length
+    # Body text: the (font, size) with the most text; ties go to the smaller size
+    _, body_bin = max(stats.lengths, key=lambda pair: (stats.lengths[pair], -pair[1]))
+    body_size = body_bin / SIZE_SCALE
+    heading_sizes = [size_bin / SIZE_SCALE for size_bin in by_size
+                     if size_bin / SIZE_SCALE >= body_size * HEADING_RATIO]
+    return HeadingLevels(body_size, heading_sizes, by_size)
@@ -0,0 +1,263 @@
+"""
+Offline glyph database built from a local TeX Live installation
+
+LATEX_GLYPH_SYMBOLS is maintained by hand and misses the glyphs of many
+packages (fontawesome, mathabx, stix, esint, ...). build_glyph_db() scans a
+TeX Live tree once and compiles what it finds into a small SQLite file:
+
+    glyphs          glyph name -> Unicode, from the glyphtounicode*.tex files
+                    pdfTeX uses, plus uniXXXX/uXXXXX names and names built
+                    from them (suffixes like .alt, ligatures joined with _)
+                    found in .enc, .afm and .pfb files
+    font_encodings  font name -> code -> glyph name, the built-in encodings
+                    of .pfb font programs and .afm metrics
+
+The converter opens the database lazily on its first lookup, after the
+hand-written table and before the online lookup; each name is queried once
+by primary key and then answered from memory.
+
+    python pdf_ua_convert.py build-glyph-db /usr/local/texlive/2024
+    python pdf_ua_convert.py build-glyph-db ~/texmf -o glyphs.sqlite3
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+from ua_logging import get_logger
+
+DEFAULT_GLYPH_DB = Path.home() / '.cache' / 'pdf-ua-converter' / 'glyphs.sqlite3'
+
+GLYPHTOUNICODE_PATTERN = re.compile(r'\\pdfglyphtounicode\{([^}]+)\}\{([0-9A-Fa-f ]+)\}')
+ENC_VECTOR_PATTERN = re.compile(r'\[(.*?)\]', re.DOTALL)
+GLYPH_NAME_PATTERN = re.compile(r'/([^\s/\[\]{}()<>%]+)')
+AFM_FONT_NAME_PATTERN = re.compile(r'^FontName\s+(\S+)', re.MULTILINE)
+AFM_CHAR_PATTERN = re.compile(r'^C\s+(\d+)\s*;.*?\bN\s+(\S+)\s*;', re.MULTILINE)
+PFB_FONT_NAME_PATTERN = re.compile(r'/FontName\s*/(\S+)')
+PFB_ENCODING_PATTERN = re.compile(r'dup\s+(\d+)\s*/(\S+)\s+put')
+UNICODE_NAME_PATTERN = re.compile(r'uni((?:[0-9A-F]{4})+)|u([0-9A-F]{4,6})')
+
+SCHEMA = """
+CREATE TABLE glyphs (name TEXT PRIMARY KEY, unicode TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE font_encodings (
+    font TEXT NOT NULL, code INTEGER NOT NULL, glyph TEXT NOT NULL,
+    PRIMARY KEY (font, code)
+) WITHOUT ROWID;
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+log = get_logger('fonts')
+
+def read_glyphtounicode(text):
+    """Yield (glyph name, Unicode string) from \\pdfglyphtounicode lines"""
+    for name, code_points in GLYPHTOUNICODE_PATTERN.findall(text):
+        try:
+            yield name, ''.join(chr(int(code_point, 16)) for code_point in code_points.split())
+        except ValueError:
+            continue
+
+def read_enc(text):
+    """Glyph names of a .enc encoding vector"""
+    text = re.sub(r'%[^\n]*', '', text)
+    match = ENC_VECTOR_PATTERN.search(text)
+    return GLYPH_NAME_PATTERN.findall(match.group(1)) if match else []
+
+def read_afm(text):
+    """Return (FontName, {code: glyph name}) of .afm font metrics"""
+    match = AFM_FONT_NAME_PATTERN.search(text)
+    font_name = match.group(1) if match else None
+    return font_name, {int(code): name for code, name in AFM_CHAR_PATTERN.findall(text)}
+
+def pfb_cleartext(data):
+    """The cleartext (first) segment of a .pfb, or the data itself for a .pfa"""
+    if data[:2] == b'\x80\x01':
+        length = int.from_bytes(data[2:6], 'little')
+        return data[6:6 + length]
+    return data.split(b'eexec', 1)[0]
+
+def read_pfb(data):
+    """Return (FontName, {code: glyph name}) of a Type 1 font program's built-in encoding"""
+    text = pfb_cleartext(data).decode('latin-1', errors='ignore')
+    match = PFB_FONT_NAME_PATTERN.search(text)
+    font_name = match.group(1) if match else None
+    return font_name, {int(code): name for code, name in PFB_ENCODING_PATTERN.findall(text)}
+
+def derived_unicode(glyph_name, glyphs):
+    """Unicode for a glyph name by the Adobe Glyph List rules, or None
+
+    The part before the first period is the base name; components joined by
+    underscores are ligatures. Each component is a known glyph, uniXXXX
+    (one or more code points) or uXXXX[XX].
+    """
+    base = glyph_name.split('.', 1)[0]
+    if not base:
+        return None
+    parts = []
+    for component in base.split('_'):
+        if component in glyphs:
+            parts.append(glyphs[component])
+            continue
+        match = UNICODE_NAME_PATTERN.fullmatch(component)
+        if match is None:
+            return None
+        if match.group(1):
+            hex_digits = match.group(1)
+            parts.append(''.join(chr(int(hex_digits[i:i + 4], 16)) for i in range(0, len(hex_digits), 4)))
+        else:
+            code_point = int(match.group(2), 16)
+            if code_point > 0x10FFFF:
+                return None
+            parts.append(chr(code_point))
+    return ''.join(parts)
+
+def scan_tree(root):
+    """Yield (kind, path) for every glyphtounicode, .enc, .afm and .pfb/.pfa file under root"""
+    for directory, _, files in os.walk(root):
+        for file_name in sorted(files):
+            lower = file_name.lower()
+            if lower.startswith('glyphtounicode') and lower.endswith('.tex'):
+                yield 'glyphtounicode', Path(directory) / file_name
+            elif lower.endswith('.enc'):
+                yield 'enc', Path(directory) / file_name
+            elif lower.endswith('.afm'):
+                yield 'afm', Path(directory) / file_name
+            elif lower.endswith(('.pfb', '.pfa')):
+                yield 'pfb', Path(directory) / file_name
+
+def build_glyph_db(roots, db_path=DEFAULT_GLYPH_DB):
+    """Scan TeX trees and write the glyph database to db_path; returns counts of what was indexed"""
+    glyphs = {}
+    font_encodings = {}
+    other_names = set()
+    counts = {'files': 0, 'unreadable': 0}
+
+    files = sorted((kind, path) for root in roots for kind, path in scan_tree(root))
+    # The main glyphtounicode.tex first, so package-specific files refine it
+    files.sort(key=lambda item: (item[0] != 'glyphtounicode', item[1].name != 'glyphtounicode.tex'))
+    for kind, path in files:
+        try:
+            data = path.read_bytes()
+        except OSError:
+            counts['unreadable'] += 1
+            continue
+        counts['files'] += 1
+        if kind == 'glyphtounicode':
+            glyphs.update(read_glyphtounicode(data.decode('latin-1')))
+        elif kind == 'enc':
+            other_names.update(read_enc(data.decode('latin-1')))
+        else:
+            font_name, encoding = read_afm(data.decode('latin-1')) if kind == 'afm' else read_pfb(data)
+            other_names.update(encoding.values())
+            # The font program's own encoding wins over its metrics
+            if font_name and encoding and (kind == 'pfb' or font_name not in font_encodings):
+                font_encodings[font_name] = encoding
+
+    for name in other_names - glyphs.keys():
+        unicode = derived_unicode(name, glyphs)
+        if unicode:
+            glyphs[name] = unicode
+
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    try:
+        with sqlite3.connect(tmp_path) as connection:
+            connection.executescript(SCHEMA)
+            connection.executemany("INSERT INTO glyphs VALUES (?, ?)", sorted(glyphs.items()))
+            connection.executemany(
+                "INSERT INTO font_encodings VALUES (?, ?, ?)",
+                ((font, code, glyph) for font, encoding in sorted(font_encodings.items())
+                 for code, glyph in sorted(encoding.items()))
+            )
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('roots', os.pathsep.join(str(root) for root in roots)),
+                ('built', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+            ])
+        connection.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+    counts['glyphs'] = len(glyphs)
+    counts['fonts'] = len(font_encodings)
+    return counts
+
+class GlyphDB:
+    """Read-only, lazily opened view of a glyph database
+
+    Nothing is opened until the first lookup, and a missing database file
+    simply answers None. The connection is per process, so a child process
+    (see supervisor.py) opens its own.
+    """
+
+    def __init__(self, path=DEFAULT_GLYPH_DB):
+        self.path = Path(path)
+        self._connection = None
+        self._pid = None
+        self._unicode = {}
+        self._encodings = {}
+
+    def _connect(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._connection = None
+            if self.path.is_file():
+                try:
+                    self._connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                                                       check_same_thread=False)
+                    log.debug("  Opened glyph database %s", self.path)
+                except sqlite3.Error as e:
+                    log.warning("  Warning: cannot open glyph database %s: %s", self.path, e)
+        return self._connection
+
+    def unicode(self, glyph_name):
+        """Unicode string for glyph_name, or None"""
+        if glyph_name not in self._unicode:
+            connection = self._connect()
+            row = None
+            if connection is not None:
+                row = connection.execute("SELECT unicode FROM glyphs WHERE name = ?", (glyph_name,)).fetchone()
+            self._unicode[glyph_name] = row[0] if row else None
+        return self._unicode[glyph_name]
+
+    def font_encoding(self, font_name):
+        """Built-in {code: glyph name} encoding of a font (name without subset prefix), or None"""
+        if font_name not in self._encodings:
+            connection = self._connect()
+            rows = []
+            if connection is not None:
+                rows = connection.execute("SELECT code, glyph FROM font_encodings WHERE font = ?",
+                                          (font_name,)).fetchall()
+            self._encodings[font_name] = dict(rows) or None
+        return self._encodings[font_name]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pdf_ua_convert.py build-glyph-db',
+                                     description='Index a TeX Live tree into an offline glyph database')
+    parser.add_argument('roots', nargs='+', metavar='TEXMF',
+                        help='TeX Live installation or texmf tree(s) to scan')
+    parser.add_argument('-o', '--output', default=DEFAULT_GLYPH_DB, metavar='FILE',
+                        help=f'Database file to write (default: {DEFAULT_GLYPH_DB})')
+    args = parser.parse_args(argv)
+
+    for root in args.roots:
+        if not Path(root).is_dir():
+            parser.error(f"not a directory: {root}")
+
+    start = time.perf_counter()
+    counts = build_glyph_db(args.roots, args.output)
+    print(f"Indexed {counts['glyphs']} glyph names and {counts['fonts']} font encodings "
+          f"from {counts['files']} files in {time.perf_counter() - start:.1f}s -> {args.output}")
+    if counts['unreadable']:
+        print(f"Skipped {counts['unreadable']} unreadable file(s)")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Online Unicode lookups for glyph symbols
+
+A missing glyph is first resolved through the local LaTeX glyph table;
+the online service then confirms its Unicode value. UnicodeLookup sends
+those queries through one pooled requests.Session from a small thread pool,
+so every lookup of a document runs concurrently while its pages are being
+tagged. resolve() waits for them under one time budget for the whole
+document; whatever has not answered by then keeps its local value.
+
+A circuit breaker stops querying after repeated failures (timeouts,
+connection errors, non-200 responses) and lets one query through again
+after a cooldown, so a slow or unreachable service costs a few requests
+per batch instead of a timeout per glyph. A successful trial closes the
+circuit again. Lookups that failed or were skipped while it was open are
+not remembered, so a recovered service is asked again.
+
+The service URL is a template with a {query} placeholder; point it at a
+local HTTP server to test without network access.
+"""
+
+import os
+import re
+import time
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from ua_logging import get_logger
+
+DEFAULT_LOOKUP_URL = "https://www.fileformat.info/info/unicode/char/search.htm?q={query}"
+UNICODE_PATTERN = re.compile(r'U\+([0-9A-Fa-f]{4,6})')
+
+fonts_log = get_logger('fonts')
+
+class CircuitBreaker:
+    """Open after max_failures consecutive failures; allow a trial call once cooldown has passed"""
+
+    def __init__(self, max_failures=3, cooldown=60.0):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()  # One trial per cooldown period
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                fonts_log.warning("  Warning: online lookup failed %d times in a row, "
+                                  "using the local table for %gs", self.failures, self.cooldown)
+
+class UnicodeLookup:
+    """Concurrent, pooled, circuit-broken symbol -> Unicode hex lookups
+
+    Answers are kept per symbol for the life of the object, so a batch that
+    shares one UnicodeLookup queries each symbol once.
+    """
+
+    def __init__(self, url=DEFAULT_LOOKUP_URL, timeout=5.0, budget=10.0, workers=8,
+                 max_failures=3, cooldown=60.0):
+        self.url = url
+        self.timeout = timeout
+        self.budget = budget
+        self.workers = max(workers, 1)
+        self.breaker = CircuitBreaker(max_failures, cooldown)
+        self._results = {}  # symbol -> Future of Unicode hex or None
+        self._pid = None
+        self._session = None
+        self._executor = None
+
+    def __reduce__(self):
+        # A child process gets the same service and limits, with its own pool and breaker
+        return (UnicodeLookup, (self.url, self.timeout, self.budget, self.workers,
+                                self.breaker.max_failures, self.breaker.cooldown))
+
+    def _start(self):
+        # Threads and pooled connections do not survive fork: a supervised child starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._results = {}
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='lookup')
+
+    def submit(self, symbol):
+        """Start looking up symbol; returns a Future, or None while the circuit is open"""
+        self._start()
+        future = self._results.get(symbol)
+        if future is not None and not future.cancelled():
+            return future
+        # The breaker is asked once per request: after the cooldown, allow()
+        # hands out the single trial, which _fetch must then actually send
+        trial = self.breaker.is_open
+        if not self.breaker.allow():
+            return None
+        future = self._executor.submit(self._fetch, symbol, trial)
+        self._results[symbol] = future
+        return future
+
+    def _forget(self, symbol):
+        """Drop a lookup that got no answer, so a later submit asks again"""
+        self._results.pop(symbol, None)
+
+    def _fetch(self, symbol, trial=False):
+        if self.breaker.is_open and not trial:
+            # The circuit opened while this lookup was queued
+            self._forget(symbol)
+            return None
+        try:
+            response = self._session.get(self.url.format(query=quote(symbol)), timeout=self.timeout)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            self._forget(symbol)
+            fonts_log.debug("    Warning: Online lookup failed: %s", e)
+            return None
+        if response.status_code != 200:
+            self.breaker.record_failure()
+            self._forget(symbol)
+            fonts_log.debug("    Warning: Online lookup failed: HTTP %d", response.status_code)
+            return None
+        self.breaker.record_success()
+        matches = UNICODE_PATTERN.findall(BeautifulSoup(response.text, 'html.parser').get_text())
+        return matches[0].upper() if matches else None
+
+    def resolve(self, pending, deadline=None):
+        """Wait for {key: Future} until deadline (a time.monotonic() value); return {key: Unicode hex}
+
+        Lookups that fail, find nothing or are still running at the deadline
+        are left out, so the caller keeps its local values for them.
+        """
+        futures = [future for future in pending.values() if future is not None]
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            fonts_log.debug("    %d online lookup(s) still running at the time budget, "
+                            "using the local table for them", len(not_done))
+        results = {}
+        for key, future in pending.items():
+            if future is None or future in not_done or future.cancelled() or future.exception():
+                continue
+            if future.result():
+                results[key] = future.result()
+        return results
+
+    def lookup(self, symbol):
+        """Look up one symbol, waiting at most the time budget"""
+        return self.resolve({symbol: self.submit(symbol)}, time.monotonic() + self.budget).get(symbol)
+
+    def close(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._session.close()
+        self._pid = self._executor = self._session = None
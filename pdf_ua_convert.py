@@ -14,13 +14,37 @@ Repository: https://github.com/rquinnb/LaTeX-PDF-UA-Converter
 __version__ = "1.1.0-alpha"
 __repo_url__ = "https://github.com/rquinnb/LaTeX-PDF-UA-Converter"
 
+import io
+import os
 import sys
 import re
+import csv
+import json
+import time
+import hashlib
+import zlib
+import logging
+import tempfile
 import argparse
 import requests
-from pathlib import Path
-from pikepdf import Pdf, Dictionary, Name, Array, String, Stream
-from bs4 import BeautifulSoup
+from pathlib import Path, PurePosixPath
+from concurrent.futures import ThreadPoolExecutor
+from pikepdf import Pdf, Dictionary, Name, Array, String, Stream, PdfError, parse_content_stream
+from work_queue import WorkQueue, run_worker
+from batch_journal import BatchJournal, DEFAULT_JOURNAL_NAME, journal_key
+from batch_metrics import BatchMetrics, file_record, error_class
+from pdf_encodings import BASE_ENCODINGS
+from tag_cache import TagCache
+from text_runs import TextRunStore, SHOW_STRING, SHOW_ARRAY, STRUCT_TAG_CODES, new_layout, layout_tags
+from ua_logging import get_logger, setup_logging, logging_settings, file_trace, SUBSYSTEMS
+from supervisor import run_supervised, parse_size, memory_limit_supported
+from storage import Transfers, LocalStorage, open_storage, is_storage_uri, relative_key, join_key
+from online_lookup import UnicodeLookup, DEFAULT_LOOKUP_URL
+from async_batch import run_pipeline
+from tex_fonts import tex_font_table
+from font_stats import FontSizeStats, heading_levels, HeadingLevels
+from glyph_db import GlyphDB, DEFAULT_GLYPH_DB
+from cost_model import CostModel, BatchProgress, DEFAULT_COST_MODEL, scan_pdf, format_duration
 
 try:
     from latex_glyph_symbols import LATEX_GLYPH_SYMBOLS as GLYPH_TO_SYMBOL
@@ -28,6 +52,17 @@ except ImportError:
     print("Error: latex_glyph_symbols.py not found in the same directory.")
     sys.exit(1)
 
+convert_log = get_logger('convert')
+fonts_log = get_logger('fonts')
+tagging_log = get_logger('tagging')
+structure_log = get_logger('structure')
+batch_log = get_logger('batch')
+
+# zlib level for the content and ToUnicode streams the converter writes
+DEFAULT_COMPRESSION_LEVEL = 6
+# Streams shorter than this (the artifact wrappers) would only grow when compressed
+MIN_COMPRESS_BYTES = 64
+
 def check_for_updates():
     """Check if a newer version is available on GitHub"""
     try:
@@ -49,6 +84,11 @@ def check_for_updates():
     return False
 
 def main():
+    if sys.argv[1:2] == ['build-glyph-db']:
+        import glyph_db as glyph_db_module
+        glyph_db_module.main(sys.argv[2:])
+        return
+
     # Check for updates (non-blocking)
     check_for_updates()
 
@@ -60,11 +100,15 @@ def main():
                '  %(prog)s input_dir/ -d output_dir/         # All PDFs in directory\n'
                '  %(prog)s input_dir/ -d output_dir/ -r      # Recursive with tree structure\n'
                '  %(prog)s "lecture*.pdf"                    # Wildcard matching\n'
-               '  %(prog)s input_dir/ -p "output_{name}.pdf" # Custom naming pattern',
+               '  %(prog)s input_dir/ -p "output_{name}.pdf" # Custom naming pattern\n'
+               '  find . -name "*.pdf" -print0 | %(prog)s --from-file - -0 -d out/\n'
+               '  %(prog)s archive/ -r --shard 3/16          # Shard 3 of a 16-task array job\n'
+               '  %(prog)s build-glyph-db /usr/local/texlive/2024  # Index TeX Live glyphs for offline lookup',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument('input', help='Input PDF file, directory, or wildcard pattern (e.g., "*.pdf")')
+    parser.add_argument('input', nargs='?',
+                       help='Input PDF file, directory, or wildcard pattern (e.g., "*.pdf")')
     parser.add_argument('-o', '--output', help='Output PDF file (only for single file input)')
     parser.add_argument('-d', '--output-dir', default='ua_output',
                        help='Output directory for batch processing (default: ua_output)')
@@ -76,88 +120,702 @@ def main():
                        help='Overwrite existing output files without prompting')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--debug', metavar='SUBSYSTEMS', type=lambda value: value.split(','),
+                       help=f'Detailed output from some subsystems only, comma-separated: {",".join(SUBSYSTEMS)}')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                       help='Progress output as plain text or one JSON object per line (default: text)')
+    parser.add_argument('--log-file', metavar='FILE',
+                       help='Append progress output to FILE instead of stdout')
+    parser.add_argument('--trace-failures', type=int, default=0, metavar='N',
+                       help='Keep the last N detailed log records of each file in memory and print them '
+                            'only if the file fails to convert')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be processed without actually converting')
+    parser.add_argument('--no-optimize', action='store_true',
+                       help='Skip the output size optimizer (shared /Lang, duplicate CMap and content streams)')
+    parser.add_argument('--used-glyphs-only', action='store_true',
+                       help='Only repair ToUnicode mappings for character codes the pages and Form XObjects '
+                            'actually show, and print per-font coverage (codes used vs mapped)')
+    parser.add_argument('--only', metavar='STAGES', type=lambda value: tuple(value.split(',')),
+                       help='Run only these conversion stages, comma-separated, leaving the rest of the '
+                            f'document as it is: {",".join(CONVERSION_STAGES)}')
+    parser.add_argument('--skip', metavar='STAGES', type=lambda value: tuple(value.split(',')),
+                       help='Run every conversion stage except these, comma-separated')
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                       help='Kill and fail a file whose conversion takes longer than SECONDS')
+    parser.add_argument('--max-rss', type=parse_size, metavar='SIZE',
+                       help='Kill and fail a file whose conversion uses more than SIZE resident memory '
+                            '(e.g. 2G, 512M). With --timeout or --max-rss each file is converted in '
+                            'a supervised child process')
+    parser.add_argument('--tag-cache', choices=['document', 'batch', 'off'], default='document',
+                       help='Reuse the tagging of pages with identical content within each document, '
+                            'across the whole batch, or not at all (default: document). A batch cache '
+                            'is not shared between files converted under --timeout/--max-rss')
+    parser.add_argument('--previous', metavar='PATH',
+                       help='Earlier output of this converter (a file, or in batch mode the previous '
+                            'output directory): pages unchanged since then reuse its tagging')
+    parser.add_argument('--glyph-db', default=DEFAULT_GLYPH_DB, metavar='FILE',
+                       help='Glyph database written by build-glyph-db, consulted after the local table and '
+                            f'before the online lookup; ignored if missing (default: {DEFAULT_GLYPH_DB})')
+    parser.add_argument('--no-online-lookup', action='store_true',
+                       help='Map missing glyphs from the local table only, without querying the Unicode lookup service')
+    parser.add_argument('--lookup-url', default=DEFAULT_LOOKUP_URL, metavar='URL',
+                       help='Unicode lookup service URL, with {query} for the symbol (default: fileformat.info)')
+    parser.add_argument('--lookup-budget', type=float, default=10, metavar='SECONDS',
+                       help='Time all online lookups of a document may take, overlapped with page '
+                            'tagging; later answers keep their local table value (default: 10)')
+    parser.add_argument('--pipeline', type=int, metavar='N',
+                       help='Batch mode: read inputs ahead and write outputs in the background with up '
+                            'to N files in memory at once, for slow or network filesystems')
+    parser.add_argument('--compression-level', type=int, choices=range(10), default=DEFAULT_COMPRESSION_LEVEL,
+                       metavar='0-9', help='zlib level for new content and ToUnicode streams '
+                                           f'(default: {DEFAULT_COMPRESSION_LEVEL})')
+    parser.add_argument('--compress-workers', type=int, metavar='N',
+                       help='Threads compressing new streams before save (default: one per CPU)')
+    parser.add_argument('--longest-first', action='store_true',
+                       help='Batch mode: pre-scan every input (pages, content size, fonts), convert the ones '
+                            'estimated to take longest first, and print pages/s and an ETA after each file. '
+                            'With --dry-run, print the estimates')
+    parser.add_argument('--cost-model', default=DEFAULT_COST_MODEL, metavar='FILE',
+                       help='Measured conversion times the --longest-first estimates are fitted to; updated '
+                            f'after every such batch (default: {DEFAULT_COST_MODEL})')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted batch: skip files the batch journal records as finished or failed')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='With --resume, convert files that failed in the previous run again')
+    parser.add_argument('--journal', metavar='FILE',
+                       help=f'Batch journal file (default: OUTPUT_DIR/{DEFAULT_JOURNAL_NAME})')
+    parser.add_argument('--report-jsonl', metavar='FILE',
+                       help='Append one JSON record per file (sizes, pages, duration, glyphs fixed, '
+                            'structure elements, error class) to FILE')
+    parser.add_argument('--metrics-textfile', metavar='FILE',
+                       help='Write Prometheus metrics to FILE after each file (for the node_exporter textfile collector)')
+    parser.add_argument('--from-file', metavar='FILE',
+                       help='Read input paths from FILE, one per line ("-" for stdin), instead of the input argument')
+    parser.add_argument('-0', '--null', action='store_true',
+                       help='With --from-file, paths are NUL-separated (e.g. from "find -print0")')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                       help='Only process the inputs in shard I of N (0-based), by stable hash of the path')
+    parser.add_argument('--analyze', action='store_true',
+                       help='Read-only triage: report font embedding, missing glyph mappings and text runs '
+                            'per file without converting or saving anything')
+    parser.add_argument('--analyze-format', choices=['csv', 'json'], default='csv',
+                       help='Analyze mode: CSV, or JSON with one object per line (default: csv)')
+    parser.add_argument('--analyze-output', metavar='FILE',
+                       help='Analyze mode: write the summary to FILE instead of stdout')
+    parser.add_argument('--s3-endpoint-url', metavar='URL',
+                       help='Endpoint of an S3-compatible store for s3:// inputs and outputs (MinIO, moto server)')
+    parser.add_argument('--prefetch', type=int, default=2, metavar='N',
+                       help='Storage mode: download up to N inputs ahead of the conversion (default: 2)')
+    parser.add_argument('--uploads', type=int, default=2, metavar='N',
+                       help='Storage mode: upload up to N outputs in the background (default: 2)')
+    parser.add_argument('--queue', metavar='DIR',
+                       help='Shared work queue directory: enqueue the input (if given), then convert '
+                            'queued files until the queue is empty. Run on several hosts to share the work')
+    parser.add_argument('--lease', type=float, default=300, metavar='SECONDS',
+                       help='Queue mode: seconds without a heartbeat before a claimed file is retried (default: 300)')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                       help='Queue mode: give up on a file after this many expired leases (default: 3)')
 
     args = parser.parse_args()
 
-    # Collect all PDF files to process
-    pdf_files = []
-    input_path = Path(args.input)
-
-    # Check if input is a wildcard pattern
-    if '*' in args.input or '?' in args.input:
-        # Handle wildcard
-        pdf_files = list(Path('.').glob(args.input))
-        pdf_files = [f for f in pdf_files if f.is_file() and f.suffix.lower() == '.pdf']
-        if not pdf_files:
-            print(f"No PDF files found matching pattern: {args.input}")
+    unknown_subsystems = set(args.debug or ()) - set(SUBSYSTEMS)
+    if unknown_subsystems:
+        parser.error(f"unknown --debug subsystem(s): {', '.join(sorted(unknown_subsystems))}")
+    setup_logging(verbose=args.verbose, json_format=args.log_format == 'json',
+                  debug_subsystems=args.debug or (), trace_failures=args.trace_failures,
+                  log_file=args.log_file, to_stderr=args.analyze and not args.analyze_output)
+
+    if args.max_rss and not memory_limit_supported():
+        batch_log.warning("Warning: cannot read process memory on this system (install psutil); "
+                          "--max-rss is not enforced")
+
+    global glyph_db
+    glyph_db = GlyphDB(args.glyph_db)
+
+    try:
+        args.stages = select_stages(args.only, args.skip)
+    except ValueError as e:
+        parser.error(f"--only/--skip: {e}")
+
+    if args.pipeline is not None and (args.timeout or args.max_rss):
+        parser.error('--pipeline converts in this process; it cannot be combined with --timeout or --max-rss')
+
+    if args.queue:
+        run_queue(args)
+        return
+
+    if not args.input and not args.from_file:
+        parser.error('an input file, directory or pattern (or --from-file) is required')
+
+    if args.analyze:
+        run_analyze(args)
+        return
+
+    if is_storage_uri(args.input) or is_storage_uri(args.output_dir):
+        if args.from_file and is_storage_uri(args.input):
+            parser.error('--from-file lists local paths; it cannot be combined with a file:// or s3:// input')
+        for value, option in ((args.resume or args.journal, '--resume/--journal'), (args.pipeline, '--pipeline'),
+                              (args.longest_first, '--longest-first'), (args.previous, '--previous')):
+            if value:
+                parser.error(f"{option} is not supported with file:// or s3:// inputs and outputs")
+        run_storage_batch(args)
+        return
+
+    if args.input and not args.from_file and not is_wildcard(args.input):
+        input_path = Path(args.input)
+        if input_path.is_file():
+            if args.output:
+                output_file = args.output
+            else:
+                output_file = format_output_name(input_path, args.pattern, input_path.parent)
+
+            if args.dry_run:
+                batch_log.info("Would convert: %s -> %s", input_path, output_file)
+                return
+
+            options = convert_options(args)
+            options['previous'] = args.previous
+            try:
+                convert_file(input_path, output_file, options, args.timeout, args.max_rss)
+            except Exception as e:
+                log_failure(input_path, e)
+                sys.exit(1)
+            return
+        elif not input_path.is_dir():
+            batch_log.error("Error: Input not found: %s", args.input)
             sys.exit(1)
-    elif input_path.is_file():
-        if args.output:
-            output_file = args.output
+
+    # Batch processing mode: inputs are discovered lazily while converting
+    pdf_files = iter_batch_inputs(args)
+    input_path = Path(args.input) if args.input and not args.from_file else None
+    output_dir = Path(args.output_dir)
+
+    if args.dry_run:
+        batch_log.info("\n=== DRY RUN - No files will be modified ===\n")
+
+    metrics = BatchMetrics(args.report_jsonl, args.metrics_textfile)
+    journal = BatchJournal(args.journal or output_dir / DEFAULT_JOURNAL_NAME)
+    journal_states = {}
+    if args.resume:
+        journal_states = journal.load()
+        batch_log.info("Resuming from journal: %s", journal.path)
+
+    options = convert_options(args)
+    found = 0
+    cost_model = CostModel(args.cost_model) if args.longest_first else None
+    plan = {}  # batch index -> (FileScan or None, estimated seconds), with --longest-first
+    progress = None
+
+    def pending_jobs():
+        """Yield (input, output, file options, batch index) for each file that needs converting"""
+        nonlocal found
+        for i, pdf_file in enumerate(pdf_files, 1):
+            found = i
+            # Determine output path
+            output_path = batch_output_path(pdf_file, input_path, output_dir, args)
+
+            state = journal_states.get(journal_key(pdf_file))
+            if state == 'finished' and output_path.exists():
+                batch_log.info("[%d] Skipping %s (finished in previous run)", i, pdf_file.name)
+                metrics.skipped()
+                continue
+            if state == 'failed' and not args.retry_failed:
+                batch_log.info("[%d] Skipping %s (failed in previous run)", i, pdf_file.name)
+                metrics.skipped()
+                continue
+
+            if output_path.exists() and not args.overwrite and state != 'started':
+                batch_log.info("[%d] Skipping %s (output exists)", i, pdf_file.name)
+                metrics.skipped()
+                continue
+
+            if args.dry_run:
+                if cost_model is not None:
+                    plan[i] = scan_and_estimate(pdf_file, cost_model)
+                    batch_log.info("[%d] Would convert: %s -> %s (~%s)", i, pdf_file, output_path,
+                                   format_duration(plan[i][1]))
+                else:
+                    batch_log.info("[%d] Would convert: %s -> %s", i, pdf_file, output_path)
+                continue
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            yield pdf_file, output_path, dict(options, previous=previous_output(args, output_path, output_dir)), i
+
+    def started(job):
+        pdf_file, output_path, _, i = job
+        batch_log.info("[%d] Processing: %s", i, pdf_file.name)
+        journal.record('started', pdf_file, output_path)
+
+    def done(job, stats, error, elapsed):
+        pdf_file, output_path, _, i = job
+        if error is None:
+            journal.record('finished', pdf_file, output_path)
+            if metrics.enabled:
+                metrics.record(file_record(pdf_file, output_path, elapsed, stats))
         else:
-            output_file = format_output_name(input_path, args.pattern, input_path.parent)
+            journal.record('failed', pdf_file, output_path, error=f"{error_class(error)}: {error}")
+            if metrics.enabled:
+                metrics.record(file_record(pdf_file, output_path, elapsed, error=error))
+            log_failure(pdf_file, error)
+        if progress is not None:
+            scan, estimate = plan[i]
+            if error is None and scan is not None:
+                cost_model.observe(scan, elapsed)
+            progress.done(estimate, scan.pages if scan is not None else 0, elapsed)
+            batch_log.info("  Progress: %s", progress.summary())
+
+    jobs = pending_jobs()
+    if cost_model is not None and not args.dry_run:
+        jobs, progress = schedule_longest_first(list(jobs), cost_model, plan)
+
+    if args.pipeline:
+        run_pipeline(jobs, lambda job, data: convert_in_memory(job[0], data, job[2]),
+                     in_flight=args.pipeline, on_start=started, on_done=done)
+    else:
+        for job in jobs:
+            started(job)
+            pdf_file, output_path, file_options, _ = job
+            start = time.perf_counter()
+            try:
+                stats = convert_file(pdf_file, output_path, file_options, args.timeout, args.max_rss)
+            except Exception as e:
+                done(job, None, e, time.perf_counter() - start)
+            else:
+                done(job, stats, None, time.perf_counter() - start)
 
-        if args.dry_run:
-            print(f"Would convert: {input_path} -> {output_file}")
-            return
+    journal.close()
+    metrics.close()
+    if progress is not None and progress.files_done:
+        cost_model.save()
 
-        convert_pdf(str(input_path), str(output_file), verbose=args.verbose)
-        return
+    if found == 0:
+        batch_log.error("No PDF files found: %s", args.from_file or args.input)
+        sys.exit(1)
+
+    if args.dry_run and plan:
+        batch_log.info("\nEstimated conversion time: %s for %d file(s)%s",
+                       format_duration(sum(estimate for _, estimate in plan.values())), len(plan),
+                       '' if cost_model.calibrated else ' (uncalibrated model)')
+
+    if not args.dry_run:
+        batch_log.info("\n=== Conversion complete (%d file(s)) ===", found)
+        batch_log.info("Output directory: %s", output_dir.absolute())
+        if options['tag_cache']:
+            tagging_log.info("%s", options['tag_cache'].summary())
+
+def scan_and_estimate(pdf_file, cost_model):
+    """(FileScan, estimated seconds) of an input; a file that cannot be scanned gets (None, minimal estimate)"""
+    try:
+        scan = scan_pdf(pdf_file)
+    except (PdfError, OSError) as e:
+        batch_log.debug("  Cannot pre-scan %s: %s", Path(pdf_file).name, e)
+        return None, 0.0
+    return scan, cost_model.estimate(scan)
+
+def schedule_longest_first(jobs, cost_model, plan):
+    """Pre-scan batch jobs and return (jobs by decreasing estimated time, BatchProgress)
+
+    Starting with the longest conversions calibrates the ETA on the files
+    that dominate the remaining time, and leaves only short files for the
+    end, where an interrupted batch resumed with --resume redoes little.
+    plan is filled with batch index -> (FileScan, estimate).
+    """
+    start = time.perf_counter()
+    for job in jobs:
+        plan[job[3]] = scan_and_estimate(job[0], cost_model)
+    jobs.sort(key=lambda job: plan[job[3]][1], reverse=True)
+
+    estimates = [plan[job[3]][1] for job in jobs]
+    pages = [plan[job[3]][0].pages if plan[job[3]][0] is not None else 0 for job in jobs]
+    batch_log.info("Scanned %d file(s) in %.1fs: %d pages, estimated %s%s", len(jobs),
+                   time.perf_counter() - start, sum(pages), format_duration(sum(estimates)),
+                   '' if cost_model.calibrated else ' (uncalibrated model)')
+    return jobs, BatchProgress(estimates, pages)
+
+def convert_options(args):
+    """Keyword arguments for convert_pdf from the command line options
+
+    Build them once per run: with --tag-cache batch every convert_pdf call
+    shares the TagCache created here, and every call shares one UnicodeLookup
+    (its connection pool, results and circuit breaker).
+    """
+    tag_cache = None
+    if args.tag_cache == 'batch':
+        tag_cache = TagCache()
+    elif args.tag_cache == 'off':
+        tag_cache = False
+    return {
+        'optimize': not args.no_optimize,
+        'tag_cache': tag_cache,
+        'used_glyphs_only': args.used_glyphs_only,
+        'online': None if args.no_online_lookup else UnicodeLookup(args.lookup_url, budget=args.lookup_budget),
+        'compression_level': args.compression_level,
+        'compress_workers': args.compress_workers,
+        'stages': args.stages,
+    }
+
+def convert_traced(input_file, output_file, options):
+    """convert_pdf with log records labelled by (and failure traces kept for) input_file"""
+    with file_trace(input_file):
+        return convert_pdf(str(input_file), str(output_file), **options)
+
+def convert_in_memory(input_file, data, options):
+    """convert_pdf on the bytes of input_file; returns (output bytes, stats)"""
+    output = io.BytesIO()
+    with file_trace(input_file):
+        stats = convert_pdf(io.BytesIO(data), output, **options)
+    return output.getvalue(), stats
+
+def setup_child(logging_options, glyph_db_path):
+    """Repeat the parent's run-time setup in a supervised child process"""
+    global glyph_db
+    if logging_options is not None:
+        setup_logging(**logging_options)
+    glyph_db = GlyphDB(glyph_db_path)
+
+def convert_file(input_file, output_file, options, timeout=None, max_rss=None):
+    """Convert one file, in a supervised child process if a time or memory limit is set
+
+    A child over its limit is killed, its temporary output removed, and
+    ConversionTimeout or ConversionMemoryExceeded raised. The child starts
+    with the parent's logging setup and glyph database (see setup_child).
+    """
+    if timeout is None and max_rss is None:
+        return convert_traced(input_file, output_file, options)
+
+    def remove_temp_output(pid):
+        temp_path = temp_output_path(output_file, pid)
+        if temp_path.exists():
+            temp_path.unlink()
+
+    return run_supervised(convert_traced, (input_file, output_file, options),
+                          timeout=timeout, max_rss=max_rss, on_kill=remove_temp_output,
+                          initializer=setup_child, initargs=(logging_settings(), glyph_db.path))
+
+def log_failure(input_file, error):
+    """Log a failed conversion, with its traceback (from the child process, if any) as detail"""
+    batch_log.error("  ERROR: Failed to convert %s: %s", Path(input_file).name, error)
+    child_traceback = getattr(error, 'child_traceback', None)
+    if child_traceback:
+        batch_log.debug("Traceback for %s (in child process):\n%s", Path(input_file).name, child_traceback)
+    else:
+        batch_log.debug("Traceback for %s", Path(input_file).name, exc_info=True)
+
+def is_wildcard(input_arg):
+    return '*' in input_arg or '?' in input_arg
+
+def iter_input_files(input_arg, recursive=False):
+    """Yield the PDF files matched by a file, directory or wildcard input, as they are found"""
+    input_path = Path(input_arg)
+
+    if is_wildcard(input_arg):
+        for f in Path('.').glob(input_arg):
+            if f.is_file() and f.suffix.lower() == '.pdf':
+                yield f
+    elif input_path.is_file():
+        yield input_path
     elif input_path.is_dir():
-        # Directory mode
-        if args.recursive:
-            # Recursive: find all PDFs in tree
-            pdf_files = list(input_path.rglob('*.pdf'))
+        if recursive:
+            # Recursive: walk the tree without listing it up front
+            for dirpath, dirnames, filenames in os.walk(input_path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith('.pdf'):
+                        yield Path(dirpath) / filename
         else:
             # Non-recursive: only direct children
-            pdf_files = list(input_path.glob('*.pdf'))
+            for entry in os.scandir(input_path):
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    yield Path(entry.path)
+
+def iter_file_list(list_file, null_separated=False):
+    """Yield paths from a newline- or NUL-separated list file ('-' reads stdin)"""
+    if list_file == '-':
+        stream = sys.stdin.buffer
+    else:
+        stream = open(list_file, 'rb')
 
-        if not pdf_files:
-            print(f"No PDF files found in: {input_path}")
-            sys.exit(1)
+    separator = b'\0' if null_separated else b'\n'
+    try:
+        pending = b''
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            *entries, pending = pending.split(separator)
+            for entry in entries:
+                entry = entry.rstrip(b'\r') if not null_separated else entry
+                if entry:
+                    yield Path(os.fsdecode(entry))
+        if pending.strip():
+            yield Path(os.fsdecode(pending.rstrip(b'\r\n') if not null_separated else pending))
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+def parse_shard(value):
+    """argparse type for --shard: "i/N" with 0 <= i < N"""
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if not match or int(match.group(2)) == 0 or int(match.group(1)) >= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected i/N with 0 <= i < N, got {value!r}")
+    return int(match.group(1)), int(match.group(2))
+
+def in_shard(pdf_file, shard_index, shard_count):
+    """Stable assignment of a path to one of shard_count shards"""
+    digest = hashlib.md5(os.fsencode(str(pdf_file))).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count == shard_index
+
+def iter_batch_inputs(args):
+    """Lazily yield this run's batch inputs from the input argument or --from-file list"""
+    if args.from_file:
+        pdf_files = iter_file_list(args.from_file, args.null)
     else:
-        print(f"Error: Input not found: {args.input}")
-        sys.exit(1)
+        pdf_files = iter_input_files(args.input, args.recursive)
+
+    if args.shard:
+        shard_index, shard_count = args.shard
+        pdf_files = (f for f in pdf_files if in_shard(f, shard_index, shard_count))
+    return pdf_files
+
+ANALYZE_FIELDS = [
+    'file', 'pages', 'fonts', 'non_embedded_fonts', 'fonts_without_tounicode',
+    'missing_glyphs', 'resolvable_glyphs', 'font_program_bytes', 'text_runs', 'headings', 'subheadings',
+    'paragraphs', 'artifacts', 'error',
+]
+
+# Structure tag of a text run -> analyze summary column
+TEXT_RUN_COLUMNS = {'H1': 'headings', 'H2': 'subheadings', 'H3': 'subheadings', 'H4': 'subheadings',
+                    'H5': 'subheadings', 'H6': 'subheadings', 'P': 'paragraphs', 'Artifact': 'artifacts'}
+
+def analyze_pdf(input_file):
+    """Read-only triage of one PDF: font embedding, ToUnicode gaps and text runs by class
+
+    Nothing is rewritten or saved, so this is much cheaper than convert_pdf.
+    """
+    summary = dict.fromkeys(ANALYZE_FIELDS, 0)
+    summary['file'] = str(input_file)
+    summary['error'] = ''
+
+    with Pdf.open(input_file) as pdf:
+        summary['pages'] = len(pdf.pages)
+        non_embedded_fonts = []
+
+        for font_name, font_obj in iter_fonts(pdf):
+            summary['fonts'] += 1
+            if not is_font_embedded(font_obj) and str(font_obj.BaseFont) not in non_embedded_fonts:
+                non_embedded_fonts.append(str(font_obj.BaseFont))
+            if '/ToUnicode' not in font_obj:
+                summary['fonts_without_tounicode'] += 1
+                continue
+            _, font_encoding, missing_codes, font_program_bytes = find_missing_glyphs(font_obj)
+            summary['missing_glyphs'] += len(missing_codes)
+            summary['font_program_bytes'] += font_program_bytes
+            summary['resolvable_glyphs'] += sum(
+                1 for code in missing_codes if glyph_symbol(font_encoding[code]) is not None
+            )
 
-    # Batch processing mode
-    output_dir = Path(args.output_dir)
+        run_stats = collect_font_sizes(read_page_content(page) for page in pdf.pages if '/Contents' in page)
+        levels = heading_levels(run_stats)
+        summary['text_runs'] = len(run_stats)
+        for size, runs in run_stats.runs_by_size().items():
+            summary[TEXT_RUN_COLUMNS[levels.tag(size)]] += runs
 
-    print(f"Found {len(pdf_files)} PDF file(s) to process")
+    summary['non_embedded_fonts'] = ';'.join(non_embedded_fonts)
+    return summary
 
-    if args.dry_run:
-        print("\n=== DRY RUN - No files will be modified ===\n")
+def run_analyze(args):
+    """Write an analyze summary row for every input file"""
+    out = open(args.analyze_output, 'w', newline='', encoding='utf-8') if args.analyze_output else sys.stdout
 
-    for i, pdf_file in enumerate(pdf_files, 1):
-        # Determine output path
-        if args.recursive and input_path.is_dir():
-            relative_path = pdf_file.relative_to(input_path)
-            output_path = output_dir / relative_path.parent / format_output_name(pdf_file, args.pattern)
-        else:
-            output_path = output_dir / format_output_name(pdf_file, args.pattern)
+    writer = None
+    if args.analyze_format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=ANALYZE_FIELDS)
+        writer.writeheader()
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+    analyzed = failed = 0
+    try:
+        for pdf_file in iter_batch_inputs(args):
+            try:
+                with file_trace(pdf_file):
+                    summary = analyze_pdf(pdf_file)
+            except Exception as e:
+                summary = dict.fromkeys(ANALYZE_FIELDS, '')
+                summary['file'] = str(pdf_file)
+                summary['error'] = f"{type(e).__name__}: {e}"
+                failed += 1
+                batch_log.warning("  Warning: cannot analyze %s: %s", pdf_file, summary['error'])
+
+            if writer is not None:
+                writer.writerow(summary)
+            else:
+                out.write(json.dumps(summary) + '\n')
+            analyzed += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if analyzed == 0:
+        batch_log.error("No PDF files found: %s", args.from_file or args.input)
+        sys.exit(1)
+    batch_log.info("Analyzed %d file(s), %d could not be read", analyzed, failed)
 
-        if output_path.exists() and not args.overwrite:
-            print(f"[{i}/{len(pdf_files)}] Skipping {pdf_file.name} (output exists)")
-            continue
+def run_storage_batch(args):
+    """Batch conversion between file:// or s3:// locations
 
-        if args.dry_run:
-            print(f"[{i}/{len(pdf_files)}] Would convert: {pdf_file} -> {output_path}")
+    Upcoming inputs are downloaded while the current one converts, and
+    outputs upload in the background while the next one converts. With
+    --from-file the inputs are the listed local paths.
+    """
+    if args.from_file:
+        input_storage, input_prefix = LocalStorage(), ''
+    else:
+        input_storage, input_prefix = open_storage(args.input, args.s3_endpoint_url)
+    output_storage, output_prefix = open_storage(args.output_dir, args.s3_endpoint_url)
+    options = convert_options(args)
+    metrics = BatchMetrics(args.report_jsonl, args.metrics_textfile)
+    counts = {'converted': 0, 'failed': 0, 'skipped': 0}
+
+    def output_key(key):
+        relative = PurePosixPath(relative_key(key, input_prefix))
+        name = format_output_name(relative, args.pattern)
+        if args.recursive and not args.from_file:
+            name = str(relative.parent / name)
+        return join_key(output_prefix, name)
+
+    def input_keys():
+        if args.from_file:
+            keys = (str(path) for path in iter_file_list(args.from_file, args.null))
+        else:
+            keys = input_storage.list_pdfs(input_prefix, args.recursive)
+        if args.shard:
+            shard_index, shard_count = args.shard
+            keys = (key for key in keys if in_shard(key, shard_index, shard_count))
+        return keys
+
+    def pending_inputs():
+        for key in input_keys():
+            if not args.overwrite and output_storage.exists(output_key(key)):
+                batch_log.info("Skipping %s (output exists)", input_storage.uri(key))
+                counts['skipped'] += 1
+                metrics.skipped()
+                continue
+            yield key
+
+    if args.dry_run:
+        for key in pending_inputs():
+            batch_log.info("Would convert: %s -> %s", input_storage.uri(key), output_storage.uri(output_key(key)))
+        return
+
+    def uploaded(key, error):
+        if error is not None:
+            batch_log.error("  ERROR: Failed to upload %s: %s", output_storage.uri(key), error)
         else:
-            print(f"[{i}/{len(pdf_files)}] Processing: {pdf_file.name}")
+            batch_log.info("  Uploaded %s", output_storage.uri(key))
+
+    with tempfile.TemporaryDirectory(prefix='pdf_ua_') as work_dir, \
+            Transfers(work_dir, args.prefetch, args.uploads) as transfers:
+        for i, (key, local_input) in enumerate(transfers.prefetch(input_storage, pending_inputs()), 1):
+            input_uri = input_storage.uri(key)
+            out_key = output_key(key)
+            batch_log.info("[%d] Processing: %s", i, input_uri)
+            if isinstance(local_input, Exception):
+                batch_log.error("  ERROR: Failed to download %s: %s", input_uri, local_input)
+                counts['failed'] += 1
+                continue
+
+            local_output = Path(out_key) if not output_storage.is_remote else Path(work_dir) / 'out' / out_key
+            local_output.parent.mkdir(parents=True, exist_ok=True)
+            start = time.perf_counter()
+            stats, error = None, None
             try:
-                convert_pdf(str(pdf_file), str(output_path), verbose=args.verbose)
+                stats = convert_file(local_input, local_output, options, args.timeout, args.max_rss)
+                counts['converted'] += 1
             except Exception as e:
-                print(f"  ERROR: Failed to convert {pdf_file.name}: {e}")
-                if args.verbose:
-                    import traceback
-                    traceback.print_exc()
+                error = e
+                counts['failed'] += 1
+                log_failure(input_uri, e)
+
+            if metrics.enabled:
+                record = file_record(local_input, local_output, time.perf_counter() - start, stats, error)
+                record['input'], record['output'] = input_uri, output_storage.uri(out_key)
+                metrics.record(record)
+
+            if input_storage.is_remote:
+                local_input.unlink()
+            if error is None and output_storage.is_remote:
+                transfers.upload(output_storage, local_output, out_key, uploaded)
+
+    metrics.close()
+    upload_failures = len(transfers.upload_errors)
+    batch_log.info("\n=== Conversion complete: %d converted, %d failed, %d skipped, %d upload(s) failed ===",
+                   counts['converted'], counts['failed'], counts['skipped'], upload_failures)
+    if counts['failed'] or upload_failures:
+        sys.exit(1)
 
-    if not args.dry_run:
-        print(f"\n=== Conversion complete ===")
-        print(f"Output directory: {output_dir.absolute()}")
+def batch_output_path(pdf_file, input_path, output_dir, args):
+    """Output path of a batch input, mirroring the input tree in recursive mode"""
+    if args.recursive and input_path is not None and input_path.is_dir():
+        relative_path = pdf_file.relative_to(input_path)
+        return output_dir / relative_path.parent / format_output_name(pdf_file, args.pattern)
+    return output_dir / format_output_name(pdf_file, args.pattern)
+
+def previous_output(args, output_path, output_dir):
+    """The earlier output of a batch file under --previous, if there is one"""
+    if not args.previous:
+        return None
+    previous = Path(args.previous) / output_path.relative_to(output_dir)
+    return previous if previous.is_file() else None
+
+def run_queue(args):
+    """Enqueue the input (if given), then convert queued files until the queue is drained"""
+    queue = WorkQueue(args.queue, lease=args.lease, max_attempts=args.max_attempts)
+
+    if args.input or args.from_file:
+        input_path = Path(args.input) if args.input and not args.from_file else None
+        output_dir = Path(args.output_dir)
+
+        queued = 0
+        for pdf_file in iter_batch_inputs(args):
+            output_path = batch_output_path(pdf_file, input_path, output_dir, args)
+            if output_path.exists() and not args.overwrite:
+                continue
+            if args.dry_run:
+                batch_log.info("Would queue: %s -> %s", pdf_file, output_path)
+            elif queue.enqueue(pdf_file, output_path):
+                queued += 1
+        batch_log.info("Queued %d new file(s) in %s", queued, args.queue)
+
+    if args.dry_run:
+        return
+
+    batch_log.info("Worker %s processing queue: %s", queue.worker_id, args.queue)
+    metrics = BatchMetrics(args.report_jsonl, args.metrics_textfile)
+    options = convert_options(args)
+
+    def process(input_file, output_file):
+        batch_log.info("Processing: %s", input_file)
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            stats = convert_file(input_file, output_file, options, args.timeout, args.max_rss)
+        except Exception as e:
+            if metrics.enabled:
+                metrics.record(file_record(input_file, output_file, time.perf_counter() - start, error=e))
+            log_failure(input_file, e)
+            raise
+        if metrics.enabled:
+            metrics.record(file_record(input_file, output_file, time.perf_counter() - start, stats))
+        return stats
+
+    totals = run_worker(queue, process, poll_interval=min(5.0, args.lease / 2))
+    metrics.close()
+
+    counts = queue.counts()
+    batch_log.info("\n=== Queue drained ===")
+    batch_log.info("This worker: %d converted, %d failed", totals['done'], totals['failed'])
+    batch_log.info("Queue totals: %d done, %d failed", counts['done'], counts['failed'])
 
 def format_output_name(input_path, pattern, output_dir=None):
     """Format output filename using pattern"""
@@ -173,35 +831,29 @@ def format_output_name(input_path, pattern, output_dir=None):
     else:
         return output_name
 
-def lookup_unicode_online(symbol, verbose=False):
-    """Look up Unicode value for symbol by querying fileformat.info"""
-    try:
-        import urllib.parse
-        encoded = urllib.parse.quote(symbol)
-        search_url = f"https://www.fileformat.info/info/unicode/char/search.htm?q={encoded}"
-
-        response = requests.get(search_url, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text()
-            matches = re.findall(r'U\+([0-9A-Fa-f]{4,6})', text)
-            if matches:
-                return matches[0].upper()
-    except Exception as e:
-        if verbose:
-            print(f"    Warning: Online lookup failed: {e}")
-
-    return None
-
-def fix_font_tounicode(pdf, font_obj, font_name, verbose=False):
-    """Find glyphs defined in font but missing from ToUnicode CMap"""
-
-    if '/ToUnicode' not in font_obj:
-        return {}
-
-    tounicode_stream = font_obj.ToUnicode
-    tounicode_data = tounicode_stream.read_bytes().decode('latin-1', errors='ignore')
+def read_page_content(page):
+    """Return the concatenated bytes of a page's content stream(s)"""
+    contents = page.Contents
+    if isinstance(contents, Array):
+        content_data = b''
+        for content_stream in contents:
+            content_data += content_stream.read_bytes()
+        return content_data
+    return contents.read_bytes()
+
+def page_has_fonts(page):
+    """Whether a page has font resources, its own or inherited from the page tree"""
+    node = page.obj
+    for _ in range(64):  # Guard against a /Parent cycle
+        if '/Resources' in node:
+            return '/Font' in node.Resources and len(node.Resources.Font) > 0
+        if '/Parent' not in node:
+            return False
+        node = node.Parent
+    return False
 
+def parse_tounicode_codes(tounicode_data):
+    """Return the set of character codes mapped by a ToUnicode CMap"""
     existing_mappings = set()
 
     bfchar_blocks = re.findall(r'beginbfchar(.*?)endbfchar', tounicode_data, re.DOTALL)
@@ -219,242 +871,822 @@ def fix_font_tounicode(pdf, font_obj, font_name, verbose=False):
             for code in range(start, end + 1):
                 existing_mappings.add(code)
 
+    return existing_mappings
+
+TEXT_SHOWING_OPERATORS = {'Tj', 'TJ', "'", '"'}
+
+# Anything that may be a text-showing operator; content without a match has no text
+TEXT_SHOW_PATTERN = re.compile(rb"T[jJ]|['\"]")
+
+def string_codes(data, code_bytes):
+    """Return the character codes in a shown string of 1- or 2-byte codes"""
+    if code_bytes == 1:
+        return set(data)
+    return {int.from_bytes(data[i:i + 2], 'big') for i in range(0, len(data) - 1, 2)}
+
+def collect_used_codes(pdf):
+    """Return {font objgen: codes shown with that font} for the pages and Form XObjects they draw
+
+    Returns None if a content stream cannot be parsed, since the codes it
+    shows are then unknown.
+    """
+    used_codes = {}
+    scanned_forms = set()
+
+    def scan(content, resources):
+        fonts = resources.get('/Font', Dictionary()) if resources is not None else Dictionary()
+        xobjects = resources.get('/XObject', Dictionary()) if resources is not None else Dictionary()
+        font = None
+        font_stack = []
+
+        for operands, operator in parse_content_stream(content):
+            op = str(operator)
+            if op == 'Tf':
+                font = fonts.get(str(operands[0]))
+            elif op == 'q':
+                font_stack.append(font)
+            elif op == 'Q':
+                font = font_stack.pop() if font_stack else font
+            elif op in TEXT_SHOWING_OPERATORS:
+                if font is None or not font.is_indirect:
+                    continue
+                code_bytes = 2 if font.get('/Subtype') == Name.Type0 else 1
+                shown = operands[0] if op == 'TJ' else [operands[-1]]
+                codes = used_codes.setdefault(font.objgen, set())
+                for item in shown:
+                    if isinstance(item, String):
+                        codes |= string_codes(bytes(item), code_bytes)
+            elif op == 'Do':
+                xobject = xobjects.get(str(operands[0]))
+                if xobject is None or xobject.get('/Subtype') != Name.Form:
+                    continue
+                if xobject.objgen in scanned_forms:
+                    continue
+                scanned_forms.add(xobject.objgen)
+                scan(xobject, xobject.get('/Resources', resources))
+
+    try:
+        for page in pdf.pages:
+            if '/Contents' in page:
+                scan(page, page.get('/Resources'))
+    except PdfError:
+        return None
+    return used_codes
+
+def iter_fonts(pdf):
+    """Yield (resource name, font) once for every font used by the pages"""
+    processed_fonts = set()
+    for page in pdf.pages:
+        if '/Resources' in page and '/Font' in page.Resources:
+            fonts = page.Resources.Font
+            for font_name, font_obj in fonts.items():
+                if '/BaseFont' not in font_obj:
+                    continue
+                if font_obj.is_indirect:
+                    if font_obj.objgen in processed_fonts:
+                        continue
+                    processed_fonts.add(font_obj.objgen)
+                yield font_name, font_obj
+
+def find_non_embedded_fonts(pdf):
+    """Return the BaseFont names of fonts that are not embedded (a PDF/UA violation)"""
+    non_embedded_fonts = []
+    for font_name, font_obj in iter_fonts(pdf):
+        base_font = str(font_obj.BaseFont)
+        if not is_font_embedded(font_obj) and base_font not in non_embedded_fonts:
+            non_embedded_fonts.append(base_font)
+
+    return non_embedded_fonts
+
+def is_font_embedded(font_obj):
+    """True if the font program is embedded (Type3 fonts don't need embedding)"""
+    if str(font_obj.get('/Subtype', 'Unknown')) == '/Type3':
+        return True
+    if '/FontDescriptor' in font_obj:
+        font_desc = font_obj.FontDescriptor
+        return any(key in font_desc for key in ['/FontFile', '/FontFile2', '/FontFile3'])
+    return False
+
+def read_font_encoding(font_obj):
+    """Return (code -> glyph name encoding defined in the embedded font program, bytes read)"""
     font_encoding = {}
+    bytes_read = 0
     if '/FontDescriptor' in font_obj and '/FontFile' in font_obj.FontDescriptor:
         try:
             font_stream = font_obj.FontDescriptor.FontFile
             font_data = font_stream.read_bytes()
+            bytes_read = len(font_data)
             font_text = font_data.decode('latin-1', errors='ignore')
             encoding_matches = re.findall(r'dup\s+(\d+)\s+/(\S+)\s+put', font_text)
             for code_str, glyph_name in encoding_matches:
                 font_encoding[int(code_str)] = glyph_name
         except:
             pass
+    return font_encoding, bytes_read
 
-    if verbose:
-        print(f"    ToUnicode has {len(existing_mappings)} mappings")
-        print(f"    Font defines {len(font_encoding)} glyphs")
-
+def read_differences(differences):
+    """Return the code -> glyph name map of an /Encoding /Differences array"""
+    font_encoding = {}
+    code = 0
+    for item in differences:
+        if isinstance(item, Name):
+            font_encoding[code] = str(item)[1:]
+            code += 1
+        else:
+            code = int(item)
+    return font_encoding
+
+def font_glyph_codes(font_obj):
+    """Return the codes with a nonzero /Widths entry, or None if the font has no widths"""
+    if '/Widths' not in font_obj or '/FirstChar' not in font_obj:
+        return None
+    first_char = int(font_obj.FirstChar)
+    return {first_char + i for i, width in enumerate(font_obj.Widths) if float(width) != 0}
+
+UNICODE_GLYPH_NAME_PATTERN = re.compile(r'uni([0-9A-F]{4})|u([0-9A-F]{4,6})')
+
+# Offline glyph database built by 'build-glyph-db' (see glyph_db.py); opened on first use
+glyph_db = GlyphDB()
+
+def unicode_glyph_name(symbol):
+    """AGL glyph name (uniXXXX, or uXXXXX beyond the BMP) for a Unicode symbol"""
+    code_point = ord(symbol)
+    return f"uni{code_point:04X}" if code_point <= 0xFFFF else f"u{code_point:05X}"
+
+def glyph_symbol(glyph_name):
+    """Unicode for a glyph name: the lookup table, uniXXXX/uXXXXX names, then the glyph database, else None"""
+    symbol = GLYPH_TO_SYMBOL.get(glyph_name)
+    if symbol is None:
+        match = UNICODE_GLYPH_NAME_PATTERN.fullmatch(glyph_name)
+        if match:
+            symbol = chr(int(match.group(1) or match.group(2), 16))
+        else:
+            symbol = glyph_db.unicode(glyph_name)
+    return symbol
+
+def tounicode_hex(symbol):
+    """ToUnicode CMap destination for a symbol: UTF-16BE hex, with surrogate pairs beyond the BMP"""
+    return symbol.encode('utf-16-be').hex().upper()
+
+def resolve_font_encoding(font_obj, tex_tables=True):
+    """Return (code -> glyph name encoding, bytes of font program read)
+
+    The encoding comes from the font dictionary first: a named base encoding
+    and /Differences, which pdfTeX writes for almost every font, kept to the
+    codes with a nonzero width (every code if the font has no widths). Codes
+    the font has widths for that are still unknown come next from the built-in
+    encoding of a standard TeX font (see tex_fonts.py), as uniXXXX names,
+    then from the font's encoding in the glyph database, if it has one.
+    The embedded font program is only decompressed and parsed when codes are
+    still unknown after that, or the dictionary names no encoding at all.
+    """
+    font_encoding = {}
+    glyph_codes = font_glyph_codes(font_obj)
+
+    encoding = font_obj.get('/Encoding')
+    base_encoding = None
+    if isinstance(encoding, Name):
+        base_encoding = encoding
+    elif isinstance(encoding, Dictionary):
+        base_encoding = encoding.get('/BaseEncoding')
+
+    if base_encoding is not None:
+        for code, glyph_name in BASE_ENCODINGS.get(str(base_encoding), {}).items():
+            # Only the codes this font actually draws, not the whole base encoding
+            if glyph_codes is None or code in glyph_codes:
+                font_encoding[code] = glyph_name
+
+    if isinstance(encoding, Dictionary) and '/Differences' in encoding:
+        for code, glyph_name in read_differences(encoding.Differences).items():
+            if glyph_codes is None or code in glyph_codes:
+                font_encoding[code] = glyph_name
+
+    # Without widths, the built-in table cannot tell which glyphs the subset holds
+    builtin_table = tex_font_table(font_obj.get('/BaseFont', '')) if tex_tables else None
+    if builtin_table is not None and glyph_codes is not None:
+        for code in glyph_codes - font_encoding.keys():
+            if code in builtin_table:
+                font_encoding[code] = unicode_glyph_name(builtin_table[code])
+
+    if glyph_codes is not None and glyph_codes - font_encoding.keys():
+        base_font = str(font_obj.get('/BaseFont', ''))[1:]
+        db_encoding = glyph_db.font_encoding(base_font.split('+', 1)[-1]) if base_font else None
+        if db_encoding:
+            for code in glyph_codes - font_encoding.keys():
+                if code in db_encoding:
+                    font_encoding[code] = db_encoding[code]
+
+    if not font_encoding:
+        return read_font_encoding(font_obj)
+
+    unknown_codes = glyph_codes - font_encoding.keys() if glyph_codes is not None else set()
+    if not unknown_codes:
+        return font_encoding, 0
+
+    program_encoding, bytes_read = read_font_encoding(font_obj)
+    for code in unknown_codes:
+        if code in program_encoding:
+            font_encoding[code] = program_encoding[code]
+    return font_encoding, bytes_read
+
+def find_missing_glyphs(font_obj):
+    """Return (ToUnicode codes, font encoding, codes missing from ToUnicode, font program bytes read)"""
+    tounicode_data = font_obj.ToUnicode.read_bytes().decode('latin-1', errors='ignore')
+    existing_mappings = parse_tounicode_codes(tounicode_data)
+    font_encoding, font_program_bytes = resolve_font_encoding(font_obj)
     missing_codes = set(font_encoding.keys()) - existing_mappings
+    return existing_mappings, font_encoding, missing_codes, font_program_bytes
+
+def fix_font_tounicode(pdf, font_obj, font_name, used_codes=None, online=None):
+    """Find glyphs defined in font but missing from ToUnicode CMap
+
+    With used_codes, only codes the content actually shows are repaired.
+    Returns (code -> Unicode hex mappings to add, font program bytes read,
+    code -> pending online lookup). Mappings hold the local table's values;
+    with online (a UnicodeLookup), each is also looked up in the background
+    and the caller may replace it with the resolved value.
+    """
+
+    if '/ToUnicode' not in font_obj:
+        return {}, 0, {}
+
+    existing_mappings, font_encoding, missing_codes, font_program_bytes = find_missing_glyphs(font_obj)
+
+    fonts_log.debug("    ToUnicode has %d mappings", len(existing_mappings))
+    fonts_log.debug("    Font defines %d glyphs", len(font_encoding))
+    if font_program_bytes:
+        fonts_log.debug("    Read %d bytes of font program", font_program_bytes)
+    else:
+        fonts_log.debug("    Encoding resolved without reading the font program")
+
+    if used_codes is not None:
+        unused_count = len(missing_codes - used_codes)
+        missing_codes &= used_codes
+        if unused_count:
+            fonts_log.debug("    Skipping %d unmapped glyphs never shown in the content", unused_count)
 
     if not missing_codes:
-        if verbose:
-            print(f"    All font glyphs have ToUnicode mappings!")
-        return {}
+        fonts_log.debug("    All font glyphs have ToUnicode mappings!")
+        return {}, font_program_bytes, {}
 
-    if verbose:
-        print(f"    {len(missing_codes)} glyphs MISSING from ToUnicode!")
+    fonts_log.debug("    %d glyphs MISSING from ToUnicode!", len(missing_codes))
 
     new_mappings = {}
+    pending = {}
 
     for char_code in sorted(missing_codes):
         glyph_name = font_encoding[char_code]
 
-        if verbose:
-            print(f"    Missing: code 0x{char_code:02X} = /{glyph_name}")
+        fonts_log.debug("    Missing: code 0x%02X = /%s", char_code, glyph_name)
 
-        if glyph_name in GLYPH_TO_SYMBOL:
-            symbol = GLYPH_TO_SYMBOL[glyph_name]
-            if verbose:
-                print(f"    Lookup table resolved /{glyph_name} to: U+{ord(symbol):04X}")
+        symbol = glyph_symbol(glyph_name)
+        if symbol is not None:
+            fonts_log.debug("    Lookup table resolved /%s to: %s",
+                            glyph_name, ' '.join(f"U+{ord(char):04X}" for char in symbol))
 
-            unicode_hex = lookup_unicode_online(symbol, verbose)
-            if unicode_hex:
-                new_mappings[char_code] = unicode_hex
-                if verbose:
-                    print(f"    SUCCESS: U+{unicode_hex}")
-            else:
-                new_mappings[char_code] = f"{ord(symbol):04X}"
-                if verbose:
-                    print(f"    Using direct Unicode: U+{ord(symbol):04X}")
+            new_mappings[char_code] = tounicode_hex(symbol)
+            if online is not None and len(symbol) == 1:
+                pending[char_code] = online.submit(symbol)
         else:
-            if verbose:
-                print(f"    Glyph /{glyph_name} not in lookup table - SKIPPED")
+            fonts_log.debug("    Glyph /%s not in lookup table - SKIPPED", glyph_name)
+
+    return new_mappings, font_program_bytes, pending
+
+def apply_online_lookups(online, new_mappings, pending, deadline):
+    """Replace local mappings with the online results that arrived before deadline"""
+    resolved = online.resolve(pending, deadline)
+    for char_code, code_point in resolved.items():
+        try:
+            unicode_hex = tounicode_hex(chr(int(code_point, 16)))
+        except (ValueError, OverflowError):
+            continue
+        if unicode_hex != new_mappings[char_code]:
+            fonts_log.debug("    Online lookup: code 0x%02X = U+%s (local table: <%s>)",
+                            char_code, code_point, new_mappings[char_code])
+        new_mappings[char_code] = unicode_hex
+    return len(resolved)
+
+def patch_tounicode(pdf, font_obj, new_mappings):
+    """Add code -> Unicode hex mappings to a font's ToUnicode CMap"""
+    tounicode_stream = font_obj.ToUnicode
+    tounicode_data = tounicode_stream.read_bytes().decode('latin-1', errors='ignore')
 
-    return new_mappings
+    if 'beginbfchar' in tounicode_data:
+        insert_pos = tounicode_data.rfind('endbfchar')
+        if insert_pos != -1:
+            count_match = re.search(r'(\d+)\s+beginbfchar', tounicode_data)
+            if count_match:
+                old_count = int(count_match.group(1))
+                new_count = old_count + len(new_mappings)
+                tounicode_data = re.sub(
+                    r'(\d+)(\s+beginbfchar)',
+                    f'{new_count}\\2',
+                    tounicode_data,
+                    count=1
+                )
+
+            new_entries = '\n'.join([f'<{code:02X}> <{uni}>' for code, uni in sorted(new_mappings.items())]) + '\n'
+            tounicode_data = tounicode_data[:insert_pos] + new_entries + tounicode_data[insert_pos:]
+
+    new_stream = Stream(pdf, tounicode_data.encode('latin-1'))
+    new_stream.Type = Name.CMap
+    font_obj.ToUnicode = new_stream
+
+# Font selections (/F1 12 Tf) and the ends of text lines: a line shows text
+# if it ends with (text) Tj or [...] TJ. Whitespace never spans lines.
+CONTENT_TOKEN_PATTERN = re.compile(
+    rb'/([^\s/]+)[^\S\n]+([\d.]+)[^\S\n]+Tf|(\))[^\S\n]*Tj[^\S\n]*$|\][^\S\n]*TJ[^\S\n]*$',
+    re.MULTILINE
+)
 
 class ContentParser:
     """Parse PDF content streams to extract text with formatting info"""
 
     def __init__(self):
-        self.text_blocks = []
+        self.text_blocks = None
         self.current_font = None
         self.current_size = None
 
     def parse(self, content_data):
-        """Parse content stream and extract text blocks with font info"""
-        content_str = content_data.decode('latin-1', errors='ignore')
-        lines = content_str.split('\n')
-
-        for line in lines:
-            # Font selection: /F1 12 Tf
-            font_match = re.match(r'/(\S+)\s+([\d.]+)\s+Tf', line.strip())
-            if font_match:
-                self.current_font = font_match.group(1)
-                self.current_size = float(font_match.group(2))
+        """Parse content stream and return its text runs as a TextRunStore
+
+        Every line that shows text is one run, in the font selected last;
+        only the first selection of a line counts. A run spans the operand
+        from the first opening bracket after that selection (or the line
+        start) to the closing one, empty if there is none. Runs point into
+        content_data rather than copying their text.
+        """
+        self.text_blocks = text_blocks = TextRunStore(content_data)
+        font_id = None
+        if self.current_font is not None:
+            font_id = text_blocks.font_id(self.current_font)
+        font_line_end = -1   # End of the line of the last font selection
+        operand_start = 0    # Where that line's operand search starts
+
+        for match in CONTENT_TOKEN_PATTERN.finditer(content_data):
+            font, size, string_end = match.groups()
+            pos = match.start()
+            if font is not None:
+                # Font selection: /F1 12 Tf
+                if pos < font_line_end:
+                    continue
+                font_line_end = content_data.find(b'\n', pos)
+                if font_line_end < 0:
+                    font_line_end = len(content_data)
+                operand_start = match.end()
+                self.current_font = font.decode('latin-1')
+                self.current_size = float(size)
+                font_id = text_blocks.font_id(self.current_font)
+                continue
+            if not (self.current_font and self.current_size):
                 continue
 
-            # Text showing operations
-            if self.current_font and self.current_size:
+            if pos > font_line_end:
+                operand_start = content_data.rfind(b'\n', 0, pos) + 1
+            if string_end is not None:
                 # Simple text: (text) Tj
-                text_match = re.search(r'\(([^)]+)\)\s*Tj', line)
-                if text_match:
-                    text = text_match.group(1)
-                    self.text_blocks.append({
-                        'text': text,
-                        'font': self.current_font,
-                        'size': self.current_size
-                    })
-                    continue
-
+                kind, opening = SHOW_STRING, b'('
+            else:
                 # Array text: [(text1) offset (text2) ...] TJ
-                array_match = re.search(r'\[(.*?)\]\s*TJ', line)
-                if array_match:
-                    content = array_match.group(1)
-                    texts = re.findall(r'\(([^)]+)\)', content)
-                    if texts:
-                        combined_text = ''.join(texts)
-                        self.text_blocks.append({
-                            'text': combined_text,
-                            'font': self.current_font,
-                            'size': self.current_size
-                        })
-
-        return self.text_blocks
-
-def classify_text_element(font_size):
-    """Classify text element based on font size"""
-    if font_size >= 14:
-        return 'H'  # Heading (H1 or H2)
-    elif font_size >= 12:
-        return 'H3'  # Subheading
-    elif font_size >= 8:
-        return 'P'  # Paragraph
-    else:
-        return 'Artifact'  # Footer, page numbers, etc.
-
-def tag_content_with_structure(pdf, page, content_data, page_num, verbose=False):
-    """Tag content with proper structure tags instead of artifacts"""
-
-    parser = ContentParser()
-    text_blocks = parser.parse(content_data)
-
-    if verbose and text_blocks:
-        print(f"    Found {len(text_blocks)} text blocks")
+                kind, opening = SHOW_ARRAY, b'['
+            start = content_data.find(opening, operand_start, pos) + 1 or pos
+            text_blocks.append(start, pos, kind, font_id, self.current_size)
+
+        return text_blocks
+
+def collect_font_sizes(contents):
+    """FontSizeStats of an iterable of content streams (bytes), parsed one at a time"""
+    stats = FontSizeStats()
+    for content_data in contents:
+        stats.add(ContentParser().parse(content_data))
+    return stats
+
+def tag_content_with_structure(pdf, content_data, page_num, levels=None, text_runs=None):
+    """Tag content with proper structure tags instead of artifacts
+
+    levels is the document's HeadingLevels (see font_stats), which maps each
+    font size to a tag; without it, fixed size thresholds apply. text_runs
+    is the content's TextRunStore, parsed here if not given: each run's line
+    is tagged by the run's size, and the lines between runs go into the
+    marked content of the next one. Returns the tagged content and its
+    structure layout: the tag code of every MCID, in MCID order (see
+    text_runs).
+    """
+    if levels is None:
+        levels = HeadingLevels()
+    if text_runs is None:
+        text_runs = ContentParser().parse(content_data)
+    if text_runs:
+        tagging_log.debug("    Found %d text blocks", len(text_runs))
 
     # Build new content stream with marked content tags
     # Strategy: Wrap entire content blocks between text operations
-    content_str = content_data.decode('latin-1', errors='ignore')
-    lines = content_str.split('\n')
-
-    # Track state
-    current_font = None
-    current_size = None
     current_tag = None
-    current_mcid = None
     mcid_counter = 0
-    struct_elements = []
+    struct_layout = new_layout()
     in_marked_content = False
-    first_heading = True  # Track if we've seen the first heading
 
     new_content = bytearray()
-    buffer = bytearray()  # Buffer content until we know what tag to use
-
-    for i, line in enumerate(lines):
-        line_stripped = line.strip()
-
-        # Track font changes (but don't continue - line might also have text)
-        font_match = re.search(r'/(\S+)\s+([\d.]+)\s+Tf', line_stripped)
-        if font_match:
-            current_font = font_match.group(1)
-            current_size = float(font_match.group(2))
-
-        # Check if this line has text output
-        has_text = re.search(r'\)\s*Tj\s*$', line_stripped) or re.search(r'\]\s*TJ\s*$', line_stripped)
-
-        if has_text and current_font and current_size:
-            # Classify this text block
-            elem_type = classify_text_element(current_size)
-
-            # Determine tag
-            if elem_type == 'H':
-                if first_heading:
-                    tag = 'H1'  # First heading is H1
-                    first_heading = False
-                else:
-                    tag = 'H1'  # All section headings are H1 in this document
-            elif elem_type == 'H3':
-                tag = 'H3'
-            elif elem_type == 'P':
-                tag = 'P'
+    content_end = len(content_data)
+    pos = 0  # Start of the content not written yet: the buffer until we know what tag to use
+
+    for start, size in zip(text_runs.starts, text_runs.sizes):
+        # The run's line and the buffered lines before it, each written with its newline
+        line_end = content_data.find(b'\n', start)
+        if line_end < 0:
+            line_end = content_end
+        lines = content_data[pos:line_end] + b'\n'
+        pos = line_end + 1
+
+        # Classify this text block: a lookup in the document's size table
+        tag = levels.tag(size)
+
+        # If we're starting a new tag type or first content
+        if tag != current_tag or not in_marked_content:
+            # Close previous marked content if open
+            if in_marked_content:
+                new_content += b'EMC\n'
+                in_marked_content = False
+
+            # Start new marked content
+            if tag != 'Artifact':
+                mcid = mcid_counter
+                mcid_counter += 1
+                current_tag = tag
+
+                new_content += f'/{tag} <</MCID {mcid}>> BDC\n'.encode('latin-1')
+                new_content += lines
+
+                struct_layout.append(STRUCT_TAG_CODES[tag])
+                in_marked_content = True
             else:
-                tag = 'Artifact'
-
-            # If we're starting a new tag type or first content
-            if tag != current_tag or not in_marked_content:
-                # Close previous marked content if open
-                if in_marked_content:
-                    new_content += b'EMC\n'
-                    in_marked_content = False
-
-                # Start new marked content
-                if tag != 'Artifact':
-                    mcid = mcid_counter
-                    mcid_counter += 1
-                    current_mcid = mcid
-                    current_tag = tag
-
-                    new_content += f'/{tag} <</MCID {mcid}>> BDC\n'.encode('latin-1')
-                    new_content += buffer
-                    new_content += line.encode('latin-1') + b'\n'
-
-                    struct_elements.append({
-                        'type': tag,
-                        'mcid': mcid,
-                        'page': page
-                    })
-                    in_marked_content = True
-                else:
-                    # Artifact
-                    new_content += b'/Artifact BMC\n'
-                    new_content += buffer
-                    new_content += line.encode('latin-1') + b'\n'
-                    new_content += b'EMC\n'
-                    current_tag = 'Artifact'
-                    in_marked_content = False
-            else:
-                # Continue in same marked content
-                new_content += buffer
-                new_content += line.encode('latin-1') + b'\n'
-
-            buffer = bytearray()
+                # Artifact
+                new_content += b'/Artifact BMC\n'
+                new_content += lines
+                new_content += b'EMC\n'
+                current_tag = 'Artifact'
+                in_marked_content = False
         else:
-            # Non-text operation, add to buffer
-            buffer += line.encode('latin-1') + b'\n'
+            # Continue in same marked content
+            new_content += lines
 
-    # Flush any remaining buffer
-    if buffer:
+    # Flush the lines after the last text block
+    if pos <= content_end:
         if in_marked_content:
-            new_content += buffer
+            new_content += content_data[pos:] + b'\n'
         else:
             # Wrap remaining content as artifact
             new_content += b'/Artifact BMC\n'
-            new_content += buffer
+            new_content += content_data[pos:] + b'\n'
             new_content += b'EMC\n'
 
     # Close any open marked content
     if in_marked_content:
         new_content += b'EMC\n'
 
-    return bytes(new_content), struct_elements
+    return bytes(new_content), struct_layout
 
-def convert_pdf(input_file, output_file, verbose=False):
-    if verbose:
-        print(f"Opening {input_file}")
-    pdf = Pdf.open(input_file)
+# Marked content wrapped around the untouched content streams of a text-free page
+ARTIFACT_PREFIX = b'/Artifact BMC\n'
+ARTIFACT_SUFFIX = b'\nEMC\n'
+
+def wrap_as_artifact(page, wrappers):
+    """Mark a text-free page's content as one artifact without rewriting it
+
+    The content stream(s) stay as they are in the input, still compressed;
+    wrappers is the (prefix, suffix) pair of indirect streams that every
+    such page of the document shares. The result is equivalent to what
+    tag_content_with_structure produces for content without text.
+    """
+    prefix, suffix = wrappers
+    contents = page.obj.Contents
+    streams = list(contents) if isinstance(contents, Array) else [contents]
+    page.Contents = Array([prefix] + streams + [suffix])
+
+def iter_struct_elements(pdf):
+    """Yield every structure element reachable from the StructTreeRoot"""
+    if '/StructTreeRoot' not in pdf.Root or '/K' not in pdf.Root.StructTreeRoot:
+        return
+
+    seen = set()
+    stack = [pdf.Root.StructTreeRoot.K]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Array):
+            stack.extend(node)
+        elif isinstance(node, Dictionary) and node.get('/Type', Name.StructElem) == Name.StructElem and '/S' in node:
+            if node.is_indirect:
+                if node.objgen in seen:
+                    continue
+                seen.add(node.objgen)
+            yield node
+            if '/K' in node:
+                stack.append(node.K)
+
+# Page /PieceInfo key holding the fingerprint of the page's untagged content
+PIECE_INFO_KEY = '/PDFUAConverter'
+
+def pdf_date(timestamp=None):
+    return String(time.strftime('D:%Y%m%d%H%M%SZ', time.gmtime(timestamp)))
+
+def read_number_tree(node, entries=None):
+    """Flatten a number tree (e.g. the ParentTree) into a dict"""
+    if entries is None:
+        entries = {}
+    if '/Nums' in node:
+        nums = node.Nums
+        for i in range(0, len(nums) - 1, 2):
+            entries[int(nums[i])] = nums[i + 1]
+    for kid in node.get('/Kids', []):
+        read_number_tree(kid, entries)
+    return entries
+
+def load_previous_tagging(previous_file, tag_cache):
+    """Seed tag_cache with the tagged pages of an earlier output of this converter
+
+    Each page fingerprinted in its /PieceInfo contributes its tagged content
+    and its structure layout, read back from the ParentTree. Returns the set
+    of fingerprints loaded; a missing or unreadable previous output loads none.
+    """
+    loaded = set()
+    try:
+        previous_pdf = Pdf.open(previous_file)
+    except (OSError, PdfError) as e:
+        tagging_log.warning("  Warning: cannot read previous output %s: %s", previous_file, e)
+        return loaded
+
+    with previous_pdf:
+        struct_tree_root = previous_pdf.Root.get('/StructTreeRoot')
+        parent_tree = {}
+        if struct_tree_root is not None and '/ParentTree' in struct_tree_root:
+            parent_tree = read_number_tree(struct_tree_root.ParentTree)
+
+        for page in previous_pdf.pages:
+            piece_info = page.get('/PieceInfo')
+            if piece_info is None or PIECE_INFO_KEY not in piece_info or '/Contents' not in page:
+                continue
+            private = piece_info[PIECE_INFO_KEY].get('/Private', Dictionary())
+            if '/Fingerprint' not in private:
+                continue
+
+            struct_layout = new_layout()
+            if '/StructParents' in page:
+                elements = parent_tree.get(int(page.StructParents))
+                if elements is None or not isinstance(elements, Array):
+                    continue
+                tags = [str(elem.get('/S', ''))[1:] for elem in elements]
+                if any(tag not in STRUCT_TAG_CODES for tag in tags):
+                    continue  # Not a layout this converter produces
+                for tag in tags:
+                    struct_layout.append(STRUCT_TAG_CODES[tag])
+
+            key = bytes.fromhex(str(private.Fingerprint))
+            tag_cache.put(key, read_page_content(page), struct_layout, float(private.get('/TagSeconds', 0)))
+            loaded.add(key)
+    return loaded
+
+def dedupe_streams(streams, replace):
+    """Point every duplicate stream at the first identical one
+
+    streams yields (owner, key, stream); replace(owner, key, stream) swaps the
+    reference. Returns (streams removed, raw bytes they held).
+    """
+    canonical = {}
+    resolved = {}  # objgen -> canonical stream, so a shared stream is hashed once
+    removed = 0
+    bytes_saved = 0
+    for owner, key, stream in streams:
+        first = resolved.get(stream.objgen) if stream.is_indirect else None
+        if first is None:
+            raw = stream.read_raw_bytes()
+            digest = (hashlib.sha256(raw).digest(), str(stream.get('/Filter')), str(stream.get('/DecodeParms')))
+            first = canonical.setdefault(digest, stream)
+            if stream.is_indirect:
+                resolved[stream.objgen] = first
+            if first.objgen != stream.objgen:
+                removed += 1
+                bytes_saved += len(raw)
+        if first.objgen != stream.objgen:
+            replace(owner, key, first)
+    return removed, bytes_saved
+
+def optimize_pdf(pdf, stages=None):
+    """Shrink the output before saving
+
+    - drops per-element /Lang when every structure element has the same
+      language as the catalog (they inherit it from /Lang on the Root)
+    - makes fonts with identical ToUnicode CMaps share one stream
+    - makes pages with identical content streams share one stream
+
+    With stages (the conversion stages that ran), each pass only runs
+    after the stage that writes what it touches: structure-tree, tounicode
+    and tagging respectively, so parts of the document a conversion left
+    alone stay as they are. Returns a dict with the number of entries/streams removed and an
+    estimate of the bytes saved (uncompressed size of removed data).
+    """
+    result = {'lang_entries_removed': 0, 'tounicode_deduped': 0,
+              'content_streams_deduped': 0, 'bytes_saved': 0}
+
+    if stages is None:
+        stages = CONVERSION_STAGES
+
+    # Hoist /Lang: only safe when it is uniform, since /Lang is inherited
+    root_lang = pdf.Root.get('/Lang')
+    struct_elems = list(iter_struct_elements(pdf)) if 'structure-tree' in stages else []
+    langs = {str(elem.get('/Lang')) if '/Lang' in elem else None for elem in struct_elems}
+    if len(langs) == 1 and None not in langs:
+        lang = langs.pop()
+        if root_lang is None:
+            pdf.Root.Lang = String(lang)
+            root_lang = pdf.Root.Lang
+        if str(root_lang) == lang:
+            for elem in struct_elems:
+                del elem['/Lang']
+            result['lang_entries_removed'] = len(struct_elems)
+            # "/Lang (en-US)" plus separator, per element
+            result['bytes_saved'] += len(struct_elems) * (len(lang) + 9)
+
+    def font_tounicode_streams():
+        seen = set()
+        for page in pdf.pages:
+            if '/Resources' not in page or '/Font' not in page.Resources:
+                continue
+            for font_obj in page.Resources.Font.values():
+                if '/ToUnicode' not in font_obj or not isinstance(font_obj.ToUnicode, Stream):
+                    continue
+                if font_obj.is_indirect:
+                    if font_obj.objgen in seen:
+                        continue
+                    seen.add(font_obj.objgen)
+                yield font_obj, '/ToUnicode', font_obj.ToUnicode
+
+    def set_key(owner, key, stream):
+        owner[key] = stream
+
+    if 'tounicode' in stages:
+        removed, saved = dedupe_streams(font_tounicode_streams(), set_key)
+        result['tounicode_deduped'] = removed
+        result['bytes_saved'] += saved
+
+    def page_content_streams():
+        for page in pdf.pages:
+            if '/Contents' not in page:
+                continue
+            contents = page.obj.Contents
+            if isinstance(contents, Array):
+                for i, content_stream in enumerate(contents):
+                    yield contents, i, content_stream
+            else:
+                yield page.obj, '/Contents', contents
 
-    if verbose:
-        print("Adding PDF/UA compliance structures")
+    if 'tagging' in stages:
+        removed, saved = dedupe_streams(page_content_streams(), set_key)
+        result['content_streams_deduped'] = removed
+        result['bytes_saved'] += saved
+
+    convert_log.debug("  Optimizer: removed %d /Lang entries, %d duplicate ToUnicode and "
+                      "%d duplicate content streams (~%d bytes)",
+                      result['lang_entries_removed'], result['tounicode_deduped'],
+                      result['content_streams_deduped'], result['bytes_saved'])
+
+    return result
+
+def uncompressed_streams(pdf, contents=True, tounicode=True):
+    """Yield each page content and/or ToUnicode stream that has no /Filter yet
+
+    Those are the streams the converter writes; everything else keeps the
+    compression it had in the input.
+    """
+    seen = set()
+
+    def unseen(stream):
+        if not isinstance(stream, Stream) or '/Filter' in stream or stream.objgen in seen:
+            return False
+        if stream.is_indirect:
+            seen.add(stream.objgen)
+        return True
+
+    for page in pdf.pages if contents else ():
+        if '/Contents' in page:
+            page_contents = page.obj.Contents
+            for content_stream in (page_contents if isinstance(page_contents, Array) else [page_contents]):
+                if unseen(content_stream):
+                    yield content_stream
+    for _, font_obj in iter_fonts(pdf) if tounicode else ():
+        if '/ToUnicode' in font_obj and unseen(font_obj.ToUnicode):
+            yield font_obj.ToUnicode
+
+def compress_streams(pdf, level=DEFAULT_COMPRESSION_LEVEL, workers=None, stages=None):
+    """Flate-compress the converter's new streams in a thread pool before saving
+
+    zlib releases the GIL, so streams compress in parallel here instead of
+    one after another inside pdf.save(); qpdf then writes them as they are
+    (it does not recompress streams that already have /FlateDecode). Stream
+    data is read and written back on this thread, since pikepdf objects are
+    not thread-safe. With stages, only the page content (tagging) and
+    ToUnicode (tounicode) streams of stages that ran are compressed.
+    Returns (streams compressed, bytes before, bytes after).
+    """
+    if stages is None:
+        stages = CONVERSION_STAGES
+    streams = []
+    raw = []
+    for stream in uncompressed_streams(pdf, 'tagging' in stages, 'tounicode' in stages):
+        data = stream.read_raw_bytes()
+        if len(data) >= MIN_COMPRESS_BYTES:
+            streams.append(stream)
+            raw.append(data)
+    if not streams:
+        return 0, 0, 0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        compressed = list(pool.map(lambda data: zlib.compress(data, level), raw))
+    for stream, data in zip(streams, compressed):
+        stream.write(data, filter=Name.FlateDecode)
+    return len(streams), sum(map(len, raw)), sum(map(len, compressed))
+
+def temp_output_path(output_file, pid=None):
+    """Temporary file save_atomic writes in process pid (default: this one) before renaming"""
+    output_path = Path(output_file)
+    return output_path.with_name(f".{output_path.name}.{pid or os.getpid()}.tmp")
+
+def save_atomic(pdf, output_file):
+    """Save to a temporary file next to output_file, then rename it into place
+
+    A conversion that is killed part way never leaves a truncated PDF at the
+    output path, so an existing output is always a complete one.
+    """
+    tmp_path = temp_output_path(output_file)
+    output_path = Path(output_file)
+    try:
+        pdf.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+# Conversion stages, in the order convert_pdf runs them
+CONVERSION_STAGES = ('metadata', 'font-scan', 'tounicode', 'tagging', 'links', 'structure-tree')
+
+def select_stages(only=None, skip=None):
+    """Stages to run, in order, for --only and --skip lists of stage names
+
+    Raises ValueError for an unknown stage or a selection whose output would
+    be inconsistent: tagging and links create structure elements that only
+    structure-tree links into the document, and structure-tree replaces the
+    document's structure tree, so it needs tagging or links to fill it.
+    """
+    for name in (only or ()) + (skip or ()):
+        if name not in CONVERSION_STAGES:
+            raise ValueError(f"unknown stage '{name}' (stages: {', '.join(CONVERSION_STAGES)})")
+    selected = [name for name in CONVERSION_STAGES
+                if (not only or name in only) and name not in (skip or ())]
+    if not selected:
+        raise ValueError("no stages left to run")
+    if ('tagging' in selected or 'links' in selected) and 'structure-tree' not in selected:
+        raise ValueError("the tagging and links stages need the structure-tree stage")
+    if 'structure-tree' in selected and 'tagging' not in selected and 'links' not in selected:
+        raise ValueError("the structure-tree stage needs the tagging or links stage")
+    return tuple(selected)
+
+class Conversion:
+    """The document and intermediate results passed between conversion stages
+
+    Each stage reads the attributes earlier stages wrote, as listed in its
+    docstring. Attributes of stages that did not run keep their defaults,
+    so every selection yields the same stats keys.
+    """
+
+    def __init__(self, pdf, tag_cache=None, used_glyphs_only=False, previous=None, online=None):
+        self.pdf = pdf
+        self.tag_cache = tag_cache
+        self.used_glyphs_only = used_glyphs_only
+        self.previous = previous
+        self.online = online
+
+        # tounicode
+        self.font_repairs = []  # (font, mappings, pending online lookups), patched after the other stages
+        self.glyphs_fixed = 0
+        self.glyphs_resolved_online = 0
+        self.font_program_bytes = 0
+        self.glyph_coverage = []
+        self.lookup_deadline = None
+        # tagging and links
+        self.heading_levels = None  # HeadingLevels of the document, from the statistics pass
+        self.page_elements = {}  # page index -> structure elements of the page, in reading order
+        self.parent_tree = {}    # StructParents -> {MCID: element} for a page, or the element of a link
+        self.pages_passed_through = 0  # Text-free pages wrapped without rewriting their content
+        self.tag_cache_hits = 0
+        self.tag_time_saved = 0.0
+        self.previous_reused = 0
+        self.previous_time_saved = 0.0
+        # structure-tree
+        self.struct_elements = 0
+
+def stage_metadata(conversion):
+    """metadata: MarkInfo, ViewerPreferences, /Lang, PDF/UA XMP metadata and the document info title"""
+    pdf = conversion.pdf
+    convert_log.debug("Adding PDF/UA compliance structures")
 
     # Set MarkInfo in catalog
     pdf.Root.MarkInfo = Dictionary(Marked=True)
@@ -495,179 +1727,266 @@ def convert_pdf(input_file, output_file, verbose=False):
     metadata_stream.Subtype = Name.XML
     pdf.Root.Metadata = metadata_stream
 
-    if verbose:
-        print("Checking for non-embedded fonts")
+    if not pdf.docinfo:
+        pdf.docinfo = Dictionary()
 
-    # Check for non-embedded fonts (PDF/UA violation)
-    non_embedded_fonts = []
-    for page in pdf.pages:
-        if '/Resources' in page and '/Font' in page.Resources:
-            fonts = page.Resources.Font
-            for font_name, font_obj in fonts.items():
-                if '/BaseFont' in font_obj:
-                    base_font = str(font_obj.BaseFont)
-                    subtype = str(font_obj.get('/Subtype', 'Unknown'))
+    pdf.docinfo['/Title'] = String(title)
+    pdf.docinfo['/Producer'] = String('PDF/UA Converter')
 
-                    # Check if font is embedded
-                    is_embedded = False
-                    if '/FontDescriptor' in font_obj:
-                        font_desc = font_obj.FontDescriptor
-                        is_embedded = any(key in font_desc for key in ['/FontFile', '/FontFile2', '/FontFile3'])
+def stage_font_scan(conversion):
+    """font-scan: warn about fonts that are not embedded (a PDF/UA violation); changes nothing"""
+    fonts_log.debug("Checking for non-embedded fonts")
 
-                    if not is_embedded and subtype != '/Type3':  # Type3 fonts don't need embedding
-                        if base_font not in non_embedded_fonts:
-                            non_embedded_fonts.append(base_font)
+    # Check for non-embedded fonts (PDF/UA violation)
+    non_embedded_fonts = find_non_embedded_fonts(conversion.pdf)
 
     if non_embedded_fonts:
-        print(f"\n  WARNING: PDF/UA VIOLATION DETECTED!")
-        print(f"  The following fonts are NOT embedded:")
-        for font in non_embedded_fonts:
-            print(f"    - {font}")
-        print(f"\n  PDF/UA requires ALL fonts to be embedded.")
-        print(f"  This is an issue with the SOURCE PDF, not this converter.")
-        print(f"  Please recreate the source PDF with embedded fonts.")
-        print(f"\n  Continuing anyway, but output will NOT be PDF/UA compliant...\n")
-
-    if verbose:
-        print("Fixing font ToUnicode mappings")
-
-    processed_fonts = set()
-    total_fixed = 0
-
-    for page in pdf.pages:
-        if '/Resources' in page and '/Font' in page.Resources:
-            fonts = page.Resources.Font
-            for font_name, font_obj in fonts.items():
-                if '/BaseFont' in font_obj:
-                    font_id = str(font_obj.objgen)
-                    if font_id in processed_fonts:
-                        continue
-                    processed_fonts.add(font_id)
-
-                    if '/ToUnicode' in font_obj:
-                        if verbose:
-                            print(f"  Analyzing {font_obj.BaseFont} (resource name: {font_name})...")
-
-                        new_mappings = fix_font_tounicode(pdf, font_obj, str(font_name).lstrip('/'), verbose)
-
-                        if new_mappings:
-                            tounicode_stream = font_obj.ToUnicode
-                            tounicode_data = tounicode_stream.read_bytes().decode('latin-1', errors='ignore')
-
-                            if 'beginbfchar' in tounicode_data:
-                                insert_pos = tounicode_data.rfind('endbfchar')
-                                if insert_pos != -1:
-                                    count_match = re.search(r'(\d+)\s+beginbfchar', tounicode_data)
-                                    if count_match:
-                                        old_count = int(count_match.group(1))
-                                        new_count = old_count + len(new_mappings)
-                                        tounicode_data = re.sub(
-                                            r'(\d+)(\s+beginbfchar)',
-                                            f'{new_count}\\2',
-                                            tounicode_data,
-                                            count=1
-                                        )
-
-                                    new_entries = '\n'.join([f'<{code:02X}> <{uni}>' for code, uni in sorted(new_mappings.items())]) + '\n'
-                                    tounicode_data = tounicode_data[:insert_pos] + new_entries + tounicode_data[insert_pos:]
-
-                            new_stream = Stream(pdf, tounicode_data.encode('latin-1'))
-                            new_stream.Type = Name.CMap
-                            font_obj.ToUnicode = new_stream
-                            total_fixed += len(new_mappings)
-                            if verbose:
-                                print(f"    Added {len(new_mappings)} missing mappings to ToUnicode")
-
-    if total_fixed > 0 and not verbose:
-        print(f"  Fixed {total_fixed} missing glyph mappings")
-
-    if verbose:
-        print("Creating document structure with headings and paragraphs")
-
-    # Create structure elements for content and links
-    all_struct_elems = []
-    parent_tree_by_page = {}  # Map StructParents value -> list of struct elems by MCID
+        fonts_log.warning("\n  WARNING: PDF/UA VIOLATION DETECTED!\n"
+                          "  The following fonts are NOT embedded:\n%s\n"
+                          "\n  PDF/UA requires ALL fonts to be embedded.\n"
+                          "  This is an issue with the SOURCE PDF, not this converter.\n"
+                          "  Please recreate the source PDF with embedded fonts.\n"
+                          "\n  Continuing anyway, but output will NOT be PDF/UA compliant...\n",
+                          '\n'.join(f"    - {font}" for font in non_embedded_fonts))
+
+def stage_tounicode(conversion):
+    """tounicode: find glyphs missing from ToUnicode CMaps and start their online lookups
+
+    Writes font_repairs, glyphs_fixed, font_program_bytes and
+    glyph_coverage. The CMaps are patched by finish_tounicode() after the
+    remaining stages, which gives the online lookups that time to finish.
+    """
+    pdf = conversion.pdf
+    online = conversion.online
+    fonts_log.debug("Fixing font ToUnicode mappings")
+
+    used_codes = collect_used_codes(pdf) if conversion.used_glyphs_only else None
+    if conversion.used_glyphs_only and used_codes is None:
+        fonts_log.warning("  Warning: could not parse all content streams, repairing every glyph")
+    conversion.lookup_deadline = time.monotonic() + online.budget if online is not None else None
+
+    for font_name, font_obj in iter_fonts(pdf):
+        font_used_codes = None
+        if used_codes is not None and font_obj.is_indirect:
+            font_used_codes = used_codes.get(font_obj.objgen, set())
+
+        new_mappings = {}
+        if '/ToUnicode' in font_obj:
+            fonts_log.debug("  Analyzing %s (resource name: %s)...", font_obj.BaseFont, font_name)
+
+            new_mappings, bytes_read, pending = fix_font_tounicode(
+                pdf, font_obj, str(font_name).lstrip('/'), font_used_codes, online
+            )
+            conversion.font_program_bytes += bytes_read
+
+            if new_mappings:
+                conversion.font_repairs.append((font_obj, new_mappings, pending))
+                conversion.glyphs_fixed += len(new_mappings)
+
+        if font_used_codes is not None:
+            mapped_codes = set()
+            if '/ToUnicode' in font_obj:
+                mapped_codes = parse_tounicode_codes(
+                    font_obj.ToUnicode.read_bytes().decode('latin-1', errors='ignore')
+                ) | set(new_mappings)
+            conversion.glyph_coverage.append({
+                'font': str(font_obj.BaseFont),
+                'used': len(font_used_codes),
+                'mapped': len(font_used_codes & mapped_codes),
+                'unmapped_codes': sorted(font_used_codes - mapped_codes),
+            })
+
+    if conversion.glyphs_fixed > 0:
+        fonts_log.info("  Fixed %d missing glyph mappings", conversion.glyphs_fixed)
+
+    if conversion.glyph_coverage:
+        fonts_log.info("  Glyph coverage (codes used / mapped in ToUnicode):")
+        for coverage in conversion.glyph_coverage:
+            unmapped = ' '.join(f"0x{code:02X}" for code in coverage['unmapped_codes'])
+            fonts_log.info("    %s: %d used, %d mapped%s", coverage['font'], coverage['used'],
+                           coverage['mapped'], f", unmapped: {unmapped}" if unmapped else '')
+
+def finish_tounicode(conversion):
+    """Patch the ToUnicode CMaps with the tounicode stage's mappings and the online results"""
+    for font_obj, new_mappings, pending in conversion.font_repairs:
+        if pending:
+            conversion.glyphs_resolved_online += apply_online_lookups(
+                conversion.online, new_mappings, pending, conversion.lookup_deadline
+            )
+        patch_tounicode(conversion.pdf, font_obj, new_mappings)
+        fonts_log.debug("  Added %d missing mappings to the ToUnicode of %s",
+                        len(new_mappings), font_obj.get('/BaseFont'))
+    if conversion.online is not None and conversion.glyphs_fixed:
+        fonts_log.debug("  %d of %d glyph mappings confirmed online",
+                        conversion.glyphs_resolved_online, conversion.glyphs_fixed)
+
+def stage_tagging(conversion):
+    """tagging: rewrite page content with marked content and create a structure element per MCID
+
+    A statistics pass over the text runs of every page first derives the
+    document's heading levels; pages are then tagged by size lookup. Pages
+    without text keep their content streams and are only wrapped in an
+    artifact (see wrap_as_artifact). Writes heading_levels, page_elements,
+    parent_tree (page StructParents entries), pages_passed_through and the
+    tag cache counters; sets each tagged page's StructParents and PieceInfo.
+    """
+    pdf = conversion.pdf
+    tag_cache = conversion.tag_cache
+    previous = conversion.previous
+    structure_log.debug("Creating document structure with headings and paragraphs")
+
+    if tag_cache is None or (previous and not tag_cache):
+        tag_cache = TagCache()
+    cache_hits, cache_time_saved = (tag_cache.hits, tag_cache.time_saved) if tag_cache else (0, 0.0)
+    tagged_streams = {}  # Tagged content hash -> Stream shared by every page with that content
+
+    previous_keys = set()
+    if previous:
+        tag_cache.max_entries = max(tag_cache.max_entries, 2 * len(pdf.pages))
+        previous_keys = load_previous_tagging(previous, tag_cache)
+        tagging_log.debug("  Loaded %d page fingerprint(s) from %s", len(previous_keys), previous)
+    modified = pdf_date()
+
+    # A page without fonts cannot show text, so its content is never decoded.
+    # Otherwise it is read once for the statistics pass and again for tagging,
+    # which keeps a single page's content in memory rather than the document's.
+    text_pages = [page_has_fonts(page) if '/Contents' in page else False for page in pdf.pages]
+    wrappers = None
+    start = time.perf_counter()
+    run_stats = collect_font_sizes(read_page_content(page) for page, has_fonts in zip(pdf.pages, text_pages)
+                                   if has_fonts)
+    levels = conversion.heading_levels = heading_levels(run_stats)
+    tagging_log.debug("  Heading levels from %d text runs in %.3fs: %s",
+                      len(run_stats), time.perf_counter() - start, levels.summary())
+    del run_stats
 
     for page_num, page in enumerate(pdf.pages):
-        if verbose:
-            print(f"  Processing page {page_num + 1}/{len(pdf.pages)}")
-
-        if '/Annots' in page:
-            page.Tabs = Name.S
+        tagging_log.debug("  Processing page %d/%d", page_num + 1, len(pdf.pages))
 
-        # Tag content with structure
-        if '/Contents' in page:
-            contents = page.Contents
+        if '/Contents' not in page:
+            continue
+        content_data = read_page_content(page) if text_pages[page_num] else None
+
+        # Scanned pages and full-page figures: wrap the original streams as an artifact
+        if content_data is None or not TEXT_SHOW_PATTERN.search(content_data):
+            if wrappers is None:
+                wrappers = (pdf.make_indirect(Stream(pdf, ARTIFACT_PREFIX)),
+                            pdf.make_indirect(Stream(pdf, ARTIFACT_SUFFIX)))
+            wrap_as_artifact(page, wrappers)
+            conversion.pages_passed_through += 1
+            tagging_log.debug("    No text, wrapped the content as an artifact")
+            continue
 
-            # Read existing content
-            if isinstance(contents, Array):
-                content_data = b''
-                for content_stream in contents:
-                    content_data += content_stream.read_bytes()
+        # Tag content with proper structure, or reuse the tagging of identical content.
+        # The key covers the heading levels too: the same page may be tagged
+        # differently in a document with another body text size.
+        cache_key = TagCache.key(content_data, levels.fingerprint)
+        cached = tag_cache.get(cache_key) if tag_cache else None
+        if cached is not None:
+            new_content, struct_layout = cached
+            tag_seconds = tag_cache.tag_time(cache_key)
+            if cache_key in previous_keys:
+                conversion.previous_reused += 1
+                conversion.previous_time_saved += tag_seconds
+                tagging_log.debug("    Page unchanged since previous output, reused its tagging")
             else:
-                content_data = contents.read_bytes()
-
-            # Tag content with proper structure
-            new_content, struct_elements = tag_content_with_structure(
-                pdf, page, content_data, page_num, verbose
-            )
+                tagging_log.debug("    Reused tagging of an identical page")
+        else:
+            start = time.perf_counter()
+            new_content, struct_layout = tag_content_with_structure(pdf, content_data, page_num, levels)
+            tag_seconds = time.perf_counter() - start
+            if tag_cache:
+                tag_cache.put(cache_key, new_content, struct_layout, tag_seconds)
+
+        # Fingerprint of the untagged content, for --previous on the next version
+        page.LastModified = modified
+        page.PieceInfo = Dictionary({PIECE_INFO_KEY: Dictionary(
+            LastModified=modified,
+            Private=Dictionary(Fingerprint=String(cache_key.hex()), TagSeconds=round(tag_seconds, 6)),
+        )})
+
+        # Update page content, sharing one stream between pages with identical tagged content
+        stream_key = hashlib.sha256(new_content).digest()
+        if stream_key not in tagged_streams:
+            tagged_streams[stream_key] = pdf.make_indirect(Stream(pdf, new_content))
+        page.Contents = tagged_streams[stream_key]
+
+        # Set StructParents on page for marked content
+        if struct_layout:
+            page.StructParents = page_num
+
+            # Track structure elements by MCID for this page
+            mcid_elements = conversion.parent_tree.setdefault(page_num, {})
+
+            # Create structure elements for each marked content
+            for mcid, tag in layout_tags(struct_layout):
+                struct_elem = Dictionary(
+                    Type=Name.StructElem,
+                    S=Name('/' + tag),
+                    P=None,  # Will be set later
+                    K=mcid,
+                    Pg=page.obj,
+                    Lang=String("en-US")
+                )
+                struct_elem_ref = pdf.make_indirect(struct_elem)
+                conversion.page_elements.setdefault(page_num, []).append(struct_elem_ref)
+
+                # Add to parent tree structure by MCID
+                mcid_elements[mcid] = struct_elem_ref
+
+    if tag_cache:
+        conversion.tag_cache_hits = tag_cache.hits - cache_hits
+        conversion.tag_time_saved = tag_cache.time_saved - cache_time_saved
+
+def stage_links(conversion):
+    """links: give link annotations a Contents text, a StructParent and a Link structure element
+
+    Appends to page_elements (after the page's content elements) and
+    parent_tree; sets /Tabs /S on pages with annotations.
+    """
+    pdf = conversion.pdf
+    for page_num, page in enumerate(pdf.pages):
+        if '/Annots' not in page:
+            continue
 
-            # Update page content
-            page.Contents = Stream(pdf, new_content)
-
-            # Set StructParents on page for marked content
-            if struct_elements:
-                page.StructParents = page_num
-
-                # Track structure elements by MCID for this page
-                if page_num not in parent_tree_by_page:
-                    parent_tree_by_page[page_num] = {}
-
-                # Create structure elements for each marked content
-                for elem_info in struct_elements:
-                    struct_elem = Dictionary(
-                        Type=Name.StructElem,
-                        S=Name('/' + elem_info['type']),
-                        P=None,  # Will be set later
-                        K=elem_info['mcid'],
-                        Pg=page.obj,
-                        Lang=String("en-US")
-                    )
-                    struct_elem_ref = pdf.make_indirect(struct_elem)
-                    all_struct_elems.append(struct_elem_ref)
-
-                    # Add to parent tree structure by MCID
-                    parent_tree_by_page[page_num][elem_info['mcid']] = struct_elem_ref
+        page.Tabs = Name.S
 
         # Tag link annotations
-        if '/Annots' in page:
-            for annot_idx, annot in enumerate(page.Annots):
-                if annot.get('/Subtype') == Name.Link:
-                    # Add Contents key for alternate description
-                    annot.Contents = String("Link")
-
-                    # Set StructParent on annotation (use high number to avoid collision with page StructParents)
-                    struct_parent_val = 10000 + (page_num * 100) + annot_idx
-                    annot.StructParent = struct_parent_val
-
-                    # Create structure element for link
-                    link_struct = Dictionary(
-                        Type=Name.StructElem,
-                        S=Name.Link,
-                        P=None,
-                        K=Dictionary(
-                            Type=Name.OBJR,
-                            Obj=annot,
-                            Pg=page.obj
-                        ),
-                        Lang=String("en-US")
-                    )
-                    link_struct_ref = pdf.make_indirect(link_struct)
-                    all_struct_elems.append(link_struct_ref)
-
-                    # Add to parent tree (links use scalar StructParent, not array)
-                    if struct_parent_val not in parent_tree_by_page:
-                        parent_tree_by_page[struct_parent_val] = link_struct_ref
+        for annot_idx, annot in enumerate(page.Annots):
+            if annot.get('/Subtype') == Name.Link:
+                # Add Contents key for alternate description
+                annot.Contents = String("Link")
+
+                # Set StructParent on annotation (use high number to avoid collision with page StructParents)
+                struct_parent_val = 10000 + (page_num * 100) + annot_idx
+                annot.StructParent = struct_parent_val
+
+                # Create structure element for link
+                link_struct = Dictionary(
+                    Type=Name.StructElem,
+                    S=Name.Link,
+                    P=None,
+                    K=Dictionary(
+                        Type=Name.OBJR,
+                        Obj=annot,
+                        Pg=page.obj
+                    ),
+                    Lang=String("en-US")
+                )
+                link_struct_ref = pdf.make_indirect(link_struct)
+                conversion.page_elements.setdefault(page_num, []).append(link_struct_ref)
+
+                # Add to parent tree (links use scalar StructParent, not array)
+                if struct_parent_val not in conversion.parent_tree:
+                    conversion.parent_tree[struct_parent_val] = link_struct_ref
+
+def stage_structure_tree(conversion):
+    """structure-tree: build StructTreeRoot and its ParentTree from page_elements and parent_tree"""
+    pdf = conversion.pdf
+    parent_tree_by_page = conversion.parent_tree
+    all_struct_elems = [elem for page_num in sorted(conversion.page_elements)
+                        for elem in conversion.page_elements[page_num]]
+    conversion.struct_elements = len(all_struct_elems)
 
     # Build ParentTree Nums array
     parent_tree_nums = []
@@ -727,21 +2046,100 @@ def convert_pdf(input_file, output_file, verbose=False):
         )
         pdf.Root.StructTreeRoot = pdf.make_indirect(struct_tree_root)
 
-    if not pdf.docinfo:
-        pdf.docinfo = Dictionary()
-
-    pdf.docinfo['/Title'] = String(title)
-    pdf.docinfo['/Producer'] = String('PDF/UA Converter')
-
-    if verbose:
-        print(f"Saving to {output_file}")
-    pdf.save(output_file)
-    pdf.close()
-
-    print(f"  Created: {output_file}")
-    if verbose:
-        print(f"  Processed {len(pdf.pages)} pages")
-        print(f"  Created {len(all_struct_elems)} structure elements")
+STAGE_FUNCTIONS = {
+    'metadata': stage_metadata,
+    'font-scan': stage_font_scan,
+    'tounicode': stage_tounicode,
+    'tagging': stage_tagging,
+    'links': stage_links,
+    'structure-tree': stage_structure_tree,
+}
+
+def convert_pdf(input_file, output_file, optimize=True, tag_cache=None, used_glyphs_only=False,
+                previous=None, online=None, compression_level=DEFAULT_COMPRESSION_LEVEL,
+                compress_workers=None, stages=CONVERSION_STAGES):
+    """Convert one PDF to PDF/UA; returns a dict of page, glyph and structure counts
+
+    input_file and output_file are paths or binary file objects (e.g. BytesIO).
+
+    stages selects which of CONVERSION_STAGES run (see select_stages()); the
+    others leave their part of the document as it was, and the optimizer
+    and stream compression only touch the parts written by stages that ran. tag_cache is a
+    TagCache shared across calls, None for a new one per document, or False
+    to tag every page from scratch. With used_glyphs_only, only character
+    codes shown by the content are added to ToUnicode CMaps, and a per-font
+    coverage report is printed and returned in the stats. previous is an
+    earlier output of this converter: pages whose content fingerprint
+    matches one of its pages reuse that page's tagging. online is a
+    UnicodeLookup: missing glyphs are looked up while pages are tagged, and
+    ToUnicode CMaps are patched once the lookups finish or run out of its
+    time budget. New content and ToUnicode streams are compressed at
+    compression_level (zlib, 0-9) on compress_workers threads before saving.
+    """
+    convert_log.debug("Opening %s", input_file)
+    pdf = Pdf.open(input_file)
+    try:
+        conversion = Conversion(pdf, tag_cache, used_glyphs_only, previous, online)
+        for name in stages:
+            start = time.perf_counter()
+            STAGE_FUNCTIONS[name](conversion)
+            convert_log.debug("  Stage %s: %.3fs", name, time.perf_counter() - start)
+
+        # Patch ToUnicode CMaps now that the online lookups have had the tagging time to finish
+        if 'tounicode' in stages:
+            finish_tounicode(conversion)
+
+        stats = {
+            'pages': len(pdf.pages),
+            'stages': list(stages),
+            'glyphs_fixed': conversion.glyphs_fixed,
+            'glyphs_resolved_online': conversion.glyphs_resolved_online,
+            'font_program_bytes': conversion.font_program_bytes,
+            'glyph_coverage': conversion.glyph_coverage,
+            'struct_elements': conversion.struct_elements,
+            'body_font_size': conversion.heading_levels.body_size if conversion.heading_levels else None,
+            'pages_passed_through': conversion.pages_passed_through,
+            'tag_cache_hits': conversion.tag_cache_hits,
+            'tag_time_saved': round(conversion.tag_time_saved, 4),
+            'previous_pages_reused': conversion.previous_reused,
+            'previous_time_saved': round(conversion.previous_time_saved, 4),
+            'bytes_saved': 0,
+        }
+
+        if optimize:
+            convert_log.debug("Optimizing output size")
+            stats['bytes_saved'] = optimize_pdf(pdf, stages)['bytes_saved']
+
+        start = time.perf_counter()
+        compressed, raw_bytes, compressed_bytes = compress_streams(pdf, compression_level, compress_workers,
+                                                                   stages)
+        convert_log.debug("Compressed %d stream(s) at level %d: %d -> %d bytes in %.3fs",
+                          compressed, compression_level, raw_bytes, compressed_bytes,
+                          time.perf_counter() - start)
+
+        if hasattr(output_file, 'write'):
+            convert_log.debug("Saving to memory")
+            pdf.save(output_file)
+        else:
+            convert_log.debug("Saving to %s", output_file)
+            save_atomic(pdf, output_file)
+            convert_log.info("  Created: %s", output_file)
+        convert_log.debug("  Processed %d pages", stats['pages'])
+        structure_log.debug("  Created %d structure elements", stats['struct_elements'])
+        if stats['pages_passed_through']:
+            tagging_log.debug("  Wrapped %d text-free page(s) without rewriting their content",
+                              stats['pages_passed_through'])
+        if stats['tag_cache_hits']:
+            tagging_log.info("  Reused tagging for %d page(s), saving %.2fs",
+                             stats['tag_cache_hits'], stats['tag_time_saved'])
+        if previous and 'tagging' in stages:
+            tagging_log.info("  %d of %d page(s) unchanged since %s, saving %.2fs of tagging",
+                             conversion.previous_reused, stats['pages'], previous,
+                             conversion.previous_time_saved)
+
+        return stats
+    finally:
+        pdf.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
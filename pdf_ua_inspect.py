@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+PDF/UA Inspection Toolkit
+
+Loads a PDF once and prints one or more reports about its fonts, content
+streams, structure tree, ParentTree and link annotations. Replaces the
+one-off debugging scripts that used to live in Utils/.
+
+Reports are streamed line by line and cover the whole document (or the
+pages selected with --pages), so large outputs can be piped to a file or
+a pager without being held in memory.
+"""
+
+import sys
+import argparse
+from collections import OrderedDict
+from pikepdf import Pdf, Dictionary, Name, Array
+
+from pdf_ua_convert import (ContentParser, collect_font_sizes, is_font_embedded, parse_tounicode_codes,
+                            read_page_content)
+from font_stats import heading_levels, HEADING_TAGS
+
+REPORTS = ('fonts', 'content', 'tree', 'parent-tree', 'links')
+
+# Marked content tags counted in the per-page summary of the content report
+MARKED_CONTENT_TAGS = HEADING_TAGS + ('P',)
+
+def parse_page_ranges(spec, page_count):
+    """Parse a page range spec like "1-3,7,10-" into sorted 0-based indexes"""
+    if not spec:
+        return range(page_count)
+
+    selected = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start_str, end_str = part.split('-', 1)
+            start = int(start_str) if start_str else 1
+            end = int(end_str) if end_str else page_count
+        else:
+            start = end = int(part)
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part}")
+        selected.update(range(start - 1, min(end, page_count)))
+
+    return sorted(selected)
+
+class DocumentIndex:
+    """Single load of a PDF with lazily built, shared lookup tables"""
+
+    def __init__(self, pdf_path, pages=None, cache_size=8):
+        self.pdf_path = pdf_path
+        self.pdf = Pdf.open(pdf_path)
+        self.page_indexes = parse_page_ranges(pages, len(self.pdf.pages))
+        self._selected = set(self.page_indexes)
+        self._cache_size = cache_size
+        self._content_cache = OrderedDict()
+        self._page_numbers = None
+        self._parent_tree = None
+        self._heading_levels = None
+
+    def close(self):
+        self.pdf.close()
+
+    def is_selected(self, page_index):
+        """True if the page (0-based) is inside the requested page range"""
+        return page_index in self._selected
+
+    def page_number(self, page_obj):
+        """Return the 0-based index of a page object, or None if unknown"""
+        if self._page_numbers is None:
+            self._page_numbers = {
+                page.obj.objgen: index for index, page in enumerate(self.pdf.pages)
+            }
+        try:
+            return self._page_numbers.get(page_obj.objgen)
+        except AttributeError:
+            return None
+
+    def page_content(self, page_index):
+        """Return decoded content bytes of a page (small LRU cache)"""
+        if page_index in self._content_cache:
+            self._content_cache.move_to_end(page_index)
+            return self._content_cache[page_index]
+
+        page = self.pdf.pages[page_index]
+        content_data = read_page_content(page) if '/Contents' in page else b''
+
+        self._content_cache[page_index] = content_data
+        if len(self._content_cache) > self._cache_size:
+            self._content_cache.popitem(last=False)
+        return content_data
+
+    @property
+    def heading_levels(self):
+        """Font size -> tag table of the whole document, as the converter derives it"""
+        if self._heading_levels is None:
+            self._heading_levels = heading_levels(collect_font_sizes(
+                read_page_content(page) for page in self.pdf.pages if '/Contents' in page
+            ))
+        return self._heading_levels
+
+    @property
+    def struct_tree_root(self):
+        return self.pdf.Root.get('/StructTreeRoot')
+
+    @property
+    def parent_tree(self):
+        """Map of ParentTree key -> value, flattened from the number tree"""
+        if self._parent_tree is None:
+            self._parent_tree = {}
+            root = self.struct_tree_root
+            if root is not None and '/ParentTree' in root:
+                stack = [root.ParentTree]
+                while stack:
+                    node = stack.pop()
+                    if '/Nums' in node:
+                        nums = node.Nums
+                        for i in range(0, len(nums) - 1, 2):
+                            self._parent_tree[int(nums[i])] = nums[i + 1]
+                    if '/Kids' in node:
+                        stack.extend(reversed(list(node.Kids)))
+        return self._parent_tree
+
+    def iter_fonts(self):
+        """Yield (font_obj, resource_names, page_indexes) for each unique font"""
+        fonts = OrderedDict()
+        for page_index in self.page_indexes:
+            page = self.pdf.pages[page_index]
+            if '/Resources' not in page or '/Font' not in page.Resources:
+                continue
+            for font_name, font_obj in page.Resources.Font.items():
+                key = font_obj.objgen if font_obj.is_indirect else (page_index, font_name)
+                if key not in fonts:
+                    fonts[key] = (font_obj, set(), [])
+                fonts[key][1].add(str(font_name))
+                fonts[key][2].append(page_index)
+        yield from fonts.values()
+
+    def iter_struct_elements(self):
+        """Yield (depth, element) for the structure tree in document order"""
+        root = self.struct_tree_root
+        if root is None or '/K' not in root:
+            return
+
+        stack = [(0, root.K)]
+        while stack:
+            depth, node = stack.pop()
+            if isinstance(node, Array):
+                stack.extend((depth, kid) for kid in reversed(list(node)))
+                continue
+            if not isinstance(node, Dictionary) or '/S' not in node:
+                continue
+            yield depth, node
+            if '/K' in node:
+                kids = node.K
+                if isinstance(kids, Array):
+                    stack.extend((depth + 1, kid) for kid in reversed(list(kids)))
+                elif isinstance(kids, Dictionary) and '/S' in kids:
+                    stack.append((depth + 1, kids))
+
+def describe_kids(elem):
+    """Short description of a structure element's /K entry"""
+    if '/K' not in elem:
+        return 'none'
+    kids = elem.K
+    if isinstance(kids, int):
+        return f"MCID {kids}"
+    if isinstance(kids, Dictionary):
+        if kids.get('/Type') == Name.OBJR:
+            return "OBJR (annotation)"
+        if kids.get('/Type') == Name.MCR:
+            return f"MCR {kids.get('/MCID')}"
+        return "1 child"
+    if isinstance(kids, Array):
+        return f"{len(kids)} children"
+    return type(kids).__name__
+
+def element_page(elem):
+    """The page of a structure element: its /Pg, else that of its first OBJR or MCR kid
+
+    An OBJR kid without /Pg falls back to its annotation's /P. Returns None
+    if neither says, e.g. for grouping elements.
+    """
+    page_obj = elem.get('/Pg')
+    if page_obj is not None:
+        return page_obj
+    kids = elem.get('/K')
+    for kid in (kids if isinstance(kids, Array) else [kids]):
+        if not isinstance(kid, Dictionary) or kid.get('/Type') not in (Name.OBJR, Name.MCR):
+            continue
+        page_obj = kid.get('/Pg')
+        if page_obj is None and kid.get('/Type') == Name.OBJR and isinstance(kid.get('/Obj'), Dictionary):
+            page_obj = kid.Obj.get('/P')
+        if page_obj is not None:
+            return page_obj
+    return None
+
+def describe_page(index, page_obj):
+    page_index = index.page_number(page_obj) if page_obj is not None else None
+    return f"page {page_index + 1}" if page_index is not None else "no page"
+
+def report_fonts(index):
+    """Font resources: embedding, ToUnicode coverage and pages used"""
+    yield "=== FONTS ==="
+    non_embedded = 0
+    for font_obj, resource_names, page_indexes in index.iter_fonts():
+        base_font = str(font_obj.get('/BaseFont', 'Unknown'))
+        subtype = str(font_obj.get('/Subtype', 'Unknown'))
+
+        is_embedded = is_font_embedded(font_obj)
+        if not is_embedded:
+            non_embedded += 1
+
+        if '/ToUnicode' in font_obj:
+            tounicode_data = font_obj.ToUnicode.read_bytes().decode('latin-1', errors='ignore')
+            tounicode = f"{len(parse_tounicode_codes(tounicode_data))} mappings"
+        else:
+            tounicode = "MISSING"
+
+        encoding = font_obj.get('/Encoding')
+        if isinstance(encoding, Dictionary):
+            differences = encoding.get('/Differences')
+            encoding_desc = f"dict ({len(differences)} Differences entries)" if differences is not None else "dict"
+        elif encoding is not None:
+            encoding_desc = str(encoding)
+        else:
+            encoding_desc = "built-in"
+
+        yield f"{base_font} [{', '.join(sorted(resource_names))}]"
+        yield f"  Subtype: {subtype}  Embedded: {'yes' if is_embedded else 'NO'}"
+        yield f"  ToUnicode: {tounicode}  Encoding: {encoding_desc}"
+        yield f"  Used on {len(page_indexes)} page(s), first: page {page_indexes[0] + 1}"
+
+    if non_embedded:
+        yield f"[FAIL] {non_embedded} font(s) not embedded"
+    else:
+        yield "[OK] All fonts embedded"
+
+def report_content(index, raw=False):
+    """Text runs per page with font, size and classification"""
+    yield "=== CONTENT ==="
+    if not raw:
+        yield f"Heading levels: {index.heading_levels.summary()}"
+    for page_index in index.page_indexes:
+        content_data = index.page_content(page_index)
+        yield f"--- Page {page_index + 1} ({len(content_data)} bytes) ---"
+
+        if raw:
+            for line in content_data.decode('latin-1', errors='ignore').split('\n'):
+                yield line
+            continue
+
+        for text, font, size in ContentParser().parse(content_data):
+            elem_type = index.heading_levels.tag(size)
+            yield f"  {elem_type:8} \"{text}\" [{font} {size}pt]"
+
+        content_str = content_data.decode('latin-1', errors='ignore')
+        counts = [f"{tag}={content_str.count(f'/{tag} <</MCID')}" for tag in MARKED_CONTENT_TAGS]
+        counts.append(f"Artifact={content_str.count('/Artifact BMC')}")
+        yield f"  Marked content: {' '.join(counts)}"
+
+def report_tree(index):
+    """Structure tree hierarchy and element type totals"""
+    yield "=== STRUCTURE TREE ==="
+    mark_info = index.pdf.Root.get('/MarkInfo')
+    if mark_info is not None and mark_info.get('/Marked'):
+        yield "[OK] Document is marked as tagged"
+    else:
+        yield "[FAIL] Document is NOT marked as tagged"
+
+    if index.struct_tree_root is None:
+        yield "[FAIL] No structure tree found"
+        return
+
+    elem_types = {}
+    depth_pages = []  # Page of the last element seen at each depth, for elements that name none
+    for depth, elem in index.iter_struct_elements():
+        page_obj = element_page(elem)
+        if page_obj is None and depth > 0:
+            page_obj = depth_pages[depth - 1]
+        del depth_pages[depth:]
+        depth_pages.append(page_obj)
+        if page_obj is not None:
+            page_index = index.page_number(page_obj)
+            if page_index is not None and not index.is_selected(page_index):
+                continue
+
+        elem_type = str(elem.S).lstrip('/')
+        elem_types[elem_type] = elem_types.get(elem_type, 0) + 1
+        location = f", {describe_page(index, page_obj)}" if page_obj is not None else ""
+        yield f"{'  ' * depth}{elem_type} (K={describe_kids(elem)}{location})"
+
+    yield "Structure element types:"
+    for elem_type, count in sorted(elem_types.items()):
+        yield f"  {elem_type}: {count}"
+
+def report_parent_tree(index):
+    """ParentTree entries for the selected pages and their annotations"""
+    yield "=== PARENT TREE ==="
+    parent_tree = index.parent_tree
+    yield f"ParentTree entries: {len(parent_tree)}"
+
+    for page_index in index.page_indexes:
+        page = index.pdf.pages[page_index]
+        keys = []
+        if '/StructParents' in page:
+            keys.append(int(page.StructParents))
+        for annot in page.get('/Annots', []):
+            if '/StructParent' in annot:
+                keys.append(int(annot.StructParent))
+        if not keys:
+            continue
+
+        yield f"--- Page {page_index + 1} ---"
+        for key in keys:
+            if key not in parent_tree:
+                yield f"  Key {key}: MISSING from ParentTree"
+                continue
+            value = parent_tree[key]
+            if isinstance(value, Array):
+                yield f"  Key {key}: Array with {len(value)} elements"
+                for mcid, elem in enumerate(value):
+                    if isinstance(elem, Dictionary):
+                        yield f"    MCID {mcid}: {elem.get('/S', 'unknown')}"
+                    else:
+                        yield f"    MCID {mcid}: None"
+            elif isinstance(value, Dictionary):
+                yield f"  Key {key}: Single element ({value.get('/S', 'unknown')})"
+            else:
+                yield f"  Key {key}: {value}"
+
+def report_links(index):
+    """Link annotations and whether they resolve to Link structure elements"""
+    yield "=== LINKS ==="
+    parent_tree = index.parent_tree
+    for page_index in index.page_indexes:
+        page = index.pdf.pages[page_index]
+        for annot_idx, annot in enumerate(page.get('/Annots', [])):
+            if annot.get('/Subtype') != Name.Link:
+                continue
+
+            target = ''
+            action = annot.get('/A')
+            if action is not None and '/URI' in action:
+                target = f" URI={action.URI}"
+            elif '/Dest' in annot or (action is not None and '/D' in action):
+                target = " (internal destination)"
+            yield f"Page {page_index + 1}, annotation {annot_idx}:{target}"
+
+            if '/StructParent' not in annot:
+                yield "  [FAIL] No StructParent"
+                continue
+
+            struct_parent = int(annot.StructParent)
+            struct_elem = parent_tree.get(struct_parent)
+            if not isinstance(struct_elem, Dictionary) or '/S' not in struct_elem:
+                yield f"  [FAIL] StructParent {struct_parent} not in ParentTree"
+                continue
+
+            parent = struct_elem.get('/P')
+            parent_type = parent.get('/S', parent.get('/Type')) if isinstance(parent, Dictionary) else None
+            kids = struct_elem.get('/K')
+            is_objr = isinstance(kids, Dictionary) and kids.get('/Type') == Name.OBJR
+            points_back = is_objr and '/Obj' in kids and kids.Obj.objgen == annot.objgen
+
+            yield f"  StructParent {struct_parent}: {struct_elem.S}, parent {parent_type}"
+            if points_back:
+                yield "  [OK] K is OBJR referencing this annotation"
+            else:
+                yield "  [FAIL] K does not reference this annotation"
+
+REPORT_FUNCTIONS = {
+    'fonts': report_fonts,
+    'content': report_content,
+    'tree': report_tree,
+    'parent-tree': report_parent_tree,
+    'links': report_links,
+}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Inspect fonts, content and structure of a PDF',
+        epilog='Examples:\n'
+               '  %(prog)s file_ua.pdf tree                   # Structure tree\n'
+               '  %(prog)s file_ua.pdf fonts links            # Several reports, one load\n'
+               '  %(prog)s file.pdf content --pages 2-4       # Text runs on pages 2-4\n'
+               '  %(prog)s file.pdf content --raw --pages 2   # Full content stream of page 2',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('input', help='PDF file to inspect')
+    parser.add_argument('reports', nargs='+', choices=REPORTS, metavar='report',
+                       help=f"Report(s) to print: {', '.join(REPORTS)}")
+    parser.add_argument('--pages',
+                       help='Page range to report on, e.g. "1-3,7,10-" (default: all pages)')
+    parser.add_argument('--raw', action='store_true',
+                       help='content report: print the full decoded content stream')
+
+    args = parser.parse_args()
+
+    try:
+        index = DocumentIndex(args.input, pages=args.pages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        for report in args.reports:
+            if report == 'content':
+                lines = report_content(index, raw=args.raw)
+            else:
+                lines = REPORT_FUNCTIONS[report](index)
+            for line in lines:
+                print(line)
+    except BrokenPipeError:
+        # Output piped into head/less that exited early
+        sys.stderr.close()
+    finally:
+        index.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Input and output storage backends
+
+Batch inputs and outputs can be local paths, file:// URIs or s3:// URIs
+(any S3-compatible store: AWS, MinIO, or a moto server for local testing).
+open_storage() returns a backend and the key prefix within it.
+
+Backends list PDFs under a prefix, fetch an object to a local path and
+store a local file under a key. The local backend never copies: fetch
+returns the file itself and store moves the file into place.
+
+Transfers overlaps network I/O with conversion: prefetch() downloads the
+next few inputs in background threads while the current one converts, and
+upload() hands finished outputs to a bounded pool of upload threads.
+
+boto3 is only needed for s3:// URIs:
+
+    pip install boto3
+"""
+
+import os
+import shutil
+from collections import deque
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlparse, unquote
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+STORAGE_SCHEMES = ('file', 's3')
+
+def is_storage_uri(value):
+    return bool(value) and urlparse(str(value)).scheme in STORAGE_SCHEMES
+
+class LocalStorage:
+    """Files on the local filesystem; keys are paths"""
+
+    is_remote = False
+
+    def uri(self, key):
+        return str(key)
+
+    def list_pdfs(self, prefix, recursive=False):
+        """Yield the keys of PDFs under prefix as the directories are read, without listing them up front"""
+        root = Path(prefix)
+        if root.is_file():
+            yield str(root)
+            return
+        if recursive:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith('.pdf'):
+                        yield str(Path(dirpath) / filename)
+        elif root.is_dir():
+            for entry in os.scandir(root):
+                if entry.name.lower().endswith('.pdf') and entry.is_file():
+                    yield entry.path
+
+    def exists(self, key):
+        return Path(key).exists()
+
+    def fetch(self, key, work_dir):
+        return Path(key)
+
+    def store(self, local_path, key):
+        Path(key).parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(local_path), key)
+
+class S3Storage:
+    """Objects in one S3 bucket; keys are object keys"""
+
+    is_remote = True
+
+    def __init__(self, bucket, endpoint_url=None):
+        if boto3 is None:
+            raise RuntimeError("s3:// URIs need boto3: pip install boto3")
+        self.bucket = bucket
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def uri(self, key):
+        return f"s3://{self.bucket}/{key}"
+
+    def list_pdfs(self, prefix, recursive=False):
+        """Yield the keys of PDFs under prefix, in the store's (lexicographic) order"""
+        options = {'Bucket': self.bucket, 'Prefix': prefix}
+        if not recursive:
+            options['Delimiter'] = '/'
+        for page in self.client.get_paginator('list_objects_v2').paginate(**options):
+            for item in page.get('Contents', []):
+                if item['Key'].lower().endswith('.pdf'):
+                    yield item['Key']
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def fetch(self, key, work_dir):
+        local_path = Path(work_dir) / 'in' / key
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        self.client.download_file(self.bucket, key, str(local_path))
+        return local_path
+
+    def store(self, local_path, key):
+        self.client.upload_file(str(local_path), self.bucket, key)
+        Path(local_path).unlink()
+
+def open_storage(value, endpoint_url=None):
+    """Return (backend, key prefix) for a path, file:// URI or s3:// URI"""
+    parsed = urlparse(str(value))
+    if parsed.scheme == 's3':
+        return S3Storage(parsed.netloc, endpoint_url), parsed.path.lstrip('/')
+    if parsed.scheme == 'file':
+        return LocalStorage(), str(Path(unquote(parsed.path)))
+    return LocalStorage(), str(Path(value))
+
+def relative_key(key, prefix):
+    """Key relative to the listing prefix (the object name for a single-object prefix)"""
+    relative = key[len(prefix):].lstrip('/') if key.startswith(prefix) else key
+    return relative or PurePosixPath(key).name
+
+def join_key(prefix, relative):
+    return f"{prefix.rstrip('/')}/{relative}" if prefix else relative
+
+class Transfers:
+    """Background downloads ahead of the conversion loop and uploads behind it"""
+
+    def __init__(self, work_dir, prefetch=2, uploads=2):
+        self.work_dir = Path(work_dir)
+        self.prefetch_depth = max(prefetch, 0)
+        self.max_pending_uploads = max(uploads, 1) * 2
+        self._downloads = ThreadPoolExecutor(max_workers=max(prefetch, 1), thread_name_prefix='download')
+        self._uploads = ThreadPoolExecutor(max_workers=max(uploads, 1), thread_name_prefix='upload')
+        self._pending_uploads = deque()
+        self.upload_errors = []
+
+    def prefetch(self, storage, keys):
+        """Yield (key, local path or exception) in order, fetching up to prefetch keys ahead"""
+        pending = deque()
+        keys = iter(keys)
+
+        def fill():
+            while len(pending) <= self.prefetch_depth:
+                key = next(keys, None)
+                if key is None:
+                    return
+                pending.append((key, self._downloads.submit(storage.fetch, key, self.work_dir)))
+
+        fill()
+        while pending:
+            key, future = pending.popleft()
+            fill()  # Start the next download before waiting on this one
+            try:
+                yield key, future.result()
+            except Exception as e:
+                yield key, e
+
+    def upload(self, storage, local_path, key, on_done=None):
+        """Store local_path under key in the background; on_done(key, error) runs when it finishes"""
+        # Back pressure: never hold more than a few finished outputs on local disk
+        while len(self._pending_uploads) >= self.max_pending_uploads:
+            self._finish_upload(*self._pending_uploads.popleft())
+        future = self._uploads.submit(storage.store, local_path, key)
+        self._pending_uploads.append((key, future, on_done))
+
+    def _finish_upload(self, key, future, on_done):
+        error = future.exception()
+        if error is not None:
+            self.upload_errors.append((key, error))
+        if on_done is not None:
+            on_done(key, error)
+
+    def close(self):
+        """Wait for every upload to finish"""
+        while self._pending_uploads:
+            self._finish_upload(*self._pending_uploads.popleft())
+        self._downloads.shutdown(wait=True, cancel_futures=True)
+        self._uploads.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+"""
+Supervised child processes with time and memory budgets
+
+run_supervised() runs one function call in a child process and waits for
+its result, polling the child's wall time and resident set size. A child
+over either budget is killed and the call raises ConversionTimeout or
+ConversionMemoryExceeded; the parent keeps running, so a batch can move on
+to the next file.
+
+Resident set size is read from /proc on Linux, or with psutil if it is
+installed. Where neither is available, max_rss cannot be enforced and
+memory_limit_supported() returns False.
+
+Children are not forked from the caller, which may be running upload,
+lookup or heartbeat threads: a fork would inherit any lock those hold. They
+start from a fork server (or as fresh interpreters where there is none), so
+the function and its arguments must be picklable, and anything the parent
+set up at run time (logging, open databases) is repeated by an initializer.
+"""
+
+import os
+import time
+import traceback
+import multiprocessing
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class ConversionTimeout(TimeoutError):
+    """The child ran longer than its time budget and was killed"""
+
+class ConversionMemoryExceeded(MemoryError):
+    """The child's resident set size exceeded its budget and it was killed"""
+
+class ChildConversionError(RuntimeError):
+    """The function raised in the child; error_class names the original exception"""
+
+    def __init__(self, error_class, message, child_traceback):
+        super().__init__(message)
+        self.error_class = error_class
+        self.child_traceback = child_traceback
+
+def memory_limit_supported():
+    return psutil is not None or os.path.exists('/proc/self/status')
+
+def process_rss(pid):
+    """Resident set size of pid in bytes, or None if it cannot be read"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            pass
+    return None
+
+def parse_size(value):
+    """Parse a byte size such as 512M, 2G or 1048576"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper().rstrip('B')
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def _child_main(conn, initializer, initargs, func, args, kwargs):
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        result = func(*args, **kwargs)
+        conn.send(('ok', result))
+    except BaseException as e:
+        conn.send(('error', type(e).__name__, str(e), traceback.format_exc()))
+    finally:
+        conn.close()
+
+def _context(module):
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        # Children fork from a server that has already imported func's module
+        # (no effect once the server is running)
+        ctx.set_forkserver_preload(['__main__', module])
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+def run_supervised(func, args=(), kwargs=None, timeout=None, max_rss=None, poll_interval=0.05,
+                   on_kill=None, initializer=None, initargs=()):
+    """Call func(*args, **kwargs) in a child process and return its result
+
+    initializer(*initargs) runs in the child first. on_kill(pid) is called
+    after a child over budget has been killed, so the caller can remove
+    anything the child left half-written. The time budget counts from the
+    child's start, including its startup.
+    """
+    ctx = _context(func.__module__)
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    child = ctx.Process(target=_child_main, args=(child_conn, initializer, initargs, func, args, kwargs or {}),
+                        daemon=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    child.start()
+    child_conn.close()
+
+    try:
+        while True:
+            # Never wait past the deadline, however short the budget
+            wait = poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    _kill(child, on_kill)
+                    raise ConversionTimeout(f"exceeded the {timeout:g}s time limit")
+                wait = min(wait, remaining)
+
+            if parent_conn.poll(wait):
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    break  # Child died without sending a result
+                if message[0] == 'ok':
+                    return message[1]
+                _, error_class, error_message, child_traceback = message
+                raise ChildConversionError(error_class, error_message, child_traceback)
+
+            if not child.is_alive() and not parent_conn.poll(0):
+                break
+
+            if max_rss is not None:
+                rss = process_rss(child.pid)
+                if rss is not None and rss > max_rss:
+                    _kill(child, on_kill)
+                    raise ConversionMemoryExceeded(
+                        f"resident memory {rss // 2**20} MiB exceeded the {max_rss // 2**20} MiB limit"
+                    )
+
+        child.join()
+        raise ChildConversionError('ChildDied', f"child process exited with code {child.exitcode}", None)
+    finally:
+        parent_conn.close()
+        if child.is_alive():
+            _kill(child, on_kill)
+        else:
+            child.join()
+        child.close()
+
+def _kill(child, on_kill):
+    child.kill()
+    child.join()
+    if on_kill is not None:
+        on_kill(child.pid)
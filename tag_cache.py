@@ -0,0 +1,66 @@
+"""
+Content-hash cache of page tagging results
+
+Beamer overlays and handout builds repeat the same content stream on many
+pages. Tagging only depends on the content bytes, so the tagged stream and
+its structure layout (the tag code of each MCID) are cached by the SHA-256
+of the original content and reused for every page with the same content.
+
+A TagCache lives for one document by default; pass the same instance to
+every convert_pdf call to share it across a batch. With --previous, it is
+also seeded from the page fingerprints of an earlier output, so pages that
+did not change since then are not tagged again.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+
+class TagCache:
+    """LRU map of content hash -> (tagged content, structure layout, tagging time)"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    @staticmethod
+    def key(content_data, salt=b''):
+        """Hash of the content, and of salt for anything else the tagging depends on"""
+        digest = hashlib.sha256(salt)
+        digest.update(content_data)
+        return digest.digest()
+
+    def get(self, key):
+        """Return (tagged content, structure layout) or None, counting the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.time_saved += entry[2]
+        return entry[0], entry[1]
+
+    def put(self, key, tagged_content, layout, elapsed):
+        self._entries[key] = (tagged_content, layout, elapsed)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def tag_time(self, key):
+        """Seconds the cached tagging originally took (0 if key is not cached)"""
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else 0.0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (f"Tag cache: {self.hits}/{self.hits + self.misses} pages reused "
+                f"({self.hit_rate:.0%} hit rate), {self.time_saved:.2f}s tagging saved")
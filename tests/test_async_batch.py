@@ -0,0 +1,34 @@
+import threading
+
+from async_batch import run_pipeline
+
+def test_pipeline_converts_every_job_and_pulls_jobs_off_the_loop(tmp_path):
+    feeder_threads = set()
+    caller = threading.current_thread()
+
+    def jobs():
+        for i in range(6):
+            # Producing a job may block on the filesystem: never on the event loop thread
+            feeder_threads.add(threading.current_thread().name)
+            input_file = tmp_path / f"in{i}.pdf"
+            input_file.write_bytes(b'x' * i)
+            yield input_file, tmp_path / f"out{i}.pdf"
+
+    def convert(job, data):
+        if len(data) == 3:
+            raise ValueError('broken input')
+        return data.upper() + b'!', {'bytes': len(data)}
+
+    results = {}
+
+    def done(job, stats, error, elapsed):
+        assert threading.current_thread() is caller
+        results[job[0].name] = error if error is not None else stats
+
+    run_pipeline(jobs(), convert, in_flight=2, on_done=done)
+
+    assert all(name.startswith('pipeline-feed') for name in feeder_threads)
+    assert isinstance(results.pop('in3.pdf'), ValueError)
+    assert results == {f"in{i}.pdf": {'bytes': i} for i in (0, 1, 2, 4, 5)}
+    assert (tmp_path / 'out5.pdf').read_bytes() == b'XXXXX!'
+    assert not (tmp_path / 'out3.pdf').exists()
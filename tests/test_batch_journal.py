@@ -0,0 +1,79 @@
+import sys
+import json
+import logging
+from pathlib import Path
+
+import pytest
+from pikepdf import Pdf
+
+import pdf_ua_convert
+from batch_journal import BatchJournal, DEFAULT_JOURNAL_NAME, journal_key
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(pdf_ua_convert, 'check_for_updates', lambda: False)
+    monkeypatch.setattr(sys, 'argv', ['pdf_ua_convert.py', *argv])
+    try:
+        pdf_ua_convert.main()
+    finally:
+        logging.getLogger('pdf_ua').handlers.clear()
+
+def output_of(output_dir, source):
+    return output_dir / f"{source.stem}_ua.pdf"
+
+@pytest.fixture
+def interrupted(tmp_path):
+    """A batch killed while converting doc0002: doc0000 finished, doc0001 failed, doc0003 not started"""
+    corpus = generate_corpus(tmp_path / 'corpus', count=4, pages=1)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    journal = BatchJournal(output_dir / DEFAULT_JOURNAL_NAME)
+    for event, source in (('started', corpus[0]), ('finished', corpus[0]),
+                          ('started', corpus[1]), ('failed', corpus[1]), ('started', corpus[2])):
+        journal.record(event, source, output_of(output_dir, source))
+    journal.close()
+    output_of(output_dir, corpus[0]).write_bytes(b'finished earlier')
+    output_of(output_dir, corpus[2]).write_bytes(b'%PDF-1.7\n')  # Left behind by the kill
+    # The kill also cut the journal's last line short
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "finished", "inp')
+    return corpus, output_dir, journal
+
+def test_load_keeps_the_last_event_and_ignores_a_cut_line(interrupted):
+    corpus, _, journal = interrupted
+    assert journal.load() == {journal_key(corpus[0]): 'finished', journal_key(corpus[1]): 'failed',
+                              journal_key(corpus[2]): 'started'}
+
+def test_resume_converts_started_and_new_files_only(monkeypatch, interrupted):
+    corpus, output_dir, journal = interrupted
+    run_main(monkeypatch, str(corpus[0].parent), '-d', str(output_dir), '--resume')
+
+    assert output_of(output_dir, corpus[0]).read_bytes() == b'finished earlier'
+    assert not output_of(output_dir, corpus[1]).exists()
+    for source in corpus[2:]:
+        with Pdf.open(output_of(output_dir, source)) as pdf:
+            assert '/StructTreeRoot' in pdf.Root
+    assert journal.load() == {journal_key(corpus[0]): 'finished', journal_key(corpus[1]): 'failed',
+                              journal_key(corpus[2]): 'finished', journal_key(corpus[3]): 'finished'}
+    # The cut line was terminated before the new events were appended
+    lines = journal.path.read_text(encoding='utf-8').splitlines()
+    assert lines[5] == '{"event": "finished", "inp'
+    assert [json.loads(line)['event'] for line in lines[6:]] == ['started', 'finished'] * 2
+
+def test_resume_retries_failed_files_on_request(monkeypatch, interrupted):
+    corpus, output_dir, journal = interrupted
+    run_main(monkeypatch, str(corpus[0].parent), '-d', str(output_dir), '--resume', '--retry-failed')
+
+    assert output_of(output_dir, corpus[1]).exists()
+    assert output_of(output_dir, corpus[0]).read_bytes() == b'finished earlier'
+    assert set(journal.load().values()) == {'finished'}
+
+def test_resume_converts_finished_files_whose_output_is_gone(monkeypatch, interrupted):
+    corpus, output_dir, journal = interrupted
+    output_of(output_dir, corpus[0]).unlink()
+    run_main(monkeypatch, str(corpus[0].parent), '-d', str(output_dir), '--resume')
+
+    with Pdf.open(output_of(output_dir, corpus[0])) as pdf:
+        assert '/StructTreeRoot' in pdf.Root
@@ -0,0 +1,59 @@
+import sys
+import logging
+import threading
+from pathlib import Path
+
+import pdf_ua_convert
+from batch_metrics import BatchMetrics, file_record
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+def textfile_counts(path):
+    counts = {}
+    for line in path.read_text().splitlines():
+        if line.startswith('pdf_ua_files_total{'):
+            status = line.split('"')[1]
+            counts[status] = int(line.rsplit(' ', 1)[1])
+    return counts
+
+def test_counts_from_several_threads(tmp_path):
+    metrics = BatchMetrics(tmp_path / 'report.jsonl', tmp_path / 'metrics.prom')
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def skip():
+            for _ in range(2000):
+                metrics.skipped()
+
+        threads = [threading.Thread(target=skip) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(50):
+            metrics.record(file_record(tmp_path / f'in{i}.pdf', tmp_path / f'out{i}.pdf', 0.5, {'pages': 2}))
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    metrics.close()
+
+    assert metrics.files == {'converted': 50, 'failed': 0, 'skipped': 8000}
+    assert textfile_counts(tmp_path / 'metrics.prom') == metrics.files
+    assert len((tmp_path / 'report.jsonl').read_text().splitlines()) == 50
+
+def test_pipeline_batch_counts_skipped_files(tmp_path, monkeypatch):
+    inputs = generate_corpus(tmp_path / 'corpus', count=3, pages=2)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    (output_dir / f'{inputs[0].stem}_ua.pdf').write_bytes(b'%PDF-1.7\n')
+
+    monkeypatch.setattr(pdf_ua_convert, 'check_for_updates', lambda: False)
+    monkeypatch.setattr(sys, 'argv', ['pdf_ua_convert.py', str(tmp_path / 'corpus'), '-d', str(output_dir),
+                                      '--pipeline', '2', '--no-online-lookup',
+                                      '--metrics-textfile', str(tmp_path / 'metrics.prom')])
+    try:
+        pdf_ua_convert.main()
+    finally:
+        logging.getLogger('pdf_ua').handlers.clear()
+
+    assert textfile_counts(tmp_path / 'metrics.prom') == {'converted': 2, 'failed': 0, 'skipped': 1}
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+from pikepdf import Array, Pdf, Name
+
+from pdf_ua_convert import MIN_COMPRESS_BYTES, convert_pdf, iter_fonts
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+def page_streams(pdf):
+    for page in pdf.pages:
+        contents = page.obj.Contents
+        yield from (contents if isinstance(contents, Array) else [contents])
+
+def test_new_streams_are_flate_compressed_once(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=4)
+    output = tmp_path / 'output.pdf'
+    stats = convert_pdf(str(source), str(output), online=None, compress_workers=2)
+    assert stats['glyphs_fixed']
+
+    with Pdf.open(output) as pdf:
+        tounicode = [font_obj.ToUnicode for _, font_obj in iter_fonts(pdf) if '/ToUnicode' in font_obj]
+        streams = [(stream, b'BDC') for stream in page_streams(pdf)]
+        streams += [(stream, b'begincmap') for stream in tounicode]
+        streams = [(stream, marker) for stream, marker in streams if len(stream.read_bytes()) >= MIN_COMPRESS_BYTES]
+        assert len(streams) > len(pdf.pages)
+        for stream, marker in streams:
+            data = stream.read_bytes()
+            # One /FlateDecode, and decoding it once gives back the operators
+            assert stream.get('/Filter') == Name.FlateDecode
+            assert marker in data
@@ -0,0 +1,29 @@
+import pytest
+
+import text_runs
+from font_stats import FontSizeStats, heading_levels
+from pdf_ua_convert import ContentParser, collect_font_sizes
+
+PAGE = (b'BT\n/F1 18 Tf\n(Introduction) Tj\n'
+        b'/F2 12 Tf\n(Body text of the first paragraph) Tj\n'
+        b'[(More body) -250 (text)] TJ\n'
+        b'/F2 8 Tf\n(12) Tj\nET\n')
+
+def test_size_histogram_without_numpy_matches_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    store = ContentParser().parse(PAGE * 1000)
+    assert len(store) >= text_runs.NUMPY_MIN_RUNS
+    counted = store.size_histogram()
+    monkeypatch.setattr(text_runs, 'np', None)
+    assert store.size_histogram() == counted
+    assert counted['F2', 120] == (2000, 1000 * (len('Body text of the first paragraph')
+                                                 + len('(More body) -250 (text)')))
+
+def test_heading_levels_follow_body_size():
+    stats = collect_font_sizes([PAGE, PAGE])
+    assert len(stats) == 8
+    assert stats.runs_by_size() == {18.0: 2, 12.0: 4, 8.0: 2}
+    levels = heading_levels(stats)
+    assert levels.body_size == 12.0
+    assert [levels.tag(size) for size in (18, 12, 8)] == ['H1', 'P', 'Artifact']
+    assert heading_levels(FontSizeStats()).body_size is None
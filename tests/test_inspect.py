@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+from pikepdf import Pdf
+
+from pdf_ua_convert import convert_pdf
+from pdf_ua_inspect import DocumentIndex, report_tree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+def tree_lines(path, pages):
+    index = DocumentIndex(path, pages)
+    try:
+        return list(report_tree(index))
+    finally:
+        index.close()
+
+def test_page_restricted_tree_keeps_links_to_their_page(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    tagged = tmp_path / 'tagged.pdf'
+    convert_pdf(str(source), str(tagged), online=None)
+    with Pdf.open(tagged) as pdf:
+        links = [sum(annot.get('/Subtype') == '/Link' for annot in page.get('/Annots', []))
+                 for page in pdf.pages]
+    assert any(links) and not all(links)
+
+    for page_number, count in enumerate(links, 1):
+        link_lines = [line for line in tree_lines(tagged, str(page_number)) if line.strip().startswith('Link (')]
+        # Link elements have no /Pg of their own: the page comes from their OBJR kid
+        assert link_lines == [f"  Link (K=OBJR (annotation), page {page_number})"] * count
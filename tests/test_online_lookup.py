@@ -0,0 +1,91 @@
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from online_lookup import UnicodeLookup
+
+COOLDOWN = 0.3
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the lookup service: answers U+XXXX for the queried symbol, or fails while down"""
+
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        if server.down:
+            self.send_response(503)
+            self.end_headers()
+            return
+        symbol = parse_qs(urlparse(self.path).query)['q'][0]
+        body = f"<html><body><p>{symbol} is U+{ord(symbol):04X}</p></body></html>".encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), StandIn)
+    httpd.hits = 0
+    httpd.down = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def lookup(server):
+    lookup = UnicodeLookup(f"http://127.0.0.1:{server.server_port}/search?q={{query}}", timeout=2,
+                           budget=5, workers=1, max_failures=2, cooldown=COOLDOWN)
+    yield lookup
+    lookup.close()
+
+def test_lookups_are_answered_and_remembered(server, lookup):
+    assert lookup.lookup('∀') == '2200'
+    assert lookup.lookup('\U0001D54A') == '1D54A'
+    assert lookup.lookup('∀') == '2200'
+    assert server.hits == 2
+
+def test_concurrent_lookups_resolve_together(server):
+    lookup = UnicodeLookup(f"http://127.0.0.1:{server.server_port}/search?q={{query}}", workers=4)
+    try:
+        symbols = '∀∃∈∉∞'
+        pending = {symbol: lookup.submit(symbol) for symbol in symbols}
+        assert lookup.resolve(pending, time.monotonic() + 5) == {s: f"{ord(s):04X}" for s in symbols}
+    finally:
+        lookup.close()
+
+def test_breaker_opens_half_opens_and_closes(server, lookup):
+    server.down = True
+    assert lookup.lookup('a') is None
+    assert lookup.lookup('b') is None
+    assert lookup.breaker.is_open and server.hits == 2
+
+    # Open: answered locally, nothing is sent
+    assert lookup.submit('c') is None
+    assert server.hits == 2
+
+    # Half-open: after the cooldown one trial goes out; it fails and the circuit stays open
+    time.sleep(COOLDOWN)
+    assert lookup.lookup('a') is None
+    assert server.hits == 3 and lookup.breaker.is_open
+    assert lookup.submit('a') is None
+
+    # The service recovers: the next trial is sent, succeeds and closes the circuit
+    server.down = False
+    time.sleep(COOLDOWN)
+    assert lookup.lookup('a') == '0061'
+    assert server.hits == 4 and not lookup.breaker.is_open
+
+    # Symbols that failed or were skipped while the circuit was open are asked again
+    assert lookup.lookup('b') == '0062'
+    assert lookup.lookup('c') == '0063'
+    assert server.hits == 6
@@ -0,0 +1,40 @@
+import pytest
+
+from pdf_ua_convert import save_atomic, temp_output_path
+
+class FailingPdf:
+    """Writes part of a PDF, then fails like a save interrupted by a full disk or Ctrl-C"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def save(self, path):
+        path.write_bytes(b'%PDF-1.7\n1 0 obj')
+        raise self.error
+
+class SavingPdf:
+    def save(self, path):
+        path.write_bytes(b'%PDF-1.7\n%%EOF\n')
+
+def test_save_replaces_output(tmp_path):
+    output_file = tmp_path / 'out.pdf'
+    output_file.write_bytes(b'older output')
+    save_atomic(SavingPdf(), str(output_file))
+    assert output_file.read_bytes() == b'%PDF-1.7\n%%EOF\n'
+    assert list(tmp_path.iterdir()) == [output_file]
+
+@pytest.mark.parametrize('error', [OSError(28, 'No space left on device'), KeyboardInterrupt()])
+def test_failed_save_leaves_no_temp_file(tmp_path, error):
+    output_file = tmp_path / 'out.pdf'
+    output_file.write_bytes(b'older output')
+    with pytest.raises(type(error)):
+        save_atomic(FailingPdf(error), str(output_file))
+    assert not temp_output_path(output_file).exists()
+    assert list(tmp_path.iterdir()) == [output_file]
+    assert output_file.read_bytes() == b'older output'
+
+def test_failed_save_creates_no_output(tmp_path):
+    output_file = tmp_path / 'out.pdf'
+    with pytest.raises(OSError):
+        save_atomic(FailingPdf(OSError(28, 'No space left on device')), str(output_file))
+    assert list(tmp_path.iterdir()) == []
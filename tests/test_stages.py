@@ -0,0 +1,85 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from pikepdf import Pdf, Stream
+
+from pdf_ua_convert import (PIECE_INFO_KEY, convert_pdf, iter_struct_elements, read_number_tree,
+                            read_page_content, select_stages)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+@pytest.fixture
+def tagged(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    tagged = tmp_path / 'tagged.pdf'
+    convert_pdf(str(source), str(tagged), online=None, optimize=False)
+    return tagged
+
+def test_select_stages():
+    assert select_stages(('tounicode',)) == ('tounicode',)
+    with pytest.raises(ValueError):
+        select_stages(('tagging',))
+    with pytest.raises(ValueError):
+        select_stages(skip=('bogus',))
+
+@pytest.mark.parametrize('stages', [('tounicode',), ('metadata',), ('metadata', 'font-scan', 'tounicode')])
+def test_unselected_stages_leave_structure_and_content_alone(tagged, tmp_path, stages):
+    output = tmp_path / 'output.pdf'
+    convert_pdf(str(tagged), str(output), online=None, stages=stages)
+    with Pdf.open(tagged) as before, Pdf.open(output) as after:
+        langs = [str(elem.get('/Lang')) for elem in iter_struct_elements(after)]
+        assert langs and set(langs) == {'en-US'}
+        assert len(langs) == len(list(iter_struct_elements(before)))
+        for page_before, page_after in zip(before.pages, after.pages):
+            assert read_page_content(page_before) == read_page_content(page_after)
+            assert page_after.obj.Contents.get('/Filter') == page_before.obj.Contents.get('/Filter')
+
+def page_elements(pdf):
+    """[(tag, MCID), ...] of the marked-content structure elements of each page"""
+    pages = {page.objgen: number for number, page in enumerate(pdf.pages)}
+    elements = [[] for _ in pdf.pages]
+    for elem in iter_struct_elements(pdf):
+        if '/Pg' in elem and isinstance(elem.get('/K'), int):
+            elements[pages[elem.Pg.objgen]].append((str(elem.S), int(elem.K)))
+    return [sorted(page) for page in elements]
+
+def fingerprint(page):
+    return str(page.PieceInfo[PIECE_INFO_KEY].Private.Fingerprint)
+
+def test_previous_output_reuses_unchanged_pages(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    first = tmp_path / 'first.pdf'
+    convert_pdf(str(source), str(first), online=None)
+
+    # Next version: the second paragraph of page 2 is set in the section heading font
+    changed = tmp_path / 'changed.pdf'
+    with Pdf.open(source) as pdf:
+        page = pdf.pages[1]
+        content = read_page_content(page)
+        paragraph = content.index(b'/F1 9.963 Tf', content.index(b'/F1 9.963 Tf') + 1)
+        content = content[:paragraph] + content[paragraph:].replace(b'/F1 9.963 Tf', b'/F2 14.346 Tf', 1)
+        page.Contents = pdf.make_indirect(Stream(pdf, content))
+        pdf.save(changed)
+    second = tmp_path / 'second.pdf'
+    stats = convert_pdf(str(changed), str(second), online=None, previous=str(first))
+    assert stats['previous_pages_reused'] == 2
+
+    with Pdf.open(first) as before, Pdf.open(second) as after:
+        elements_before, elements_after = page_elements(before), page_elements(after)
+        for number, (page_before, page_after) in enumerate(zip(before.pages, after.pages)):
+            same = number != 1
+            assert (read_page_content(page_before) == read_page_content(page_after)) == same
+            assert (elements_before[number] == elements_after[number]) == same
+            assert (fingerprint(page_before) == fingerprint(page_after)) == same
+
+        # Every MCID of every page resolves through the ParentTree to its element
+        parent_tree = read_number_tree(after.Root.StructTreeRoot.ParentTree)
+        for page in after.pages:
+            mcids = [int(mcid) for mcid in re.findall(rb'/MCID (\d+)', read_page_content(page))]
+            elements = parent_tree[int(page.StructParents)]
+            assert mcids == list(range(len(elements)))
+            for mcid, elem in enumerate(elements):
+                assert int(elem.K) == mcid and elem.Pg.objgen == page.objgen
@@ -0,0 +1,120 @@
+import sys
+import logging
+from pathlib import Path
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+import pdf_ua_convert
+from storage import LocalStorage, Transfers, open_storage, relative_key, join_key
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'),
+                        ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        client = boto3.client('s3')
+        client.create_bucket(Bucket='lectures')
+        client.create_bucket(Bucket='lectures-ua')
+        yield client
+
+@pytest.fixture
+def corpus(tmp_path):
+    return generate_corpus(tmp_path / 'corpus', count=3, pages=2)
+
+def upload_corpus(client, corpus, prefix='2024/'):
+    for i, path in enumerate(corpus):
+        client.upload_file(str(path), 'lectures', f"{prefix}{'sub/' if i == 2 else ''}{path.name}")
+
+def object_keys(client, bucket):
+    return sorted(item['Key'] for item in client.list_objects_v2(Bucket=bucket).get('Contents', []))
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(pdf_ua_convert, 'check_for_updates', lambda: False)
+    monkeypatch.setattr(sys, 'argv', ['pdf_ua_convert.py', *argv])
+    try:
+        pdf_ua_convert.main()
+    finally:
+        logging.getLogger('pdf_ua').handlers.clear()
+
+def test_open_storage_and_keys(s3):
+    storage, prefix = open_storage('s3://lectures/2024/')
+    assert (storage.bucket, prefix) == ('lectures', '2024/')
+    storage, prefix = open_storage('file:///srv/ua')
+    assert isinstance(storage, LocalStorage) and prefix == '/srv/ua'
+    assert relative_key('2024/sub/a.pdf', '2024/') == 'sub/a.pdf'
+    assert relative_key('2024/a.pdf', '2024/a.pdf') == 'a.pdf'
+    assert join_key('out/', 'a.pdf') == 'out/a.pdf'
+
+def test_s3_listing_fetch_and_store(s3, corpus, tmp_path):
+    upload_corpus(s3, corpus)
+    storage, prefix = open_storage('s3://lectures/2024/')
+    assert list(storage.list_pdfs(prefix)) == ['2024/doc0000.pdf', '2024/doc0001.pdf']
+    assert list(storage.list_pdfs(prefix, recursive=True))[-1] == '2024/sub/doc0002.pdf'
+    assert storage.exists('2024/doc0000.pdf') and not storage.exists('2024/missing.pdf')
+
+    local = storage.fetch('2024/doc0000.pdf', tmp_path / 'work')
+    assert local.read_bytes() == corpus[0].read_bytes()
+    out_storage, _ = open_storage('s3://lectures-ua/')
+    out_storage.store(local, 'copy.pdf')
+    assert not local.exists() and object_keys(s3, 'lectures-ua') == ['copy.pdf']
+
+def test_transfers_prefetch_in_order_and_report_errors(s3, corpus, tmp_path):
+    upload_corpus(s3, corpus)
+    storage, _ = open_storage('s3://lectures/')
+    keys = ['2024/doc0000.pdf', '2024/missing.pdf', '2024/doc0001.pdf']
+    with Transfers(tmp_path / 'work', prefetch=2) as transfers:
+        fetched = list(transfers.prefetch(storage, keys))
+    assert [key for key, _ in fetched] == keys
+    assert isinstance(fetched[1][1], Exception)
+    assert fetched[2][1].read_bytes() == corpus[1].read_bytes()
+
+def test_local_listing_is_lazy(tmp_path, corpus):
+    listing = LocalStorage().list_pdfs(str(corpus[0].parent))
+    assert iter(listing) is listing
+    assert sorted(listing) == sorted(str(path) for path in corpus)
+
+def test_s3_batch_converts_and_uploads(s3, corpus, monkeypatch):
+    upload_corpus(s3, corpus)
+    run_main(monkeypatch, 's3://lectures/2024/', '-d', 's3://lectures-ua/ua/', '-r', '--no-online-lookup')
+    assert object_keys(s3, 'lectures-ua') == ['ua/doc0000_ua.pdf', 'ua/doc0001_ua.pdf', 'ua/sub/doc0002_ua.pdf']
+    body = s3.get_object(Bucket='lectures-ua', Key='ua/doc0000_ua.pdf')['Body'].read()
+    assert body.startswith(b'%PDF') and b'StructTreeRoot' in body
+
+    # Existing outputs are skipped, so running again resumes an interrupted batch
+    s3.delete_object(Bucket='lectures-ua', Key='ua/doc0001_ua.pdf')
+    uploads = []
+    monkeypatch.setattr(Transfers, 'upload', lambda self, storage, path, key, on_done=None: uploads.append(key))
+    run_main(monkeypatch, 's3://lectures/2024/', '-d', 's3://lectures-ua/ua/', '-r', '--no-online-lookup')
+    assert uploads == ['ua/doc0001_ua.pdf']
+
+def test_from_file_to_s3(s3, corpus, tmp_path, monkeypatch):
+    list_file = tmp_path / 'list.txt'
+    list_file.write_text(''.join(f"{path}\n" for path in corpus), encoding='utf-8')
+    run_main(monkeypatch, '--from-file', str(list_file), '-d', 's3://lectures-ua/ua', '--dry-run')
+    assert object_keys(s3, 'lectures-ua') == []
+    run_main(monkeypatch, '--from-file', str(list_file), '-d', 's3://lectures-ua/ua', '--no-online-lookup',
+             '--shard', '0/1')
+    assert object_keys(s3, 'lectures-ua') == ['ua/doc0000_ua.pdf', 'ua/doc0001_ua.pdf', 'ua/doc0002_ua.pdf']
+
+def test_shard_splits_storage_batch(s3, corpus, monkeypatch):
+    upload_corpus(s3, corpus)
+    for shard in ('0/2', '1/2'):
+        run_main(monkeypatch, 's3://lectures/2024/', '-d', 's3://lectures-ua/ua/', '-r', '--no-online-lookup', '--shard', shard)
+        if shard == '0/2':
+            first = object_keys(s3, 'lectures-ua')
+            assert 0 < len(first) <= 3
+    assert len(object_keys(s3, 'lectures-ua')) == 3
+
+@pytest.mark.parametrize('option', [['--resume'], ['--journal', 'j.jsonl'], ['--pipeline', '2'],
+                                    ['--longest-first'], ['--previous', 'ua-2023/']])
+def test_unsupported_batch_options_are_rejected(s3, monkeypatch, option):
+    with pytest.raises(SystemExit) as exit_info:
+        run_main(monkeypatch, 's3://lectures/2024/', '-d', 's3://lectures-ua/ua/', *option)
+    assert exit_info.value.code == 2
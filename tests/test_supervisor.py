@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+from online_lookup import UnicodeLookup
+from pdf_ua_convert import convert_file, temp_output_path
+from supervisor import ConversionMemoryExceeded, ConversionTimeout, run_supervised
+from tag_cache import TagCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+# Held by a parent thread during a run: a forked child would inherit it locked
+PARENT_LOCK = threading.Lock()
+
+def try_parent_lock():
+    return PARENT_LOCK.acquire(timeout=1)
+
+def write_partial(output_file, seconds):
+    temp_output_path(output_file, os.getpid()).write_bytes(b'%PDF-1.7\n')
+    time.sleep(seconds)
+
+def grow(megabytes, seconds):
+    data = bytearray(megabytes * 2**20)
+    for i in range(0, len(data), 4096):
+        data[i] = 1
+    time.sleep(seconds)
+
+def remover(output_file, killed):
+    def remove_temp_output(pid):
+        killed.append(pid)
+        temp_output_path(output_file, pid).unlink()
+    return remove_temp_output
+
+def test_timeout_kills_and_removes_partial_output(tmp_path):
+    output_file = tmp_path / 'out.pdf'
+    killed = []
+    start = time.monotonic()
+    with pytest.raises(ConversionTimeout):
+        run_supervised(write_partial, (output_file, 30), timeout=1, on_kill=remover(output_file, killed))
+    assert time.monotonic() - start < 10
+    assert len(killed) == 1
+    assert list(tmp_path.iterdir()) == []
+
+def test_memory_limit_kills_child():
+    killed = []
+    with pytest.raises(ConversionMemoryExceeded):
+        run_supervised(grow, (512, 30), max_rss=256 * 2**20, timeout=60, on_kill=killed.append)
+    assert len(killed) == 1
+
+def test_timeout_shorter_than_poll_interval(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=2)
+    output_file = tmp_path / 'out.pdf'
+    # Options holding a connection pool and a cache still reach the child
+    options = {'online': UnicodeLookup('http://127.0.0.1:9/{query}', budget=1), 'tag_cache': TagCache()}
+    with pytest.raises(ConversionTimeout):
+        convert_file(source, output_file, options, timeout=0.01)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['corpus']
+    assert convert_file(source, output_file, options, timeout=60)['pages'] == 2
+    assert output_file.is_file()
+
+def test_child_does_not_inherit_parent_thread_locks():
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        with PARENT_LOCK:
+            acquired.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait()
+    try:
+        assert run_supervised(try_parent_lock, timeout=30)
+    finally:
+        release.set()
+        holder.join()
@@ -0,0 +1,70 @@
+import sys
+import shutil
+from pathlib import Path
+
+from pikepdf import Pdf
+
+from pdf_ua_convert import convert_pdf, read_page_content
+from tag_cache import TagCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+from corpus import generate_corpus
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TagCache(max_entries=2)
+    keys = [TagCache.key(content) for content in (b'a', b'b', b'c')]
+    cache.put(keys[0], b'tagged a', [], 0.5)
+    cache.put(keys[1], b'tagged b', [], 0.25)
+    assert cache.get(keys[0]) == (b'tagged a', [])  # a is now more recent than b
+    cache.put(keys[2], b'tagged c', [], 0.125)
+
+    assert cache.get(keys[1]) is None
+    assert cache.tag_time(keys[1]) == 0.0
+    assert cache.get(keys[0]) == (b'tagged a', [])
+    assert cache.get(keys[2]) == (b'tagged c', [])
+    assert (cache.hits, cache.misses, cache.time_saved) == (3, 1, 1.125)
+
+def test_key_depends_on_salt():
+    assert TagCache.key(b'BT ET', b'levels') != TagCache.key(b'BT ET')
+    assert TagCache.key(b'BT ET', b'levels') == TagCache.key(b'BT ET', b'levels')
+
+def test_shared_cache_reuses_identical_streams_across_documents(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    copy = tmp_path / 'copy.pdf'
+    shutil.copy(source, copy)
+
+    cache = TagCache()
+    first = convert_pdf(str(source), str(tmp_path / 'first.pdf'), online=None, tag_cache=cache)
+    second = convert_pdf(str(copy), str(tmp_path / 'second.pdf'), online=None, tag_cache=cache)
+    assert first['tag_cache_hits'] == 0
+    assert second['tag_cache_hits'] == 3
+
+    with Pdf.open(tmp_path / 'first.pdf') as a, Pdf.open(tmp_path / 'second.pdf') as b:
+        for page_a, page_b in zip(a.pages, b.pages):
+            assert read_page_content(page_a) == read_page_content(page_b)
+
+def test_per_document_cache_is_not_shared(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    for name in ('first.pdf', 'second.pdf'):
+        stats = convert_pdf(str(source), str(tmp_path / name), online=None)
+        assert stats['tag_cache_hits'] == 0
+
+def test_used_glyphs_only_counts_codes_on_cached_pages(tmp_path):
+    source, = generate_corpus(tmp_path / 'corpus', count=1, pages=3)
+    copy = tmp_path / 'copy.pdf'
+    shutil.copy(source, copy)
+
+    cache = TagCache()
+    first = convert_pdf(str(source), str(tmp_path / 'first.pdf'), online=None, tag_cache=cache,
+                        used_glyphs_only=True)
+    second = convert_pdf(str(copy), str(tmp_path / 'second.pdf'), online=None, tag_cache=cache,
+                         used_glyphs_only=True)
+    assert second['tag_cache_hits'] == 3
+    assert second['glyph_coverage'] == first['glyph_coverage']
+    assert second['glyphs_fixed'] == first['glyphs_fixed']
+
+    def cmaps(path):
+        with Pdf.open(path) as pdf:
+            return sorted(font.ToUnicode.read_bytes() for page in pdf.pages
+                          for font in page.Resources.Font.values() if '/ToUnicode' in font)
+    assert cmaps(tmp_path / 'second.pdf') == cmaps(tmp_path / 'first.pdf')
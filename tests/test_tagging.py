@@ -0,0 +1,23 @@
+from font_stats import HeadingLevels
+from pdf_ua_convert import ContentParser, tag_content_with_structure
+from text_runs import layout_tags
+
+CONTENT = (b'BT /F1 18 Tf 72 720 Td (Introduction) Tj\n'
+           b'0 -20 Td\n/F2 10 Tf\n[(Body)-333(text)] TJ\n(more) Tj\n'
+           b'/F2 6 Tf 300 40 Td (3) Tj\nET\n')
+
+def test_runs_are_the_text_lines():
+    runs = ContentParser().parse(CONTENT)
+    assert [(text, font, size) for text, font, size in runs] == [
+        ('Introduction', 'F1', 18.0), ('Bodytext', 'F2', 10.0), ('more', 'F2', 10.0), ('3', 'F2', 6.0)]
+
+def test_tagging_follows_the_run_store():
+    levels = HeadingLevels(10.0, (18.0,))
+    runs = ContentParser().parse(CONTENT)
+    tagged, layout = tag_content_with_structure(None, CONTENT, 0, levels, runs)
+    assert (tagged, layout) == tag_content_with_structure(None, CONTENT, 0, levels)
+    assert list(layout_tags(layout)) == [(0, 'H1'), (1, 'P')]
+    assert tagged == (b'/H1 <</MCID 0>> BDC\nBT /F1 18 Tf 72 720 Td (Introduction) Tj\nEMC\n'
+                      b'/P <</MCID 1>> BDC\n0 -20 Td\n/F2 10 Tf\n[(Body)-333(text)] TJ\n(more) Tj\nEMC\n'
+                      b'/Artifact BMC\n/F2 6 Tf 300 40 Td (3) Tj\nEMC\n'
+                      b'/Artifact BMC\nET\n\nEMC\n')
@@ -0,0 +1,69 @@
+import re
+
+from pikepdf import Pdf, Dictionary, Array, Name, Stream
+
+from pdf_ua_convert import fix_font_tounicode, patch_tounicode, resolve_font_encoding, tounicode_hex
+
+TOUNICODE = b"""/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+1 begincodespacerange
+<00> <FF>
+endcodespacerange
+1 beginbfchar
+<61> <0061>
+endbfchar
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end
+"""
+
+def cmap_entries(font_obj):
+    data = font_obj.ToUnicode.read_bytes().decode('latin-1')
+    return {int(code, 16): bytes.fromhex(dest).decode('utf-16-be')
+            for code, dest in re.findall(r'<([0-9A-F]{2})>\s*<([0-9A-F]+)>', data.split('beginbfchar', 1)[1])}
+
+def test_tounicode_hex_uses_surrogate_pairs_beyond_the_bmp():
+    assert tounicode_hex('a') == '0061'
+    assert tounicode_hex('\U0001D54A') == 'D835DD4A'
+
+def test_astral_symbol_round_trips_through_the_cmap():
+    pdf = Pdf.new()
+    # msbm10 draws the double-struck capitals, U+1D538 and up, at their ASCII codes
+    font_obj = pdf.make_indirect(Dictionary(
+        Type=Name.Font, Subtype=Name.Type1, BaseFont=Name('/ABCDEF+MSBM10'),
+        FirstChar=0x53, LastChar=0x53, Widths=Array([722]),
+        ToUnicode=pdf.make_indirect(Stream(pdf, TOUNICODE)),
+    ))
+
+    new_mappings, _, _ = fix_font_tounicode(pdf, font_obj, '/F1')
+    assert new_mappings == {0x53: 'D835DD4A'}
+
+    patch_tounicode(pdf, font_obj, new_mappings)
+    assert cmap_entries(font_obj) == {0x61: 'a', 0x53: '\U0001D54A'}
+
+class RecordingLookup:
+    def __init__(self):
+        self.symbols = []
+
+    def submit(self, symbol):
+        self.symbols.append(symbol)
+        return None
+
+def test_differences_skip_codes_the_font_does_not_draw():
+    pdf = Pdf.new()
+    # Code 0x42 is named in /Differences but has no width: the subset has no such glyph
+    font_obj = pdf.make_indirect(Dictionary(
+        Type=Name.Font, Subtype=Name.Type1, BaseFont=Name('/ABCDEF+CMMI10'),
+        FirstChar=0x41, LastChar=0x43, Widths=Array([640, 0, 520]),
+        Encoding=Dictionary(Type=Name.Encoding, Differences=Array([0x41, Name.alpha, Name.beta, Name.gamma])),
+        ToUnicode=pdf.make_indirect(Stream(pdf, TOUNICODE)),
+    ))
+    assert resolve_font_encoding(font_obj, tex_tables=False) == ({0x41: 'alpha', 0x43: 'gamma'}, 0)
+
+    # --used-glyphs-only: only the code the content shows is repaired and looked up
+    online = RecordingLookup()
+    new_mappings, _, _ = fix_font_tounicode(pdf, font_obj, '/F1', used_codes={0x41, 0x42}, online=online)
+    assert new_mappings == {0x41: tounicode_hex('α')}
+    assert online.symbols == ['α']
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from work_queue import WorkQueue, run_worker
+
+JOBS = 40
+WORKERS = 4
+
+def convert_once(input_file, output_file):
+    # O_EXCL makes a second conversion of the same file fail loudly
+    fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+    os.write(fd, Path(input_file).read_bytes())
+    os.close(fd)
+    time.sleep(0.01)
+    return {'pid': os.getpid()}
+
+def worker(queue_dir, worker_id):
+    queue = WorkQueue(queue_dir, lease=30, worker_id=worker_id)
+    run_worker(queue, convert_once, poll_interval=0.05)
+
+def status_records(queue_dir):
+    records = {}
+    for path in sorted((Path(queue_dir) / 'status').glob('*.jsonl')):
+        records[path.stem] = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    return records
+
+def make_inputs(tmp_path, count):
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'out').mkdir()
+    inputs = []
+    for i in range(count):
+        input_file = tmp_path / 'in' / f"doc{i:03d}.pdf"
+        input_file.write_bytes(b'%PDF-1.4 ' + str(i).encode())
+        inputs.append(input_file)
+    return inputs
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue')
+    input_file, = make_inputs(tmp_path, 1)
+    assert queue.enqueue(input_file, tmp_path / 'out' / 'a.pdf')
+    assert not queue.enqueue(input_file, tmp_path / 'out' / 'a.pdf')
+    assert queue.counts() == {'pending': 1, 'claimed': 0, 'done': 0, 'failed': 0}
+
+def test_concurrent_workers_convert_each_file_once(tmp_path):
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:
+        pytest.skip('needs fork')
+    queue_dir = tmp_path / 'queue'
+    queue = WorkQueue(queue_dir)
+    for input_file in make_inputs(tmp_path, JOBS):
+        queue.enqueue(input_file, tmp_path / 'out' / input_file.name)
+
+    processes = [context.Process(target=worker, args=(str(queue_dir), f"w{i}")) for i in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    assert queue.counts() == {'pending': 0, 'claimed': 0, 'done': JOBS, 'failed': 0}
+    assert len(list((tmp_path / 'out').iterdir())) == JOBS
+
+    # One status log per worker, and every job done exactly once across them
+    records = status_records(queue_dir)
+    assert set(records) <= {f"w{i}" for i in range(WORKERS)}
+    done = [record for worker_records in records.values() for record in worker_records]
+    assert all(record['status'] == 'done' for record in done)
+    assert sorted(Path(record['input']).name for record in done) == sorted(
+        f"doc{i:03d}.pdf" for i in range(JOBS))
+    for worker_id, worker_records in records.items():
+        assert all(record['worker'] == worker_id for record in worker_records)
+        assert len({record['pid'] for record in worker_records}) == 1
+
+def test_requeue_expired_claim_of_dead_worker(tmp_path):
+    queue_dir = tmp_path / 'queue'
+    dead = WorkQueue(queue_dir, lease=5, worker_id='dead')
+    alive = WorkQueue(queue_dir, lease=5, worker_id='alive')
+    input_file, = make_inputs(tmp_path, 1)
+    dead.enqueue(input_file, tmp_path / 'out' / input_file.name)
+
+    job = dead.claim()
+    assert job is not None and alive.claim() is None
+    # Fresh heartbeat: the lease still holds
+    assert alive.requeue_expired() == 0
+
+    # The worker died: its heartbeat goes stale
+    stale = time.time() - 60
+    os.utime(job.claim_path, (stale, stale))
+    assert alive.requeue_expired() == 1
+    assert alive.counts()['pending'] == 1
+
+    expired, = status_records(queue_dir)['alive']
+    assert (expired['status'], expired['owner'], expired['attempts']) == ('expired', 'dead', 1)
+
+    retry = alive.claim()
+    assert retry.id == job.id and retry.attempts == 1
+    assert alive.complete(retry, 'done', {}) == 'done'
+    # The dead worker coming back cannot complete the job a second time
+    assert dead.complete(job, 'done', {}) == 'lease-lost'
+    assert alive.counts() == {'pending': 0, 'claimed': 0, 'done': 1, 'failed': 0}
+
+def test_expired_too_often_fails(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue', lease=5, max_attempts=1, worker_id='w')
+    input_file, = make_inputs(tmp_path, 1)
+    queue.enqueue(input_file, tmp_path / 'out' / input_file.name)
+    job = queue.claim()
+    os.utime(job.claim_path, (0, 0))
+    assert queue.requeue_expired() == 1
+    assert queue.counts()['failed'] == 1
@@ -0,0 +1,806 @@
+"""
+Built-in encodings of the standard TeX fonts, as code -> Unicode
+
+pdfTeX embeds Computer Modern and AMS fonts that keep their built-in
+encoding, often with no /Encoding in the font dictionary, so their glyph
+names are only found by decompressing and parsing the font program. These
+tables give the Unicode value of each slot directly, so ToUnicode gaps in
+those fonts are filled without reading FontFile.
+
+Fonts are matched by BaseFont with the subset prefix (ABCDEF+) and design
+size stripped: CMSY7, CMBSY10 and XYZABC+CMSY10 all use the CMSY table.
+Slots with no Unicode equivalent (extensible pieces such as the radical
+and horizontal brace tips, accent ties) are left out.
+
+Generated from the fonts' AFM files and the amssymb slot declarations.
+"""
+
+import re
+
+# OT1 text fonts (CMR, CMBX, CMSL, CMSS, ...); glyph names from the AFM files
+OT1 = {
+    0x00: 'Γ',  # U+0393 Gamma
+    0x01: 'Δ',  # U+0394 Delta
+    0x02: 'Θ',  # U+0398 Theta
+    0x03: 'Λ',  # U+039B Lambda
+    0x04: 'Ξ',  # U+039E Xi
+    0x05: 'Π',  # U+03A0 Pi
+    0x06: 'Σ',  # U+03A3 Sigma
+    0x07: 'Υ',  # U+03A5 Upsilon
+    0x08: 'Φ',  # U+03A6 Phi
+    0x09: 'Ψ',  # U+03A8 Psi
+    0x0A: 'Ω',  # U+03A9 Omega
+    0x0B: 'ﬀ',  # U+FB00 ff
+    0x0C: 'ﬁ',  # U+FB01 fi
+    0x0D: 'ﬂ',  # U+FB02 fl
+    0x0E: 'ﬃ',  # U+FB03 ffi
+    0x0F: 'ﬄ',  # U+FB04 ffl
+    0x10: 'ı',  # U+0131 dotlessi
+    0x11: 'ȷ',  # U+0237 dotlessj
+    0x12: '`',  # U+0060 grave
+    0x13: '´',  # U+00B4 acute
+    0x14: 'ˇ',  # U+02C7 caron
+    0x15: '˘',  # U+02D8 breve
+    0x16: '¯',  # U+00AF macron
+    0x17: '˚',  # U+02DA ring
+    0x18: '¸',  # U+00B8 cedilla
+    0x19: 'ß',  # U+00DF germandbls
+    0x1A: 'æ',  # U+00E6 ae
+    0x1B: 'œ',  # U+0153 oe
+    0x1C: 'ø',  # U+00F8 oslash
+    0x1D: 'Æ',  # U+00C6 AE
+    0x1E: 'Œ',  # U+0152 OE
+    0x1F: 'Ø',  # U+00D8 Oslash
+    0x21: '!',  # U+0021 exclam
+    0x22: '”',  # U+201D quotedblright
+    0x23: '#',  # U+0023 numbersign
+    0x24: '$',  # U+0024 dollar
+    0x25: '%',  # U+0025 percent
+    0x26: '&',  # U+0026 ampersand
+    0x27: '’',  # U+2019 quoteright
+    0x28: '(',  # U+0028 parenleft
+    0x29: ')',  # U+0029 parenright
+    0x2A: '*',  # U+002A asterisk
+    0x2B: '+',  # U+002B plus
+    0x2C: ',',  # U+002C comma
+    0x2D: '-',  # U+002D hyphen
+    0x2E: '.',  # U+002E period
+    0x2F: '/',  # U+002F slash
+    0x30: '0',  # U+0030 zero
+    0x31: '1',  # U+0031 one
+    0x32: '2',  # U+0032 two
+    0x33: '3',  # U+0033 three
+    0x34: '4',  # U+0034 four
+    0x35: '5',  # U+0035 five
+    0x36: '6',  # U+0036 six
+    0x37: '7',  # U+0037 seven
+    0x38: '8',  # U+0038 eight
+    0x39: '9',  # U+0039 nine
+    0x3A: ':',  # U+003A colon
+    0x3B: ';',  # U+003B semicolon
+    0x3C: '¡',  # U+00A1 exclamdown
+    0x3D: '=',  # U+003D equal
+    0x3E: '¿',  # U+00BF questiondown
+    0x3F: '?',  # U+003F question
+    0x40: '@',  # U+0040 at
+    0x41: 'A',  # U+0041 A
+    0x42: 'B',  # U+0042 B
+    0x43: 'C',  # U+0043 C
+    0x44: 'D',  # U+0044 D
+    0x45: 'E',  # U+0045 E
+    0x46: 'F',  # U+0046 F
+    0x47: 'G',  # U+0047 G
+    0x48: 'H',  # U+0048 H
+    0x49: 'I',  # U+0049 I
+    0x4A: 'J',  # U+004A J
+    0x4B: 'K',  # U+004B K
+    0x4C: 'L',  # U+004C L
+    0x4D: 'M',  # U+004D M
+    0x4E: 'N',  # U+004E N
+    0x4F: 'O',  # U+004F O
+    0x50: 'P',  # U+0050 P
+    0x51: 'Q',  # U+0051 Q
+    0x52: 'R',  # U+0052 R
+    0x53: 'S',  # U+0053 S
+    0x54: 'T',  # U+0054 T
+    0x55: 'U',  # U+0055 U
+    0x56: 'V',  # U+0056 V
+    0x57: 'W',  # U+0057 W
+    0x58: 'X',  # U+0058 X
+    0x59: 'Y',  # U+0059 Y
+    0x5A: 'Z',  # U+005A Z
+    0x5B: '[',  # U+005B bracketleft
+    0x5C: '“',  # U+201C quotedblleft
+    0x5D: ']',  # U+005D bracketright
+    0x5E: 'ˆ',  # U+02C6 circumflex
+    0x5F: '˙',  # U+02D9 dotaccent
+    0x60: '‘',  # U+2018 quoteleft
+    0x61: 'a',  # U+0061 a
+    0x62: 'b',  # U+0062 b
+    0x63: 'c',  # U+0063 c
+    0x64: 'd',  # U+0064 d
+    0x65: 'e',  # U+0065 e
+    0x66: 'f',  # U+0066 f
+    0x67: 'g',  # U+0067 g
+    0x68: 'h',  # U+0068 h
+    0x69: 'i',  # U+0069 i
+    0x6A: 'j',  # U+006A j
+    0x6B: 'k',  # U+006B k
+    0x6C: 'l',  # U+006C l
+    0x6D: 'm',  # U+006D m
+    0x6E: 'n',  # U+006E n
+    0x6F: 'o',  # U+006F o
+    0x70: 'p',  # U+0070 p
+    0x71: 'q',  # U+0071 q
+    0x72: 'r',  # U+0072 r
+    0x73: 's',  # U+0073 s
+    0x74: 't',  # U+0074 t
+    0x75: 'u',  # U+0075 u
+    0x76: 'v',  # U+0076 v
+    0x77: 'w',  # U+0077 w
+    0x78: 'x',  # U+0078 x
+    0x79: 'y',  # U+0079 y
+    0x7A: 'z',  # U+007A z
+    0x7B: '–',  # U+2013 endash
+    0x7C: '—',  # U+2014 emdash
+    0x7D: '˝',  # U+02DD hungarumlaut
+    0x7E: '˜',  # U+02DC tilde
+    0x7F: '¨',  # U+00A8 dieresis
+}
+
+# CMMI math italic (OML); glyph names from cmmi10.afm
+CMMI = {
+    0x00: 'Γ',  # U+0393 Gamma
+    0x01: 'Δ',  # U+0394 Delta
+    0x02: 'Θ',  # U+0398 Theta
+    0x03: 'Λ',  # U+039B Lambda
+    0x04: 'Ξ',  # U+039E Xi
+    0x05: 'Π',  # U+03A0 Pi
+    0x06: 'Σ',  # U+03A3 Sigma
+    0x07: 'Υ',  # U+03A5 Upsilon
+    0x08: 'Φ',  # U+03A6 Phi
+    0x09: 'Ψ',  # U+03A8 Psi
+    0x0A: 'Ω',  # U+03A9 Omega
+    0x0B: 'α',  # U+03B1 alpha
+    0x0C: 'β',  # U+03B2 beta
+    0x0D: 'γ',  # U+03B3 gamma
+    0x0E: 'δ',  # U+03B4 delta
+    0x0F: 'ϵ',  # U+03F5 epsilon1
+    0x10: 'ζ',  # U+03B6 zeta
+    0x11: 'η',  # U+03B7 eta
+    0x12: 'θ',  # U+03B8 theta
+    0x13: 'ι',  # U+03B9 iota
+    0x14: 'κ',  # U+03BA kappa
+    0x15: 'λ',  # U+03BB lambda
+    0x16: 'μ',  # U+03BC mu
+    0x17: 'ν',  # U+03BD nu
+    0x18: 'ξ',  # U+03BE xi
+    0x19: 'π',  # U+03C0 pi
+    0x1A: 'ρ',  # U+03C1 rho
+    0x1B: 'σ',  # U+03C3 sigma
+    0x1C: 'τ',  # U+03C4 tau
+    0x1D: 'υ',  # U+03C5 upsilon
+    0x1E: 'ϕ',  # U+03D5 phi
+    0x1F: 'χ',  # U+03C7 chi
+    0x20: 'ψ',  # U+03C8 psi
+    0x21: 'ω',  # U+03C9 omega
+    0x22: 'ε',  # U+03B5 epsilon
+    0x23: 'ϑ',  # U+03D1 theta1
+    0x24: 'ϖ',  # U+03D6 pi1
+    0x25: 'ϱ',  # U+03F1 rho1
+    0x26: 'ς',  # U+03C2 sigma1
+    0x27: 'φ',  # U+03C6 phi1
+    0x28: '↼',  # U+21BC arrowlefttophalf
+    0x29: '↽',  # U+21BD arrowleftbothalf
+    0x2A: '⇀',  # U+21C0 arrowrighttophalf
+    0x2B: '⇁',  # U+21C1 arrowrightbothalf
+    0x2E: '▷',  # U+25B7 triangleright
+    0x2F: '◁',  # U+25C1 triangleleft
+    0x30: '0',  # U+0030 zerooldstyle
+    0x31: '1',  # U+0031 oneoldstyle
+    0x32: '2',  # U+0032 twooldstyle
+    0x33: '3',  # U+0033 threeoldstyle
+    0x34: '4',  # U+0034 fouroldstyle
+    0x35: '5',  # U+0035 fiveoldstyle
+    0x36: '6',  # U+0036 sixoldstyle
+    0x37: '7',  # U+0037 sevenoldstyle
+    0x38: '8',  # U+0038 eightoldstyle
+    0x39: '9',  # U+0039 nineoldstyle
+    0x3A: '.',  # U+002E period
+    0x3B: ',',  # U+002C comma
+    0x3C: '<',  # U+003C less
+    0x3D: '/',  # U+002F slash
+    0x3E: '>',  # U+003E greater
+    0x3F: '⋆',  # U+22C6 star
+    0x40: '∂',  # U+2202 partialdiff
+    0x41: 'A',  # U+0041 A
+    0x42: 'B',  # U+0042 B
+    0x43: 'C',  # U+0043 C
+    0x44: 'D',  # U+0044 D
+    0x45: 'E',  # U+0045 E
+    0x46: 'F',  # U+0046 F
+    0x47: 'G',  # U+0047 G
+    0x48: 'H',  # U+0048 H
+    0x49: 'I',  # U+0049 I
+    0x4A: 'J',  # U+004A J
+    0x4B: 'K',  # U+004B K
+    0x4C: 'L',  # U+004C L
+    0x4D: 'M',  # U+004D M
+    0x4E: 'N',  # U+004E N
+    0x4F: 'O',  # U+004F O
+    0x50: 'P',  # U+0050 P
+    0x51: 'Q',  # U+0051 Q
+    0x52: 'R',  # U+0052 R
+    0x53: 'S',  # U+0053 S
+    0x54: 'T',  # U+0054 T
+    0x55: 'U',  # U+0055 U
+    0x56: 'V',  # U+0056 V
+    0x57: 'W',  # U+0057 W
+    0x58: 'X',  # U+0058 X
+    0x59: 'Y',  # U+0059 Y
+    0x5A: 'Z',  # U+005A Z
+    0x5B: '♭',  # U+266D flat
+    0x5C: '♮',  # U+266E natural
+    0x5D: '♯',  # U+266F sharp
+    0x5E: '⌣',  # U+2323 slurbelow
+    0x5F: '⌢',  # U+2322 slurabove
+    0x60: 'ℓ',  # U+2113 lscript
+    0x61: 'a',  # U+0061 a
+    0x62: 'b',  # U+0062 b
+    0x63: 'c',  # U+0063 c
+    0x64: 'd',  # U+0064 d
+    0x65: 'e',  # U+0065 e
+    0x66: 'f',  # U+0066 f
+    0x67: 'g',  # U+0067 g
+    0x68: 'h',  # U+0068 h
+    0x69: 'i',  # U+0069 i
+    0x6A: 'j',  # U+006A j
+    0x6B: 'k',  # U+006B k
+    0x6C: 'l',  # U+006C l
+    0x6D: 'm',  # U+006D m
+    0x6E: 'n',  # U+006E n
+    0x6F: 'o',  # U+006F o
+    0x70: 'p',  # U+0070 p
+    0x71: 'q',  # U+0071 q
+    0x72: 'r',  # U+0072 r
+    0x73: 's',  # U+0073 s
+    0x74: 't',  # U+0074 t
+    0x75: 'u',  # U+0075 u
+    0x76: 'v',  # U+0076 v
+    0x77: 'w',  # U+0077 w
+    0x78: 'x',  # U+0078 x
+    0x79: 'y',  # U+0079 y
+    0x7A: 'z',  # U+007A z
+    0x7B: 'ı',  # U+0131 dotlessi
+    0x7C: 'ȷ',  # U+0237 dotlessj
+    0x7D: '℘',  # U+2118 weierstrass
+    0x7E: '\u20d7',  # U+20D7 vector
+}
+
+# CMSY math symbols (OMS); glyph names from cmsy10.afm, 0x41-0x5A are \mathcal capitals
+CMSY = {
+    0x00: '−',  # U+2212 minus
+    0x01: '⋅',  # U+22C5 periodcentered
+    0x02: '×',  # U+00D7 multiply
+    0x03: '∗',  # U+2217 asteriskmath
+    0x04: '÷',  # U+00F7 divide
+    0x05: '⋄',  # U+22C4 diamondmath
+    0x06: '±',  # U+00B1 plusminus
+    0x07: '∓',  # U+2213 minusplus
+    0x08: '⊕',  # U+2295 circleplus
+    0x09: '⊖',  # U+2296 circleminus
+    0x0A: '⊗',  # U+2297 circlemultiply
+    0x0B: '⊘',  # U+2298 circledivide
+    0x0C: '⊙',  # U+2299 circledot
+    0x0D: '○',  # U+25CB circlecopyrt
+    0x0E: '∘',  # U+2218 openbullet
+    0x0F: '∙',  # U+2219 bullet
+    0x10: '≍',  # U+224D equivasymptotic
+    0x11: '≡',  # U+2261 equivalence
+    0x12: '⊆',  # U+2286 reflexsubset
+    0x13: '⊇',  # U+2287 reflexsuperset
+    0x14: '≤',  # U+2264 lessequal
+    0x15: '≥',  # U+2265 greaterequal
+    0x16: '⪯',  # U+2AAF precedesequal
+    0x17: '⪰',  # U+2AB0 followsequal
+    0x18: '∼',  # U+223C similar
+    0x19: '≈',  # U+2248 approxequal
+    0x1A: '⊂',  # U+2282 propersubset
+    0x1B: '⊃',  # U+2283 propersuperset
+    0x1C: '≪',  # U+226A lessmuch
+    0x1D: '≫',  # U+226B greatermuch
+    0x1E: '≺',  # U+227A precedes
+    0x1F: '≻',  # U+227B follows
+    0x20: '←',  # U+2190 arrowleft
+    0x21: '→',  # U+2192 arrowright
+    0x22: '↑',  # U+2191 arrowup
+    0x23: '↓',  # U+2193 arrowdown
+    0x24: '↔',  # U+2194 arrowboth
+    0x25: '↗',  # U+2197 arrownortheast
+    0x26: '↘',  # U+2198 arrowsoutheast
+    0x27: '≃',  # U+2243 similarequal
+    0x28: '⇐',  # U+21D0 arrowdblleft
+    0x29: '⇒',  # U+21D2 arrowdblright
+    0x2A: '⇑',  # U+21D1 arrowdblup
+    0x2B: '⇓',  # U+21D3 arrowdbldown
+    0x2C: '⇔',  # U+21D4 arrowdblboth
+    0x2D: '↖',  # U+2196 arrownorthwest
+    0x2E: '↙',  # U+2199 arrowsouthwest
+    0x2F: '∝',  # U+221D proportional
+    0x30: '′',  # U+2032 prime
+    0x31: '∞',  # U+221E infinity
+    0x32: '∈',  # U+2208 element
+    0x33: '∋',  # U+220B owner
+    0x34: '△',  # U+25B3 triangle
+    0x35: '▽',  # U+25BD triangleinv
+    0x36: '\u0338',  # U+0338 negationslash
+    0x37: '↦',  # U+21A6 mapsto
+    0x38: '∀',  # U+2200 universal
+    0x39: '∃',  # U+2203 existential
+    0x3A: '¬',  # U+00AC logicalnot
+    0x3B: '∅',  # U+2205 emptyset
+    0x3C: 'ℜ',  # U+211C Rfractur
+    0x3D: 'ℑ',  # U+2111 Ifractur
+    0x3E: '⊤',  # U+22A4 latticetop
+    0x3F: '⊥',  # U+22A5 perpendicular
+    0x40: 'ℵ',  # U+2135 aleph
+    0x41: '𝒜',  # U+1D49C A
+    0x42: 'ℬ',  # U+212C B
+    0x43: '𝒞',  # U+1D49E C
+    0x44: '𝒟',  # U+1D49F D
+    0x45: 'ℰ',  # U+2130 E
+    0x46: 'ℱ',  # U+2131 F
+    0x47: '𝒢',  # U+1D4A2 G
+    0x48: 'ℋ',  # U+210B H
+    0x49: 'ℐ',  # U+2110 I
+    0x4A: '𝒥',  # U+1D4A5 J
+    0x4B: '𝒦',  # U+1D4A6 K
+    0x4C: 'ℒ',  # U+2112 L
+    0x4D: 'ℳ',  # U+2133 M
+    0x4E: '𝒩',  # U+1D4A9 N
+    0x4F: '𝒪',  # U+1D4AA O
+    0x50: '𝒫',  # U+1D4AB P
+    0x51: '𝒬',  # U+1D4AC Q
+    0x52: 'ℛ',  # U+211B R
+    0x53: '𝒮',  # U+1D4AE S
+    0x54: '𝒯',  # U+1D4AF T
+    0x55: '𝒰',  # U+1D4B0 U
+    0x56: '𝒱',  # U+1D4B1 V
+    0x57: '𝒲',  # U+1D4B2 W
+    0x58: '𝒳',  # U+1D4B3 X
+    0x59: '𝒴',  # U+1D4B4 Y
+    0x5A: '𝒵',  # U+1D4B5 Z
+    0x5B: '∪',  # U+222A union
+    0x5C: '∩',  # U+2229 intersection
+    0x5D: '⊎',  # U+228E unionmulti
+    0x5E: '∧',  # U+2227 logicaland
+    0x5F: '∨',  # U+2228 logicalor
+    0x60: '⊢',  # U+22A2 turnstileleft
+    0x61: '⊣',  # U+22A3 turnstileright
+    0x62: '⌊',  # U+230A floorleft
+    0x63: '⌋',  # U+230B floorright
+    0x64: '⌈',  # U+2308 ceilingleft
+    0x65: '⌉',  # U+2309 ceilingright
+    0x66: '{',  # U+007B braceleft
+    0x67: '}',  # U+007D braceright
+    0x68: '⟨',  # U+27E8 angbracketleft
+    0x69: '⟩',  # U+27E9 angbracketright
+    0x6A: '|',  # U+007C bar
+    0x6B: '‖',  # U+2016 bardbl
+    0x6C: '↕',  # U+2195 arrowbothv
+    0x6D: '⇕',  # U+21D5 arrowdblbothv
+    0x6E: '\\',  # U+005C backslash
+    0x6F: '≀',  # U+2240 wreathproduct
+    0x70: '√',  # U+221A radical
+    0x71: '⨿',  # U+2A3F coproduct
+    0x72: '∇',  # U+2207 nabla
+    0x73: '∫',  # U+222B integral
+    0x74: '⊔',  # U+2294 unionsq
+    0x75: '⊓',  # U+2293 intersectionsq
+    0x76: '⊑',  # U+2291 subsetsqequal
+    0x77: '⊒',  # U+2292 supersetsqequal
+    0x78: '§',  # U+00A7 section
+    0x79: '†',  # U+2020 dagger
+    0x7A: '‡',  # U+2021 daggerdbl
+    0x7B: '¶',  # U+00B6 paragraph
+    0x7C: '♣',  # U+2663 club
+    0x7D: '♢',  # U+2662 diamond
+    0x7E: '♡',  # U+2661 heart
+    0x7F: '♠',  # U+2660 spade
+}
+
+# CMEX math extension; glyph names from cmex10.afm
+CMEX = {
+    0x00: '(',  # U+0028 parenleftbig
+    0x01: ')',  # U+0029 parenrightbig
+    0x02: '[',  # U+005B bracketleftbig
+    0x03: ']',  # U+005D bracketrightbig
+    0x04: '⌊',  # U+230A floorleftbig
+    0x05: '⌋',  # U+230B floorrightbig
+    0x06: '⌈',  # U+2308 ceilingleftbig
+    0x07: '⌉',  # U+2309 ceilingrightbig
+    0x08: '{',  # U+007B braceleftbig
+    0x09: '}',  # U+007D bracerightbig
+    0x0A: '⟨',  # U+27E8 angbracketleftbig
+    0x0B: '⟩',  # U+27E9 angbracketrightbig
+    0x0C: '|',  # U+007C vextendsingle
+    0x0D: '∥',  # U+2225 vextenddouble
+    0x0E: '/',  # U+002F slashbig
+    0x0F: '\\',  # U+005C backslashbig
+    0x10: '(',  # U+0028 parenleftBig
+    0x11: ')',  # U+0029 parenrightBig
+    0x12: '(',  # U+0028 parenleftbigg
+    0x13: ')',  # U+0029 parenrightbigg
+    0x14: '[',  # U+005B bracketleftbigg
+    0x15: ']',  # U+005D bracketrightbigg
+    0x16: '⌊',  # U+230A floorleftbigg
+    0x17: '⌋',  # U+230B floorrightbigg
+    0x18: '⌈',  # U+2308 ceilingleftbigg
+    0x19: '⌉',  # U+2309 ceilingrightbigg
+    0x1A: '{',  # U+007B braceleftbigg
+    0x1B: '}',  # U+007D bracerightbigg
+    0x1C: '⟨',  # U+27E8 angbracketleftbigg
+    0x1D: '⟩',  # U+27E9 angbracketrightbigg
+    0x1E: '/',  # U+002F slashbigg
+    0x1F: '\\',  # U+005C backslashbigg
+    0x20: '(',  # U+0028 parenleftBigg
+    0x21: ')',  # U+0029 parenrightBigg
+    0x22: '[',  # U+005B bracketleftBigg
+    0x23: ']',  # U+005D bracketrightBigg
+    0x24: '⌊',  # U+230A floorleftBigg
+    0x25: '⌋',  # U+230B floorrightBigg
+    0x26: '⌈',  # U+2308 ceilingleftBigg
+    0x27: '⌉',  # U+2309 ceilingrightBigg
+    0x28: '{',  # U+007B braceleftBigg
+    0x29: '}',  # U+007D bracerightBigg
+    0x2A: '⟨',  # U+27E8 angbracketleftBigg
+    0x2B: '⟩',  # U+27E9 angbracketrightBigg
+    0x2C: '/',  # U+002F slashBigg
+    0x2D: '\\',  # U+005C backslashBigg
+    0x2E: '/',  # U+002F slashBig
+    0x2F: '\\',  # U+005C backslashBig
+    0x30: '⎛',  # U+239B parenlefttp
+    0x31: '⎞',  # U+239E parenrighttp
+    0x32: '⎡',  # U+23A1 bracketlefttp
+    0x33: '⎤',  # U+23A4 bracketrighttp
+    0x34: '⎣',  # U+23A3 bracketleftbt
+    0x35: '⎦',  # U+23A6 bracketrightbt
+    0x36: '⎢',  # U+23A2 bracketleftex
+    0x37: '⎥',  # U+23A5 bracketrightex
+    0x38: '⎧',  # U+23A7 bracelefttp
+    0x39: '⎫',  # U+23AB bracerighttp
+    0x3A: '⎩',  # U+23A9 braceleftbt
+    0x3B: '⎭',  # U+23AD bracerightbt
+    0x3C: '⎨',  # U+23A8 braceleftmid
+    0x3D: '⎬',  # U+23AC bracerightmid
+    0x3E: '⎪',  # U+23AA braceex
+    0x3F: '⏐',  # U+23D0 arrowvertex
+    0x40: '⎝',  # U+239D parenleftbt
+    0x41: '⎠',  # U+23A0 parenrightbt
+    0x42: '⎜',  # U+239C parenleftex
+    0x43: '⎟',  # U+239F parenrightex
+    0x44: '⟨',  # U+27E8 angbracketleftBig
+    0x45: '⟩',  # U+27E9 angbracketrightBig
+    0x46: '⊔',  # U+2294 unionsqtext
+    0x47: '⨆',  # U+2A06 unionsqdisplay
+    0x48: '∮',  # U+222E contintegraltext
+    0x49: '∮',  # U+222E contintegraldisplay
+    0x4A: '⊙',  # U+2299 circledottext
+    0x4B: '⨀',  # U+2A00 circledotdisplay
+    0x4C: '⊕',  # U+2295 circleplustext
+    0x4D: '⨁',  # U+2A01 circleplusdisplay
+    0x4E: '⊗',  # U+2297 circlemultiplytext
+    0x4F: '⨂',  # U+2A02 circlemultiplydisplay
+    0x50: '∑',  # U+2211 summationtext
+    0x51: '∏',  # U+220F producttext
+    0x52: '∫',  # U+222B integraltext
+    0x53: '⋃',  # U+22C3 uniontext
+    0x54: '⋂',  # U+22C2 intersectiontext
+    0x55: '⨄',  # U+2A04 unionmultitext
+    0x56: '⋀',  # U+22C0 logicalandtext
+    0x57: '⋁',  # U+22C1 logicalortext
+    0x58: '∑',  # U+2211 summationdisplay
+    0x59: '∏',  # U+220F productdisplay
+    0x5A: '∫',  # U+222B integraldisplay
+    0x5B: '⋃',  # U+22C3 uniondisplay
+    0x5C: '⋂',  # U+22C2 intersectiondisplay
+    0x5D: '⨄',  # U+2A04 unionmultidisplay
+    0x5E: '⋀',  # U+22C0 logicalanddisplay
+    0x5F: '⋁',  # U+22C1 logicalordisplay
+    0x60: '∐',  # U+2210 coproducttext
+    0x61: '∐',  # U+2210 coproductdisplay
+    0x62: '\u0302',  # U+0302 hatwide
+    0x63: '\u0302',  # U+0302 hatwider
+    0x64: '\u0302',  # U+0302 hatwidest
+    0x65: '\u0303',  # U+0303 tildewide
+    0x66: '\u0303',  # U+0303 tildewider
+    0x67: '\u0303',  # U+0303 tildewidest
+    0x68: '[',  # U+005B bracketleftBig
+    0x69: ']',  # U+005D bracketrightBig
+    0x6A: '⌊',  # U+230A floorleftBig
+    0x6B: '⌋',  # U+230B floorrightBig
+    0x6C: '⌈',  # U+2308 ceilingleftBig
+    0x6D: '⌉',  # U+2309 ceilingrightBig
+    0x6E: '{',  # U+007B braceleftBig
+    0x6F: '}',  # U+007D bracerightBig
+    0x70: '√',  # U+221A radicalbig
+    0x71: '√',  # U+221A radicalBig
+    0x72: '√',  # U+221A radicalbigg
+    0x73: '√',  # U+221A radicalBigg
+    0x74: '⎷',  # U+23B7 radicalbt
+    0x77: '‖',  # U+2016 arrowvertexdbl
+    0x78: '↑',  # U+2191 arrowtp
+    0x79: '↓',  # U+2193 arrowbt
+    0x7E: '⇑',  # U+21D1 arrowdbltp
+    0x7F: '⇓',  # U+21D3 arrowdblbt
+}
+
+# MSAM AMS symbols (amssymb command names)
+MSAM = {
+    0x00: '⊡',  # U+22A1 \boxdot
+    0x01: '⊞',  # U+229E \boxplus
+    0x02: '⊠',  # U+22A0 \boxtimes
+    0x03: '□',  # U+25A1 \square
+    0x04: '■',  # U+25A0 \blacksquare
+    0x05: '⋅',  # U+22C5 \centerdot
+    0x06: '◊',  # U+25CA \lozenge
+    0x07: '⧫',  # U+29EB \blacklozenge
+    0x08: '↻',  # U+21BB \circlearrowright
+    0x09: '↺',  # U+21BA \circlearrowleft
+    0x0A: '⇌',  # U+21CC \rightleftharpoons
+    0x0B: '⇋',  # U+21CB \leftrightharpoons
+    0x0C: '⊟',  # U+229F \boxminus
+    0x0D: '⊩',  # U+22A9 \Vdash
+    0x0E: '⊪',  # U+22AA \Vvdash
+    0x0F: '⊨',  # U+22A8 \vDash
+    0x10: '↠',  # U+21A0 \twoheadrightarrow
+    0x11: '↞',  # U+219E \twoheadleftarrow
+    0x12: '⇇',  # U+21C7 \leftleftarrows
+    0x13: '⇉',  # U+21C9 \rightrightarrows
+    0x14: '⇈',  # U+21C8 \upuparrows
+    0x15: '⇊',  # U+21CA \downdownarrows
+    0x16: '↾',  # U+21BE \upharpoonright
+    0x17: '⇂',  # U+21C2 \downharpoonright
+    0x18: '↿',  # U+21BF \upharpoonleft
+    0x19: '⇃',  # U+21C3 \downharpoonleft
+    0x1A: '↣',  # U+21A3 \rightarrowtail
+    0x1B: '↢',  # U+21A2 \leftarrowtail
+    0x1C: '⇆',  # U+21C6 \leftrightarrows
+    0x1D: '⇄',  # U+21C4 \rightleftarrows
+    0x1E: '↰',  # U+21B0 \Lsh
+    0x1F: '↱',  # U+21B1 \Rsh
+    0x20: '⇝',  # U+21DD \rightsquigarrow
+    0x21: '↭',  # U+21AD \leftrightsquigarrow
+    0x22: '↫',  # U+21AB \looparrowleft
+    0x23: '↬',  # U+21AC \looparrowright
+    0x24: '≗',  # U+2257 \circeq
+    0x25: '≿',  # U+227F \succsim
+    0x26: '≳',  # U+2273 \gtrsim
+    0x27: '⪆',  # U+2A86 \gtrapprox
+    0x28: '⊸',  # U+22B8 \multimap
+    0x29: '∴',  # U+2234 \therefore
+    0x2A: '∵',  # U+2235 \because
+    0x2B: '≑',  # U+2251 \doteqdot
+    0x2C: '≜',  # U+225C \triangleq
+    0x2D: '≾',  # U+227E \precsim
+    0x2E: '≲',  # U+2272 \lesssim
+    0x2F: '⪅',  # U+2A85 \lessapprox
+    0x30: '⪕',  # U+2A95 \eqslantless
+    0x31: '⪖',  # U+2A96 \eqslantgtr
+    0x32: '⋞',  # U+22DE \curlyeqprec
+    0x33: '⋟',  # U+22DF \curlyeqsucc
+    0x34: '≼',  # U+227C \preccurlyeq
+    0x35: '≦',  # U+2266 \leqq
+    0x36: '⩽',  # U+2A7D \leqslant
+    0x37: '≶',  # U+2276 \lessgtr
+    0x38: '‵',  # U+2035 \backprime
+    0x3A: '≓',  # U+2253 \risingdotseq
+    0x3B: '≒',  # U+2252 \fallingdotseq
+    0x3C: '≽',  # U+227D \succcurlyeq
+    0x3D: '≧',  # U+2267 \geqq
+    0x3E: '⩾',  # U+2A7E \geqslant
+    0x3F: '≷',  # U+2277 \gtrless
+    0x40: '⊏',  # U+228F \sqsubset
+    0x41: '⊐',  # U+2290 \sqsupset
+    0x42: '⊳',  # U+22B3 \vartriangleright
+    0x43: '⊲',  # U+22B2 \vartriangleleft
+    0x44: '⊵',  # U+22B5 \trianglerighteq
+    0x45: '⊴',  # U+22B4 \trianglelefteq
+    0x46: '★',  # U+2605 \bigstar
+    0x47: '≬',  # U+226C \between
+    0x48: '▼',  # U+25BC \blacktriangledown
+    0x49: '▶',  # U+25B6 \blacktriangleright
+    0x4A: '◀',  # U+25C0 \blacktriangleleft
+    0x4D: '△',  # U+25B3 \vartriangle
+    0x4E: '▲',  # U+25B2 \blacktriangle
+    0x4F: '▽',  # U+25BD \triangledown
+    0x50: '≖',  # U+2256 \eqcirc
+    0x51: '⋚',  # U+22DA \lesseqgtr
+    0x52: '⋛',  # U+22DB \gtreqless
+    0x53: '⪋',  # U+2A8B \lesseqqgtr
+    0x54: '⪌',  # U+2A8C \gtreqqless
+    0x55: '¥',  # U+00A5 \yen
+    0x56: '⇛',  # U+21DB \Rrightarrow
+    0x57: '⇚',  # U+21DA \Lleftarrow
+    0x58: '✓',  # U+2713 \checkmark
+    0x59: '⊻',  # U+22BB \veebar
+    0x5A: '⊼',  # U+22BC \barwedge
+    0x5B: '⩞',  # U+2A5E \doublebarwedge
+    0x5C: '∠',  # U+2220 \angle
+    0x5D: '∡',  # U+2221 \measuredangle
+    0x5E: '∢',  # U+2222 \sphericalangle
+    0x5F: '∝',  # U+221D \varpropto
+    0x60: '⌣',  # U+2323 \smallsmile
+    0x61: '⌢',  # U+2322 \smallfrown
+    0x62: '⋐',  # U+22D0 \Subset
+    0x63: '⋑',  # U+22D1 \Supset
+    0x64: '⋓',  # U+22D3 \Cup
+    0x65: '⋒',  # U+22D2 \Cap
+    0x66: '⋏',  # U+22CF \curlywedge
+    0x67: '⋎',  # U+22CE \curlyvee
+    0x68: '⋋',  # U+22CB \leftthreetimes
+    0x69: '⋌',  # U+22CC \rightthreetimes
+    0x6A: '⫅',  # U+2AC5 \subseteqq
+    0x6B: '⫆',  # U+2AC6 \supseteqq
+    0x6C: '≏',  # U+224F \bumpeq
+    0x6D: '≎',  # U+224E \Bumpeq
+    0x6E: '⋘',  # U+22D8 \lll
+    0x6F: '⋙',  # U+22D9 \ggg
+    0x70: '⌜',  # U+231C \ulcorner
+    0x71: '⌝',  # U+231D \urcorner
+    0x72: '®',  # U+00AE \circledR
+    0x73: 'Ⓢ',  # U+24C8 \circledS
+    0x74: '⋔',  # U+22D4 \pitchfork
+    0x75: '∔',  # U+2214 \dotplus
+    0x76: '∽',  # U+223D \backsim
+    0x77: '⋍',  # U+22CD \backsimeq
+    0x78: '⌞',  # U+231E \llcorner
+    0x79: '⌟',  # U+231F \lrcorner
+    0x7A: '✠',  # U+2720 \maltese
+    0x7B: '∁',  # U+2201 \complement
+    0x7C: '⊺',  # U+22BA \intercal
+    0x7D: '⊚',  # U+229A \circledcirc
+    0x7E: '⊛',  # U+229B \circledast
+    0x7F: '⊝',  # U+229D \circleddash
+}
+
+# MSBM AMS symbols and \mathbb capitals (amssymb command names)
+MSBM = {
+    0x00: '≨',  # U+2268 \lvertneqq
+    0x01: '≩',  # U+2269 \gvertneqq
+    0x02: '≰',  # U+2270 \nleq
+    0x03: '≱',  # U+2271 \ngeq
+    0x04: '≮',  # U+226E \nless
+    0x05: '≯',  # U+226F \ngtr
+    0x06: '⊀',  # U+2280 \nprec
+    0x07: '⊁',  # U+2281 \nsucc
+    0x08: '≨',  # U+2268 \lneqq
+    0x09: '≩',  # U+2269 \gneqq
+    0x0C: '⪇',  # U+2A87 \lneq
+    0x0D: '⪈',  # U+2A88 \gneq
+    0x0E: '⋠',  # U+22E0 \npreceq
+    0x0F: '⋡',  # U+22E1 \nsucceq
+    0x10: '⋨',  # U+22E8 \precnsim
+    0x11: '⋩',  # U+22E9 \succnsim
+    0x12: '⋦',  # U+22E6 \lnsim
+    0x13: '⋧',  # U+22E7 \gnsim
+    0x16: '⪵',  # U+2AB5 \precneqq
+    0x17: '⪶',  # U+2AB6 \succneqq
+    0x18: '⪹',  # U+2AB9 \precnapprox
+    0x19: '⪺',  # U+2ABA \succnapprox
+    0x1A: '⪉',  # U+2A89 \lnapprox
+    0x1B: '⪊',  # U+2A8A \gnapprox
+    0x1C: '≁',  # U+2241 \nsim
+    0x1D: '≇',  # U+2247 \ncong
+    0x1E: '╱',  # U+2571 \diagup
+    0x1F: '╲',  # U+2572 \diagdown
+    0x20: '⊊',  # U+228A \varsubsetneq
+    0x21: '⊋',  # U+228B \varsupsetneq
+    0x24: '⫋',  # U+2ACB \subsetneqq
+    0x25: '⫌',  # U+2ACC \supsetneqq
+    0x26: '⫋',  # U+2ACB \varsubsetneqq
+    0x27: '⫌',  # U+2ACC \varsupsetneqq
+    0x28: '⊊',  # U+228A \subsetneq
+    0x29: '⊋',  # U+228B \supsetneq
+    0x2A: '⊈',  # U+2288 \nsubseteq
+    0x2B: '⊉',  # U+2289 \nsupseteq
+    0x2C: '∦',  # U+2226 \nparallel
+    0x2D: '∤',  # U+2224 \nmid
+    0x2E: '∤',  # U+2224 \nshortmid
+    0x2F: '∦',  # U+2226 \nshortparallel
+    0x30: '⊬',  # U+22AC \nvdash
+    0x31: '⊮',  # U+22AE \nVdash
+    0x32: '⊭',  # U+22AD \nvDash
+    0x33: '⊯',  # U+22AF \nVDash
+    0x34: '⋭',  # U+22ED \ntrianglerighteq
+    0x35: '⋬',  # U+22EC \ntrianglelefteq
+    0x36: '⋪',  # U+22EA \ntriangleleft
+    0x37: '⋫',  # U+22EB \ntriangleright
+    0x38: '↚',  # U+219A \nleftarrow
+    0x39: '↛',  # U+219B \nrightarrow
+    0x3A: '⇍',  # U+21CD \nLeftarrow
+    0x3B: '⇏',  # U+21CF \nRightarrow
+    0x3C: '⇎',  # U+21CE \nLeftrightarrow
+    0x3D: '↮',  # U+21AE \nleftrightarrow
+    0x3E: '⋇',  # U+22C7 \divideontimes
+    0x3F: '∅',  # U+2205 \varnothing
+    0x40: '∄',  # U+2204 \nexists
+    0x41: '𝔸',  # U+1D538 \mathbb{A}
+    0x42: '𝔹',  # U+1D539 \mathbb{B}
+    0x43: 'ℂ',  # U+2102 \mathbb{C}
+    0x44: '𝔻',  # U+1D53B \mathbb{D}
+    0x45: '𝔼',  # U+1D53C \mathbb{E}
+    0x46: '𝔽',  # U+1D53D \mathbb{F}
+    0x47: '𝔾',  # U+1D53E \mathbb{G}
+    0x48: 'ℍ',  # U+210D \mathbb{H}
+    0x49: '𝕀',  # U+1D540 \mathbb{I}
+    0x4A: '𝕁',  # U+1D541 \mathbb{J}
+    0x4B: '𝕂',  # U+1D542 \mathbb{K}
+    0x4C: '𝕃',  # U+1D543 \mathbb{L}
+    0x4D: '𝕄',  # U+1D544 \mathbb{M}
+    0x4E: 'ℕ',  # U+2115 \mathbb{N}
+    0x4F: '𝕆',  # U+1D546 \mathbb{O}
+    0x50: 'ℙ',  # U+2119 \mathbb{P}
+    0x51: 'ℚ',  # U+211A \mathbb{Q}
+    0x52: 'ℝ',  # U+211D \mathbb{R}
+    0x53: '𝕊',  # U+1D54A \mathbb{S}
+    0x54: '𝕋',  # U+1D54B \mathbb{T}
+    0x55: '𝕌',  # U+1D54C \mathbb{U}
+    0x56: '𝕍',  # U+1D54D \mathbb{V}
+    0x57: '𝕎',  # U+1D54E \mathbb{W}
+    0x58: '𝕏',  # U+1D54F \mathbb{X}
+    0x59: '𝕐',  # U+1D550 \mathbb{Y}
+    0x5A: 'ℤ',  # U+2124 \mathbb{Z}
+    0x60: 'Ⅎ',  # U+2132 \Finv
+    0x61: '⅁',  # U+2141 \Game
+    0x67: 'ð',  # U+00F0 \eth
+    0x68: '≂',  # U+2242 \eqsim
+    0x69: 'ℶ',  # U+2136 \beth
+    0x6A: 'ℷ',  # U+2137 \gimel
+    0x6B: 'ℸ',  # U+2138 \daleth
+    0x6C: '⋖',  # U+22D6 \lessdot
+    0x6D: '⋗',  # U+22D7 \gtrdot
+    0x6E: '⋉',  # U+22C9 \ltimes
+    0x6F: '⋊',  # U+22CA \rtimes
+    0x70: '∣',  # U+2223 \shortmid
+    0x71: '∥',  # U+2225 \shortparallel
+    0x72: '∖',  # U+2216 \smallsetminus
+    0x73: '∼',  # U+223C \thicksim
+    0x74: '≈',  # U+2248 \thickapprox
+    0x75: '≊',  # U+224A \approxeq
+    0x76: '⪸',  # U+2AB8 \succapprox
+    0x77: '⪷',  # U+2AB7 \precapprox
+    0x78: '↶',  # U+21B6 \curvearrowleft
+    0x79: '↷',  # U+21B7 \curvearrowright
+    0x7A: 'ϝ',  # U+03DD \digamma
+    0x7B: 'ϰ',  # U+03F0 \varkappa
+    0x7C: '𝕜',  # U+1D55C \Bbbk
+    0x7D: 'ℏ',  # U+210F \hslash
+    0x7E: 'ℏ',  # U+210F \hbar
+    0x7F: '϶',  # U+03F6 \backepsilon
+}
+
+
+# \textit fonts replace the dollar sign with the pound sign
+OT1_ITALIC = {**OT1, 0x24: '£'}
+
+# Font family (BaseFont without subset prefix and design size) -> table
+TEX_FONT_FAMILIES = {
+    'CMR': OT1, 'CMBX': OT1, 'CMB': OT1, 'CMSL': OT1, 'CMBXSL': OT1, 'CMSS': OT1, 'CMSSBX': OT1,
+    'CMSSDC': OT1, 'CMSSI': OT1, 'CMSSQ': OT1, 'CMSSQI': OT1, 'CMDUNH': OT1, 'CMFIB': OT1,
+    'CMTI': OT1_ITALIC, 'CMBXTI': OT1_ITALIC, 'CMU': OT1_ITALIC,
+    'CMMI': CMMI, 'CMMIB': CMMI,
+    'CMSY': CMSY, 'CMBSY': CMSY,
+    'CMEX': CMEX,
+    'MSAM': MSAM,
+    'MSBM': MSBM,
+}
+
+FONT_NAME_PATTERN = re.compile(r'(?:[A-Z]{6}\+)?([A-Z]+)(\d+)')
+
+def tex_font_table(base_font):
+    """Return the code -> Unicode table for a BaseFont name (e.g. /ABCDEF+CMSY10), or None"""
+    match = FONT_NAME_PATTERN.fullmatch(str(base_font).lstrip('/'))
+    if match is None:
+        return None
+    return TEX_FONT_FAMILIES.get(match.group(1))
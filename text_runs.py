@@ -0,0 +1,128 @@
+"""
+Compact text-run storage
+
+A content stream can hold hundreds of thousands of text runs. Instead of a
+dict per run (text copy, font name, size), TextRunStore keeps parallel
+arrays of offsets into the content buffer, interned font ids and sizes, and
+only decodes a run's text when it is asked for. Tagging places marked
+content by the run offsets, without splitting the content into lines.
+
+size_histogram() sums the text length of the runs per (font, size); the
+document-wide font statistics (font_stats.py) are built from it page by
+page. With NumPy installed, large stores are counted over zero-copy views
+of the arrays.
+
+Structure layouts (the structure type of every MCID on a page) are stored
+the same way: MCIDs are numbered 0..n-1, so a layout is an array of tag
+codes indexed by MCID.
+"""
+
+import re
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Tag codes used in structure layouts (append only: codes are stored in tag caches)
+STRUCT_TAGS = ('H1', 'H2', 'H3', 'P', 'H4', 'H5', 'H6')
+STRUCT_TAG_CODES = {tag: code for code, tag in enumerate(STRUCT_TAGS)}
+
+# Run kinds
+SHOW_STRING = 0  # (text) Tj: offsets span the string
+SHOW_ARRAY = 1   # [(text) kern (text)] TJ: offsets span the array
+
+TJ_STRING_PATTERN = re.compile(r'\(([^)]+)\)')
+
+# Font sizes are binned to 1/SIZE_SCALE pt
+SIZE_SCALE = 10
+
+# Below this many runs, counting in Python beats setting up NumPy arrays
+NUMPY_MIN_RUNS = 2048
+
+def new_layout():
+    """Empty structure layout: append STRUCT_TAG_CODES values in MCID order"""
+    return array('B')
+
+def layout_tags(layout):
+    """Yield (mcid, tag name) for a structure layout"""
+    for mcid, code in enumerate(layout):
+        yield mcid, STRUCT_TAGS[code]
+
+class TextRunStore:
+    """Text runs of one content stream as parallel arrays pointing into the buffer"""
+
+    __slots__ = ('content', 'fonts', '_font_ids', 'starts', 'ends', 'kinds', 'font_ids', 'sizes')
+
+    def __init__(self, content):
+        self.content = content
+        self.fonts = []        # Interned font resource names, indexed by font id
+        self._font_ids = {}
+        self.starts = array('I')
+        self.ends = array('I')
+        self.kinds = array('B')
+        self.font_ids = array('H')
+        self.sizes = array('d')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def font_id(self, font_name):
+        font_id = self._font_ids.get(font_name)
+        if font_id is None:
+            font_id = self._font_ids[font_name] = len(self.fonts)
+            self.fonts.append(font_name)
+        return font_id
+
+    def append(self, start, end, kind, font_id, size):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.kinds.append(kind)
+        self.font_ids.append(font_id)
+        self.sizes.append(size)
+
+    def text(self, i):
+        """Decode the text of run i from the content buffer"""
+        raw = self.content[self.starts[i]:self.ends[i]].decode('latin-1', errors='ignore')
+        if self.kinds[i] == SHOW_ARRAY:
+            return ''.join(TJ_STRING_PATTERN.findall(raw))
+        return raw
+
+    def font(self, i):
+        return self.fonts[self.font_ids[i]]
+
+    def size(self, i):
+        return self.sizes[i]
+
+    def length(self, i):
+        """Length of run i in the content buffer, the weight of its font size in statistics"""
+        return self.ends[i] - self.starts[i]
+
+    def size_histogram(self):
+        """Return {(font name, size bin): (runs, text length)}, sizes binned to 1/SIZE_SCALE pt"""
+        if np is not None and len(self) >= NUMPY_MIN_RUNS:
+            size_bins = np.rint(np.frombuffer(self.sizes, dtype=np.float64) * SIZE_SCALE).astype(np.int64)
+            lengths = (np.frombuffer(self.ends, dtype=np.uint32).astype(np.int64)
+                       - np.frombuffer(self.starts, dtype=np.uint32))
+            font_ids = np.frombuffer(self.font_ids, dtype=np.uint16).astype(np.int64)
+            pairs, inverse = np.unique((font_ids << 32) | size_bins, return_inverse=True)
+            runs = np.bincount(inverse).tolist()
+            weights = np.bincount(inverse, weights=lengths).astype(np.int64).tolist()
+            return {(self.fonts[pair >> 32], pair & 0xFFFFFFFF): (count, weight)
+                    for pair, count, weight in zip(pairs.tolist(), runs, weights)}
+
+        runs = Counter()
+        weights = Counter()
+        for font_id, size, start, end in zip(self.font_ids, self.sizes, self.starts, self.ends):
+            key = (font_id, round(size * SIZE_SCALE))
+            runs[key] += 1
+            weights[key] += end - start
+        return {(self.fonts[font_id], size_bin): (count, weights[font_id, size_bin])
+                for (font_id, size_bin), count in runs.items()}
+
+    def __iter__(self):
+        """Yield (text, font, size) for every run"""
+        for i in range(len(self)):
+            yield self.text(i), self.font(i), self.sizes[i]
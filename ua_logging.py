@@ -0,0 +1,169 @@
+"""
+Logging setup for the converter
+
+Messages go through per-subsystem loggers under "pdf_ua":
+
+    pdf_ua.convert    opening, metadata, optimizing and saving a document
+    pdf_ua.fonts      embedding checks, ToUnicode repair, online lookups
+    pdf_ua.tagging    content stream tagging and the tag cache
+    pdf_ua.structure  structure tree, parent tree and link annotations
+    pdf_ua.batch      batch, queue and analyze progress
+
+Messages use lazy %-style arguments, so detail that no handler wants is
+never formatted. setup_logging() picks the output format (plain or one JSON
+object per line), which subsystems log debug detail, and optionally a ring
+buffer that holds the debug trace of the current file and only writes it
+out when that file fails (see file_trace()).
+"""
+
+import sys
+import json
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+ROOT_LOGGER = 'pdf_ua'
+SUBSYSTEMS = ('convert', 'fonts', 'tagging', 'structure', 'batch')
+
+_current_file = None
+_ring_handler = None
+_output_handler = None
+_settings = None
+
+def get_logger(subsystem):
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+class FileContextFilter(logging.Filter):
+    """Attach the file being converted to every record"""
+
+    def filter(self, record):
+        record.file = _current_file
+        return True
+
+class SubsystemFilter(logging.Filter):
+    """Pass INFO and above, and debug records only from the given subsystems"""
+
+    def __init__(self, debug_subsystems):
+        super().__init__()
+        self.debug_loggers = {f'{ROOT_LOGGER}.{name}' for name in debug_subsystems}
+
+    def filter(self, record):
+        return record.levelno >= logging.INFO or record.name in self.debug_loggers
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'file': getattr(record, 'file', None),
+            'message': record.getMessage().strip(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class RingBufferHandler(logging.Handler):
+    """Keep the most recent records in memory until dump() or clear()"""
+
+    def __init__(self, capacity):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        # Capture the file now; formatting the message is left to dump()
+        record.file = _current_file
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+    def dump(self, target):
+        """Write the buffered records through target, whatever its level and filters"""
+        header = logging.LogRecord(ROOT_LOGGER, logging.ERROR, __file__, 0,
+                                   "---- Trace for %s (last %d records) ----",
+                                   (_current_file, len(self.records)), None)
+        header.file = _current_file
+        header.created = time.time()
+        for record in [header, *self.records]:
+            target.handle_unfiltered(record)
+        self.clear()
+
+class OutputHandler(logging.StreamHandler):
+    """StreamHandler that can also write records bypassing its level and filters"""
+
+    def handle_unfiltered(self, record):
+        self.acquire()
+        try:
+            self.emit(record)
+        finally:
+            self.release()
+
+def setup_logging(verbose=False, json_format=False, debug_subsystems=(), trace_failures=0, log_file=None,
+                  to_stderr=False):
+    """Configure the pdf_ua loggers for a command line run
+
+    verbose logs debug detail from every subsystem, debug_subsystems only from
+    those named. trace_failures keeps the last N debug records of each file
+    and writes them out only if the file fails. Records go to log_file, else
+    to stdout, or to stderr with to_stderr (when stdout carries the results).
+    """
+    global _ring_handler, _output_handler, _settings
+
+    _settings = dict(verbose=verbose, json_format=json_format, debug_subsystems=tuple(debug_subsystems),
+                     trace_failures=trace_failures, log_file=log_file, to_stderr=to_stderr)
+    if verbose:
+        debug_subsystems = SUBSYSTEMS
+
+    # A closed pipe (e.g. "| head") should not print a logging traceback per record
+    logging.raiseExceptions = False
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = False
+
+    if log_file:
+        stream = open(log_file, 'a', encoding='utf-8')
+    else:
+        stream = sys.stderr if to_stderr else sys.stdout
+    _output_handler = OutputHandler(stream)
+    _output_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter('%(message)s'))
+    _output_handler.addFilter(FileContextFilter())
+    _output_handler.addFilter(SubsystemFilter(debug_subsystems))
+    root.addHandler(_output_handler)
+
+    _ring_handler = None
+    if trace_failures and not verbose:
+        _ring_handler = RingBufferHandler(trace_failures)
+        root.addHandler(_ring_handler)
+
+    # Leave the loggers at INFO unless some handler wants debug records, so
+    # debug calls on hot paths return before building a record
+    root.setLevel(logging.DEBUG if debug_subsystems or _ring_handler else logging.INFO)
+
+def logging_settings():
+    """Arguments of the last setup_logging call (None before it), for a child process to repeat"""
+    return _settings
+
+@contextmanager
+def file_trace(input_file):
+    """Label records with input_file; with a ring buffer, dump its trace if the block raises"""
+    global _current_file
+    _current_file = str(input_file)
+    if _ring_handler is not None:
+        _ring_handler.clear()
+    try:
+        yield
+    except BaseException:
+        if _ring_handler is not None and _output_handler is not None:
+            get_logger('batch').debug("Conversion of %s failed", _current_file, exc_info=True)
+            _ring_handler.dump(_output_handler)
+        raise
+    finally:
+        if _ring_handler is not None:
+            _ring_handler.clear()
+        _current_file = None
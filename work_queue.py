@@ -0,0 +1,229 @@
+"""
+Shared-filesystem work queue for distributing batch conversions
+
+Any number of converter processes, on any number of hosts, can work on the
+same queue directory (e.g. on NFS). Files move between state directories
+with atomic renames, so exactly one worker claims each job:
+
+    QUEUE/pending/<id>.json            waiting to be converted
+    QUEUE/claimed/<id>.json.<worker>   being converted (mtime = lease heartbeat)
+    QUEUE/done/<id>.json               converted successfully
+    QUEUE/failed/<id>.json             conversion raised, or lease expired too often
+    QUEUE/status/<worker>.jsonl        one result record per job, per worker
+
+A worker refreshes the mtime of its claim while converting. A claim whose
+mtime is older than the lease has a dead owner and is moved back to
+pending/ by whichever worker notices first.
+"""
+
+import os
+import json
+import time
+import socket
+import hashlib
+import random
+import threading
+from pathlib import Path
+
+STATE_DIRS = ('pending', 'claimed', 'done', 'failed', 'status')
+
+class Job:
+    """A queued conversion: one input file and its output path"""
+
+    def __init__(self, job_id, input_file, output_file, attempts=0, claim_path=None):
+        self.id = job_id
+        self.input = input_file
+        self.output = output_file
+        self.attempts = attempts
+        self.claim_path = claim_path
+
+    def to_json(self):
+        return json.dumps({
+            'id': self.id,
+            'input': self.input,
+            'output': self.output,
+            'attempts': self.attempts,
+        })
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['id'], data['input'], data['output'], data.get('attempts', 0), claim_path=path)
+
+class WorkQueue:
+    """Queue of conversion jobs stored in a shared directory"""
+
+    def __init__(self, queue_dir, lease=300, max_attempts=3, worker_id=None):
+        self.root = Path(queue_dir)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        for name in STATE_DIRS:
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, name):
+        return self.root / name
+
+    def _write_atomic(self, path, text):
+        tmp_path = path.with_name(f".{path.name}.{self.worker_id}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def enqueue(self, input_file, output_file):
+        """Add a job; returns False if the input is already queued or processed"""
+        input_file = str(Path(input_file).absolute())
+        job_id = hashlib.sha1(input_file.encode('utf-8')).hexdigest()[:20]
+        name = f"{job_id}.json"
+
+        if any((self._dir(state) / name).exists() for state in ('pending', 'done', 'failed')):
+            return False
+        if any(self._dir('claimed').glob(f"{name}.*")):
+            return False
+
+        job = Job(job_id, input_file, str(Path(output_file).absolute()))
+        self._write_atomic(self._dir('pending') / name, job.to_json())
+        return True
+
+    def claim(self):
+        """Atomically claim one pending job, or return None if none is available"""
+        names = [n for n in os.listdir(self._dir('pending')) if n.endswith('.json')]
+        # Start at a random position so concurrent workers rarely race for the same file
+        random.shuffle(names)
+
+        for name in names:
+            pending_path = self._dir('pending') / name
+            claim_path = self._dir('claimed') / f"{name}.{self.worker_id}"
+            try:
+                # Renaming keeps the mtime, so start the lease before the file
+                # becomes visible in claimed/
+                os.utime(pending_path)
+                os.rename(pending_path, claim_path)
+            except FileNotFoundError:
+                continue  # Another worker claimed it first
+            return Job.from_file(claim_path)
+
+        return None
+
+    def heartbeat(self, job):
+        """Extend the lease on a claimed job"""
+        try:
+            os.utime(job.claim_path)
+        except FileNotFoundError:
+            pass  # Lease already expired and the job was requeued
+
+    def complete(self, job, status, result):
+        """Move a claimed job to done/ or failed/ and log the result"""
+        record = dict(result, id=job.id, input=job.input, output=job.output,
+                      status=status, worker=self.worker_id, attempts=job.attempts + 1,
+                      time=time.time())
+        try:
+            os.rename(job.claim_path, self._dir(status) / f"{job.id}.json")
+        except FileNotFoundError:
+            # Our lease expired while converting; another worker owns the job now
+            record['status'] = 'lease-lost'
+        self.log(record)
+        return record['status']
+
+    def log(self, record):
+        """Append a record to this worker's status log"""
+        status_path = self._dir('status') / f"{self.worker_id}.jsonl"
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        fd = os.open(status_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def requeue_expired(self):
+        """Return jobs with expired leases to pending/; returns how many were requeued"""
+        requeued = 0
+        now = time.time()
+        for claim_path in self._dir('claimed').iterdir():
+            if claim_path.name.startswith('.'):
+                continue
+            try:
+                if now - claim_path.stat().st_mtime < self.lease:
+                    continue
+                # Only one worker wins this rename and gets to requeue the job.
+                # A worker that dies mid-requeue leaves the renamed file behind
+                # with a stale mtime, so it is picked up again on a later pass.
+                expired_path = claim_path.with_name(f"{claim_path.name}.expired.{self.worker_id}")
+                os.rename(claim_path, expired_path)
+                os.utime(expired_path)
+
+                job = Job.from_file(expired_path)
+                job.attempts += 1
+                self.log({'id': job.id, 'input': job.input, 'output': job.output,
+                          'status': 'expired', 'worker': self.worker_id,
+                          'owner': claim_path.name.split('.json.', 1)[-1],
+                          'attempts': job.attempts, 'time': now})
+
+                target_state = 'pending' if job.attempts < self.max_attempts else 'failed'
+                self._write_atomic(self._dir(target_state) / f"{job.id}.json", job.to_json())
+                os.remove(expired_path)
+            except FileNotFoundError:
+                continue
+            requeued += 1
+        return requeued
+
+    def has_claims(self):
+        return any(not p.name.startswith('.') for p in self._dir('claimed').iterdir())
+
+    def counts(self):
+        return {
+            state: sum(1 for p in self._dir(state).iterdir() if not p.name.startswith('.'))
+            for state in ('pending', 'claimed', 'done', 'failed')
+        }
+
+def run_worker(queue, process, poll_interval=5.0):
+    """Claim and process jobs until the queue is drained
+
+    process(input_file, output_file) converts one file and may return a dict
+    of extra fields for the status log; an exception marks the job failed.
+    Returns a dict with the number of jobs done and failed by this worker.
+    """
+    totals = {'done': 0, 'failed': 0}
+    heartbeat_interval = max(queue.lease / 3.0, 0.1)
+
+    while True:
+        job = queue.claim()
+        if job is None:
+            queue.requeue_expired()
+            job = queue.claim()
+        if job is None:
+            if not queue.has_claims():
+                break  # Nothing pending and nobody working: queue is drained
+            # Other workers are busy; wait in case one dies and its lease expires
+            time.sleep(poll_interval)
+            continue
+
+        stop = threading.Event()
+
+        def keep_alive():
+            while not stop.wait(heartbeat_interval):
+                queue.heartbeat(job)
+
+        heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat_thread.start()
+
+        start = time.time()
+        try:
+            result = process(job.input, job.output) or {}
+            status = 'done'
+        except Exception as e:
+            result = {'error': f"{getattr(e, 'error_class', type(e).__name__)}: {e}"}
+            status = 'failed'
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+
+        result['duration'] = round(time.time() - start, 3)
+        status = queue.complete(job, status, result)
+        if status in totals:
+            totals[status] += 1
+
+    return totals